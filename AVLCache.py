@@ -0,0 +1,300 @@
+"""Bounded caches of the nodes of an AVL tree, mapping keys to the nodes found by search
+
+A tree with a cache (see AVLTree.enable_cache) keeps it exact: only found nodes are cached, and
+delete, split, join and delete_many remove or move exactly the entries of the keys they change.
+"""
+
+from collections import OrderedDict
+
+
+"""
+A class representing a cache evicting the least recently used key
+"""
+
+class LRUCache(object):
+
+	"""the name of the eviction policy"""
+	policy = "lru"
+
+	"""Constructor for class LRUCache
+
+	@type capacity: int
+	@param capacity: the maximal number of cached keys
+	"""
+	#time complexity: O(1)
+
+	def __init__(self, capacity):
+		self.capacity = capacity
+		self.entries = OrderedDict() #key -> node, from the least recently used
+		self.counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+	"""returns the cached node of a key, marking the key as the most recently used
+
+	@rtype: AVLNode
+	@returns: the node, None if key is not cached
+	"""
+	#time complexity: O(1)
+
+	def get(self, key):
+		node = self.entries.get(key)
+		if node is None:
+			self.counters["misses"] += 1
+			return None
+		self.counters["hits"] += 1
+		self.entries.move_to_end(key)
+		return node
+
+	"""caches the node of a key, evicting the least recently used key if the cache is full
+
+	@type key: any
+	@type node: AVLNode
+	"""
+	#time complexity: O(1)
+
+	def put(self, key, node):
+		if self.capacity <= 0: return None
+		entries = self.entries
+		if key not in entries and len(entries) >= self.capacity:
+			entries.popitem(last = False)
+			self.counters["evictions"] += 1
+		entries[key] = node
+		entries.move_to_end(key)
+
+	"""removes a key from the cache, if it is cached
+
+	@type key: any
+	"""
+	#time complexity: O(1)
+
+	def discard(self, key):
+		if self.entries.pop(key, None) is not None: self.counters["invalidations"] += 1
+
+	"""moves the entries to two new caches of the same capacity, by comparing their keys with a key
+
+	@type key: any
+	@param key: the key the tree was split at, its own entry is dropped
+	@rtype: (LRUCache, LRUCache)
+	@returns: a tuple (left, right) of caches with the entries of the smaller and of the larger keys,
+	in the same order of use. Both keep a copy of the counters, the history of the split tree
+	"""
+	#time complexity: O(number of cached keys)
+
+	def partition(self, key):
+		left = LRUCache(self.capacity)
+		right = LRUCache(self.capacity)
+		left.counters = dict(self.counters)
+		right.counters = dict(self.counters)
+		for cachedKey, node in self.entries.items():
+			if cachedKey < key: left.entries[cachedKey] = node
+			elif key < cachedKey: right.entries[cachedKey] = node
+		self.entries.clear()
+		return left, right
+
+	"""adds the entries of another cache, while there is room for them
+
+	@type other: LRUCache
+	@param other: a cache of a tree joined into the tree of self, it is cleared. The counters of self
+	are kept as they are, since after a split both caches count the same history
+	"""
+	#time complexity: O(number of keys cached in other)
+
+	def merge(self, other):
+		for key, node in other.entries.items():
+			if len(self.entries) >= self.capacity: break
+			if key not in self.entries:
+				self.entries[key] = node
+				self.entries.move_to_end(key, last = False) #the joined keys were used less recently
+		other.entries.clear()
+
+	"""removes all the entries
+	"""
+	#time complexity: O(number of cached keys)
+
+	def clear(self):
+		self.entries.clear()
+
+	"""returns the number of cached keys
+
+	@rtype: int
+	"""
+	#time complexity: O(1)
+
+	def __len__(self):
+		return len(self.entries)
+
+
+"""
+A class representing a cache evicting the least frequently used key, and the least recently used
+one among keys used as often
+"""
+
+class LFUCache(object):
+
+	"""the name of the eviction policy"""
+	policy = "lfu"
+
+	"""Constructor for class LFUCache
+
+	@type capacity: int
+	@param capacity: the maximal number of cached keys
+	"""
+	#time complexity: O(1)
+
+	def __init__(self, capacity):
+		self.capacity = capacity
+		self.entries = {} #key -> node
+		self.uses = {} #key -> number of uses
+		self.buckets = {} #number of uses -> OrderedDict of the keys used that often, from the least recently used
+		self.min_uses = 0
+		self.counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+	"""adds a key to the bucket of its number of uses
+
+	@type key: any
+	@type uses: int
+	"""
+	#time complexity: O(1)
+
+	def add_to_bucket(self, key, uses):
+		self.uses[key] = uses
+		bucket = self.buckets.get(uses)
+		if bucket is None:
+			bucket = self.buckets[uses] = OrderedDict()
+		bucket[key] = None
+		if uses < self.min_uses or len(self.entries) == 1: self.min_uses = uses
+
+	"""removes a key from the bucket of its number of uses
+
+	@type key: any
+	@rtype: int
+	@returns: the number of uses of key
+	"""
+	#time complexity: O(1)
+
+	def remove_from_bucket(self, key):
+		uses = self.uses.pop(key)
+		bucket = self.buckets[uses]
+		del bucket[key]
+		if len(bucket) == 0:
+			del self.buckets[uses]
+			if uses == self.min_uses: self.min_uses = uses + 1 #the right value after a use, else fixed by evict
+		return uses
+
+	"""returns the cached node of a key, counting one more use of the key
+
+	@rtype: AVLNode
+	@returns: the node, None if key is not cached
+	"""
+	#time complexity: O(1)
+
+	def get(self, key):
+		node = self.entries.get(key)
+		if node is None:
+			self.counters["misses"] += 1
+			return None
+		self.counters["hits"] += 1
+		self.add_to_bucket(key, self.remove_from_bucket(key) + 1)
+		return node
+
+	"""evicts the least frequently used key
+	"""
+	#time complexity: O(1), O(number of distinct use counts) after a discard emptied the lowest bucket
+
+	def evict(self):
+		if self.min_uses not in self.buckets: self.min_uses = min(self.buckets)
+		key = next(iter(self.buckets[self.min_uses]))
+		self.remove_from_bucket(key)
+		del self.entries[key]
+		self.counters["evictions"] += 1
+
+	"""caches the node of a key, evicting the least frequently used key if the cache is full
+
+	@type key: any
+	@type node: AVLNode
+	"""
+	#time complexity: O(1)
+
+	def put(self, key, node):
+		if self.capacity <= 0: return None
+		if key in self.entries:
+			self.entries[key] = node
+			return None
+		if len(self.entries) >= self.capacity: self.evict()
+		self.entries[key] = node
+		self.add_to_bucket(key, 1)
+
+	"""removes a key from the cache, if it is cached
+
+	@type key: any
+	"""
+	#time complexity: O(1)
+
+	def discard(self, key):
+		if self.entries.pop(key, None) is not None:
+			self.remove_from_bucket(key)
+			self.counters["invalidations"] += 1
+
+	"""moves the entries to two new caches of the same capacity, by comparing their keys with a key
+
+	@type key: any
+	@param key: the key the tree was split at, its own entry is dropped
+	@rtype: (LFUCache, LFUCache)
+	@returns: a tuple (left, right) of caches with the entries of the smaller and of the larger keys,
+	keeping their numbers of uses. Both keep a copy of the counters, the history of the split tree
+	"""
+	#time complexity: O(number of cached keys)
+
+	def partition(self, key):
+		left = LFUCache(self.capacity)
+		right = LFUCache(self.capacity)
+		left.counters = dict(self.counters)
+		right.counters = dict(self.counters)
+		for uses in sorted(self.buckets):
+			for cachedKey in self.buckets[uses]:
+				if cachedKey < key: cache = left
+				elif key < cachedKey: cache = right
+				else: continue
+				cache.entries[cachedKey] = self.entries[cachedKey]
+				cache.add_to_bucket(cachedKey, uses)
+		self.clear()
+		return left, right
+
+	"""adds the entries of another cache, while there is room for them
+
+	@type other: LFUCache
+	@param other: a cache of a tree joined into the tree of self, it is cleared. The counters of self
+	are kept as they are, since after a split both caches count the same history
+	"""
+	#time complexity: O(m log(m)) for m keys cached in other
+
+	def merge(self, other):
+		otherUses = other.uses if isinstance(other, LFUCache) else {} #an LRUCache counts no uses
+		for key in sorted(other.entries, key = lambda key: otherUses.get(key, 1), reverse = True): #the most used keys first
+			if len(self.entries) >= self.capacity: break
+			if key not in self.entries:
+				self.entries[key] = other.entries[key]
+				self.add_to_bucket(key, otherUses.get(key, 1))
+		other.clear()
+
+	"""removes all the entries
+	"""
+	#time complexity: O(number of cached keys)
+
+	def clear(self):
+		self.entries.clear()
+		self.uses.clear()
+		self.buckets.clear()
+		self.min_uses = 0
+
+	"""returns the number of cached keys
+
+	@rtype: int
+	"""
+	#time complexity: O(1)
+
+	def __len__(self):
+		return len(self.entries)
+
+
+"""the cache classes by the name of their eviction policy"""
+POLICIES = {"lru": LRUCache, "lfu": LFUCache}
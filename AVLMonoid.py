@@ -0,0 +1,40 @@
+"""Monoids for augmenting an AVL tree, each node keeps the aggregate of its subtree"""
+
+
+"""
+A class representing an associative function over the items of a tree. Each item is lifted to an
+element, and the elements of a range are combined in order of keys, so combine does not have to be
+commutative.
+"""
+
+class Monoid(object):
+
+	"""Constructor for class Monoid
+
+	@type combine: function
+	@param combine: an associative function of two elements, returning their combination
+	@type lift: function
+	@param lift: a function of the key and the value of an item, returning its element. None to use
+	the value as the element
+	@type identity: any
+	@param identity: the aggregate of an empty range
+	"""
+	#time complexity: O(1)
+
+	def __init__(self, combine, lift = None, identity = None):
+		self.combine = combine
+		self.lift = lift if lift is not None else lambda key, value: value
+		self.identity = identity
+
+
+"""the sum of the values"""
+SUM = Monoid(lambda a, b: a + b, identity = 0)
+
+"""the minimal value, None for an empty range"""
+MIN = Monoid(min)
+
+"""the maximal value, None for an empty range"""
+MAX = Monoid(max)
+
+"""the number of items"""
+COUNT = Monoid(lambda a, b: a + b, lambda key, value: 1, 0)
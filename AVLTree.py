@@ -1,785 +1,2471 @@
-"""A class representing a node in an AVL tree"""
-
-class AVLNode(object):
-	"""Constructor for class AVLNode
-	
-	@type key: int
-	@param key: key of your node
-	@type value: string
-	@param value: data of your node
-	"""
-	#time complexity: O(1)
-
-	def __init__(self, key, value):
-		self.key = key
-		self.value = value
-		self.left = None
-		self.right = None
-		self.parent = None
-		self.height = -1
-
-	"""returns whether self is not a virtual node 
-
-	@rtype: bool
-	@returns: False if self is a virtual node, True otherwise.
-	"""
-	#time complexity: O(1)
-
-	def is_real_node(self):
-		if self.key is None: return False
-		return True
-
-	"""returns the left child
-
-	@rtype: AVLNode
-	@returns: the left child of self, None if there is no left child (if self is virtual)
-	"""
-	#time complexity: O(1)
-
-	def get_left(self):
-		return self.left
-
-	"""returns the right child
-
-	@rtype: AVLNode
-	@returns: the right child of self, None if there is no right child (if self is virtual)
-	"""
-	#time complexity: O(1)
-
-	def get_right(self):
-		return self.right
-
-	"""returns the parent
-
-	@rtype: AVLNode
-	@returns: the parent of self, None if there is no parent
-	"""
-	#time complexity: O(1)
-
-	def get_parent(self):
-		return self.parent
-
-	"""returns the key
-
-	@rtype: int or None
-	@returns: the key of self, None if the node is virtual
-	"""
-	#time complexity: O(1)
-
-	def get_key(self):
-		return self.key
-
-	"""returns the value
-
-	@rtype: any
-	@returns: the value of self, None if the node is virtual
-	"""
-	#time complexity: O(1)
-
-	def get_value(self):
-		return self.value
-
-	"""returns the height
-
-	@rtype: int
-	@returns: the height of self, -1 if the node is virtual
-	"""
-	#time complexity: O(1)
-
-	def get_height(self):
-		return self.height
-
-	"""sets left child
-
-	@type node: AVLNode
-	@param node: a node
-	"""
-	#time complexity: O(1)
-
-	def set_left(self, node):
-		self.left = node
-
-	"""sets right child
-
-	@type node: AVLNode
-	@param node: a node
-	"""
-	#time complexity: O(1)
-
-	def set_right(self, node):
-		self.right = node
-
-	"""sets parent
-
-	@type node: AVLNode
-	@param node: a node
-	"""
-	#time complexity: O(1)
-
-	def set_parent(self, node):
-		self.parent = node
-
-	"""sets key
-
-	@type key: int or None
-	@param key: key
-	"""
-	#time complexity: O(1)
-
-	def set_key(self, key):
-		self.key = key
-
-	"""sets value
-
-	@type value: any
-	@param value: data
-	"""
-	#time complexity: O(1)
-
-	def set_value(self, value):
-		self.value = value
-
-	"""sets the height of the node
-
-	@type h: int
-	@param h: the height
-	"""
-	#time complexity: O(1)
-
-	def set_height(self, h):
-		self.height = h
-
-	""""calculates the height of node according to children
-
-	@rtype: int
-	@returns: the calculated height of self, -1 if the node is virtual
-	"""
-	#time complexity: O(1)
-
-	def calc_height(self):
-		if not self.is_real_node(): return -1
-		else: return max(self.left.height , self.right.height) + 1
-
-	""""fixes the height of node according to children, if node is not virtual
-	"""
-	#time complexity: O(1)
-
-	def fix_height(self):
-		if self.is_real_node(): self.set_height(max(self.left.height , self.right.height) + 1)
-
-	"""returns the balance factor of a node - height difference between left child
-	to right child, if node is not virtual
-
-	@rtype: int
-	@returns: the balance factor of self
-	"""
-	#time complexity: O(1)
-
-	def get_balance_factor(self):
-		return self.left.height - self.right.height
-
-	"""sets node as the right child of self and sets node's parent as self
-
-	@type node: AVLNode
-	@param node: a node
-	"""
-	#time complexity: O(1)
-
-	def set_right_with_parent(self, node):
-		self.right = node
-		node.set_parent(self)
-
-	"""sets node as the left child of self and sets node's parent as self
-
-	@type node: AVLNode
-	@param node: a node
-	"""
-	#time complexity: O(1)
-
-	def set_left_with_parent(self, node):
-		self.left = node
-		node.set_parent(self)
-
-"""
-A class representing an AVL tree
-"""
-
-class AVLTree(object):
-
-	"""
-	Constructor for class AVLTree 
-	"""
-	#time complexity: O(1)
-
-	def __init__(self, selfRoot = None, selfMax = None , selfTreeSize = 0):
-		self.root = selfRoot
-		self.max = selfMax
-		self.tree_size = selfTreeSize
-
-	"""searches for a node in the dictionary corresponding to the key (starting at the root)
-        
-	@type key: int
-	@param key: a key to be searched
-	@rtype: (AVLNode,int)
-	@returns: a tuple (x,e) where x is the node corresponding to key (or None if not found),
-	and e is the number of edges on the path between the starting node and ending node+1.
-	"""
-	# time complexity: O(log(n))
-
-	def search(self, key):
-		node = self.root
-		edges = 1
-		while (node is not None) and (node.is_real_node()):
-			currKey = node.get_key()
-			if currKey == key: return node, edges
-			if currKey < key:
-				node = node.get_right()
-				edges += 1
-			else: 
-				node = node.get_left()
-				edges += 1
-		if node is not None and not node.is_real_node(): #did not find key, remove 1 edge travelled to virtual node
-			edges = edges - 1
-		return None, edges
-
-	"""searches for a node in the dictionary corresponding to the key, starting at the max
-        
-	@type key: int
-	@param key: a key to be searched
-	@rtype: (AVLNode,int)
-	@returns: a tuple (x,e) where x is the node corresponding to key (or None if not found),
-	and e is the number of edges on the path between the starting node and ending node+1.
-	"""
-	# time complexity: O(log(n))
-
-	def finger_search(self, key):
-		node = self.max
-		edges = 1
-		#going up from pointer to max until we reach the node key could be in the subtree of
-		while (node.is_real_node()) and (key < node.key) and (node != self.root):
-			node = node.get_parent()
-			edges += 1
-
-		#searching the subtree starting from the node we found with regular search
-		while (node is not None) and (node.is_real_node()):
-			currKey = node.get_key()
-			if currKey == key: return node, edges
-			if currKey < key:
-				node = node.get_right()
-				edges += 1
-			else:
-				node = node.get_left()
-				edges += 1
-		if node is not None and not node.is_real_node():  # did not find key, remove 1 edge travelled to virtual node
-			edges = edges - 1
-		return None, edges
-
-	"""inserts a new node into the dictionary with the corresponding key and value (starting at the root)
-
-	@type key: int
-	@pre: key currently does not appear in the dictionary
-	@param key: key of item that is to be inserted to self
-	@type val: string
-	@param val: the value of the item
-	@rtype: (AVLNode,int,int)
-	@returns: a 3-tuple (x,e,h) where x is the new node,
-	e is the number of edges on the path between the starting node and new node before rebalancing,
-	and h is the number of PROMOTE cases during the AVL rebalancing
-	"""
-	# time complexity: O(log(n))
-
-	def insert(self, key, val):
-		node = self.root
-		edges = 0
-		cntPromotes = 0
-
-		if node is None: #empty tree - insert new node as root and done
-			self.root = AVLNode(key,val)
-			self.root.set_height(0)
-			self.max = self.root
-			self.root.set_left_with_parent(AVLNode(None,None))
-			self.root.set_right_with_parent(AVLNode(None,None))
-			self.tree_size += 1  # update tree size
-			return self.root, edges, cntPromotes
-		
-		else: #not an empty tree
-			#look for insertion point in a virtual node through searching the key
-			while node.is_real_node():
-				if node.get_key() < key:
-					node = node.get_right()
-					edges += 1
-				else: 
-					node = node.get_left()
-					edges += 1
-
-			#now, node is the virtual node we insert in. insertion:
-			node.set_key(key)
-			node.set_value(val)
-			node.set_height(0)
-			node.set_left_with_parent(AVLNode(None,None))
-			node.set_right_with_parent(AVLNode(None,None))
-			# rebalance starting from parent of node we found
-			cntPromotes = self.rebalance(node.get_parent())
-
-		if key > self.max.get_key(): self.max = node #update max key of tree
-		self.tree_size += 1 #update tree size
-		self.fix_root() # fixing root if needed
-
-		return node, edges, cntPromotes 
-
-	"""rebalances AVL tree after insertion
-
-	@type node: AVLNode
-	@pre: node is the parent of an inserted node
-	@rtype: int
-	@returns: the number of PROMOTE cases during rebalancing
-	"""
-	# time complexity: O(log(n))
-
-	def rebalance (self, node):
-		cntPromotes = 0
-		while node is not None: #going up the tree, rebalancing where needed
-				bf = node.get_balance_factor()
-				if -1 <= bf <= 1: #valid balance factor for node
-					if node.get_height() < node.calc_height(): #height needs to be promoted
-						cntPromotes += 1
-					node.fix_height()
-					node = node.get_parent() #moving up
-				else: #invalid balance factor - rotations needed
-					self.rotate(node) #rotating tree around node 
-		return  cntPromotes
-
-	"""rotates tree around node with an invalid balance factor
-
-	@type node: AVLNode
-	@pre: node points to a node in self
-	"""
-	# time complexity: O(1)
-
-	def rotate (self, node):
-		if node.get_balance_factor() == 2: #left subtree is longer
-			if node.get_left().get_balance_factor() == 1: #right rotation 
-				self.right_rotate(node)
-			else: #bf = -1, left rotation (on left child) then right rotation (on node) 
-				self.left_rotate(node.get_left())
-				self.right_rotate(node)
-		else: #bf = -2, right subtree is longer	
-			if node.get_right().get_balance_factor() == -1: #left rotation 
-				self.left_rotate(node)
-			else: #bf = 1, right rotation (on right child) then left rotation (on node) 
-				self.right_rotate(node.get_right())
-				self.left_rotate(node)
-		
-	"""rotates edge between node and left child to right
-
-	@type node: AVLNode
-	@pre: node points to a node in self
-	"""
-	# time complexity: O(1)
-
-	def right_rotate (self, node):
-		temp = node.get_left() #the new root of the subtree of node 
-		#fixing parent of node to be parent of new root
-		parent = node.get_parent()
-		if parent is None: #node is the root of whole tree
-			self.root = temp
-			temp.set_parent(None)
-		else: #parent exists
-			if node.get_key() > parent.get_key(): #node is right child of parent
-				parent.set_right_with_parent(temp)
-			else: #node is left child of parent
-				parent.set_left_with_parent(temp)
-		node.set_left_with_parent(temp.get_right()) #moving right child of temp
-		temp.set_right_with_parent(node) #temp is the new root
-		temp.fix_height()
-		node.fix_height()
-
-	"""rotates edge between node and right child to left
-
-	@type node: AVLNode
-	@pre: node points to a node in self
-	"""
-	# time complexity: O(1)
-
-	def left_rotate (self, node):
-		temp = node.get_right() #the new root of the subtree of node 
-		#fixing parent of node to be parent of new root
-		parent = node.get_parent()
-		if parent is None: #node is the root of whole tree
-			self.root = temp
-			temp.set_parent(None)
-		else: #parent exists
-			if node.get_key() > parent.get_key(): #node is right child of parent
-				parent.set_right_with_parent(temp)
-			else: #node is left child of parent
-				parent.set_left_with_parent(temp)
-		node.set_right_with_parent(temp.get_left()) #moving left child of temp
-		temp.set_left_with_parent(node) #temp is the new root
-		temp.fix_height()
-		node.fix_height()
-
-	"""inserts a new node into the dictionary with corresponding key and value, starting at the max
-
-	@type key: int
-	@pre: key currently does not appear in the dictionary
-	@param key: key of item that is to be inserted to self
-	@type val: string
-	@param val: the value of the item
-	@rtype: (AVLNode,int,int)
-	@returns: a 3-tuple (x,e,h) where x is the new node,
-	e is the number of edges on the path between the starting node and new node before rebalancing,
-	and h is the number of PROMOTE cases during the AVL rebalancing
-	"""
-	# time complexity: O(log(n))
-
-	def finger_insert(self, key, val):
-		node = self.max
-		if node is None: return self.insert(key, val) #tree is empty, perform regular insert
-
-		edges = 0
-		#finger search - going up from pointer to max until we reach the node key should have been in the subtree of
-		while (node.is_real_node()) and (key < node.key) and (node != self.root) and (key < node.get_parent().get_key()):
-			node = node.get_parent()
-			edges += 1
-
-		#look for insertion point in a virtual node through searching the key, starting from node
-		cntPromotes = 0
-		while node.is_real_node():
-			if node.get_key() < key:
-				node = node.get_right()
-				edges += 1
-			else:
-				node = node.get_left()
-				edges += 1
-
-		# now, node is the virtual node we insert in
-		# #inserting node at the subtree starting from the node we found, same as in method insert
-		node.set_key(key)
-		node.set_value(val)
-		node.set_height(0)
-		node.set_left_with_parent(AVLNode(None, None))
-		node.set_right_with_parent(AVLNode(None, None))
-		cntPromotes += self.rebalance(node.get_parent())  # rebalance starting from parent of node we found
-
-		if key > self.max.get_key(): self.max = node  # update max key of tree
-		self.tree_size += 1  # update tree size
-		self.fix_root() # fixing root if needed
-
-		return node, edges, cntPromotes
-
-	"""fixes the root of the tree if the root has a new father
-
-	@pre: root is a node in self
-	"""
-	# time complexity: O(1)
-
-	def fix_root(self):
-		while self.root.get_parent() is not None:
-			self.root = self.root.get_parent()
-
-	"""deletes node from the dictionary
-
-	@type node: AVLNode
-	@pre: node is a real pointer to a node in self
-	"""
-	# time complexity: O(log(n))
-
-	def delete(self, node):
-		if not node or not node.is_real_node(): #node is a virtual node
-			return None
-
-		#Case 1: node is a leaf (has only virtual children)
-		if not node.get_left().is_real_node() and not node.get_right().is_real_node():
-			parent = node.get_parent()
-			virtual_node = AVLNode(None,None)
-			if parent is None: #node is the root
-				self.root =  None
-			elif parent.get_left() == node: #replace with virtual node
-				parent.set_left_with_parent(virtual_node) #node is left child
-			else:
-				parent.set_right_with_parent(virtual_node) #node is right child
-			self.rebalance_delete(parent) #rebalancing
-
-		#Case 2: node has one real child, one virtual child
-		elif not node.get_left().is_real_node(): #the virtual child is the left child
-			self.replace_node_delete(node, node.get_right())
-			self.rebalance_delete(node.get_right()) #rebalancing after delete
-		elif not node.get_right().is_real_node(): #the virtual child is the right child
-			self.replace_node_delete(node, node.get_left())
-			self.rebalance_delete(node.get_left()) #rebalancing after delete
-
-		#Case 3: node has 2 real children
-		else:
-			successor = self.successor(node)  # finding the successor of node
-			successor_parent = successor.get_parent()
-
-			if successor_parent is not node: #successor's is not the direct right child of node
-				self.replace_node_delete(successor, successor.get_right())
-				successor.set_right_with_parent(node.get_right())
-
-			self.replace_node_delete(node, successor)
-			successor.set_left_with_parent(node.get_left())
-
-			#rebalance after all the changes
-			if successor_parent is not node:
-				self.rebalance_delete(successor_parent)
-			else:
-				self.rebalance_delete(successor)
-
-		#update the max pointer and the tree size 
-		self.tree_size -= 1
-		if self.tree_size == 0: ##if the tree is empty after deletion
-			self.max = None
-		elif node == self.max: #tree is not empty
-			self.update_max()
-
-	"""rebalances the tree after deleting a node
-	
-	@type node: AVLNode
-	@pre: node is a parent of a deleted node
-	"""
-	#time complexity: O(log(n))
-	
-	def rebalance_delete(self,node): 
-		while node is not None:
-			node.fix_height()
-			bf = node.get_balance_factor()
-			if abs(bf) > 1:
-				self.rotate(node)
-			node = node.get_parent()
-
-	"""replaces a node with his one son
-	
-	@type old_node: AVLNode
-	@type new_node: AVLNode
-	"""
-	#time complexity: O(1)
-
-	def replace_node_delete(self, old_node, new_node):
-		parent = old_node.get_parent()
-		if parent is None: #old node is the root
-			self.root = new_node
-			if new_node.is_real_node():
-				new_node.set_parent(None)
-		else: #old node is not the root
-			if parent.get_left() == old_node:
-				parent.set_left_with_parent(new_node)
-			else:
-				parent.set_right_with_parent(new_node)
-
-	"""updates the max pointer by searching the tree
-	
-	@post: the max pointer points to the node with the highest key in the tree, or None if the tree is empty
-	"""
-	# time complexity: O(log(n))
-
-	def update_max(self): 
-		if self.root is None: #the tree is empty, has no max
-			self.max = None
-			return None
-		currentNode = self.root #tree is not empty, going the last right child
-		while currentNode.get_right().is_real_node():
-			currentNode = currentNode.get_right()
-		self.max = currentNode
-
-	"""return the successor of node in case it has a right subtree
-
-		@type node: AVLNode
-		@pre: node is a real pointer to a node in self
-		@rtype: AVLNode
-		@returns: the successor of node, None if node has the max key
-		"""
-
-	# time complexity O(log(n))
-
-	def successor(self,node): #method for case 3 of delete, so we know there is a right child
-		temp = node.get_right()
-		while temp.get_left().is_real_node():
-			temp = temp.get_left()
-		return temp
-	
-	"""joins self with item and another AVLTree
-
-	@type tree2: AVLTree 
-	@param tree2: a dictionary to be joined with self
-	@type key: int 
-	@param key: the key separting self and tree2
-	@type val: string
-	@param val: the value corresponding to key
-	@pre: all keys in self are smaller than key and all keys in tree2 are larger than key,
-	or the opposite way
-	"""
-	# time complexity: O(|h1-h2|)
-
-	def join(self, tree2, key, val):
-		#edge cases
-		if self.root is None or self.root.get_key() is None: #self is an empty tree
-			#insert x to tree2 and update self to be tree2
-			tree2.insert(key,val)
-			self.root = tree2.get_root()
-			self.tree_size = tree2.size()
-			self.max = tree2.max_node()
-			return None
-
-		if tree2.get_root() is None or tree2.get_root().get_key() is None: #tree2 is an empty tree
-			#insert x to self
-			self.insert(key,val)
-			return None
-
-		size1 = self.tree_size
-		size2 = tree2.size()  # tree sizes before mutating trees
-		x = AVLNode(key, val)  # node "separating" trees
-
-		if self.root.get_key() < key: #all the keys in self are smaller than in tree2
-			h1 = self.root.get_height()
-			h2 = tree2.get_root().get_height()
-
-			if h1 <= h2: #tree2 is taller or the same height as self
-				#travel down left of tree2 to find connection point
-				b = tree2.get_root()
-				while b.get_height() > h1: 
-					b = b.get_left()
-				c = b.get_parent()
-				#now, b is of height h1 or h1 - 1, c is of height h1 + 1 or h1 + 2
-				#join trees through x
-				x.set_left_with_parent(self.root)
-				x.set_right_with_parent(b)
-				x.fix_height()
-				if c is not None: #if b is not the root of tree2
-					c.set_left_with_parent(x)
-
-			else: #self is taller than tree2
-				#travel down right of tree2 to find connection point
-				b = self.get_root()
-				while b.get_height() > h2: 
-					b = b.get_right()
-				c = b.get_parent()
-				#now, b is of height h1 or h1 - 1, c is of height h1 + 1 or h1 + 2
-				#join trees through x
-				x.set_right_with_parent(tree2.get_root())
-				x.set_left_with_parent(b)
-				x.fix_height()
-				#b cannot be the root of tree2, it's height is lower
-				c.set_right_with_parent(x)
-
-			self.root = tree2.get_root()
-			self.tree_size = size1 + size2 + 1
-			self.max = tree2.max_node()
-			self.fix_root() #fixing root if needed
-			self.rebalance_delete(x) #rebalancing upwards of connecting node in the same way as in delete
-		
-		else: #all the keys in self are larger than in tree2
-			tree2.join(self, key, val) #calling the function on tree2 with self as a parameter instead
-			#updating self to be tree2
-			self.root = tree2.get_root()
-			self.max = tree2.max_node()
-			self.tree_size = tree2.get_size()
-
-	"""splits the dictionary at a given node - wrapper function
-
-		@type node: AVLNode
-		@pre: node is in self
-		@param node: the node in the dictionary to be used for the split
-		@rtype: (AVLTree, AVLTree)
-		@returns: a tuple (left, right), where left is an AVLTree representing the keys in the 
-		dictionary smaller than node.key, and right is an AVLTree representing the keys in the 
-		dictionary larger than node.key.
-		"""
-
-	# time complexity O(log(n))
-
-	def split(self, node):
-		t1, t2 = self.rec_split(node)
-		t1.update_max()
-		t2.update_max()
-		return t1, t2
-
-	"""splits the dictionary at a given node - recursive function
-
-	@type node: AVLNode
-	@pre: node is in self
-	@param node: the node in the dictionary to be used for the split
-	@rtype: (AVLTree, AVLTree)
-	@returns: a tuple (left, right), where left is an AVLTree representing the keys in the 
-	dictionary smaller than node.key, and right is an AVLTree representing the keys in the 
-	dictionary larger than node.key.
-	"""
-	# time complexity O(log(n))
-	
-	def rec_split(self, node):
-		if node.get_key() == self.root.get_key(): #split on root
-			return (AVLTree(self.root.get_left(), self.root.get_left(), 0),
-					AVLTree(self.root.get_right(), self.root.get_right(), 0))
-
-		#subtrees of root
-		currLeft = AVLTree(self.root.get_left(), self.root.get_left(), 0)
-		currRight = AVLTree(self.root.get_right(), self.root.get_right(), 0)
-
-		if node.get_key() < self.root.get_key(): #split on left subtree
-			lLeft, lRight = currLeft.split(node) #recursivly splitting left subtree
-			#joining larger keys subtrees with root inbetween
-			lRight.join(currRight, self.root.get_key(), self.root.get_value()) 
-			return lLeft, lRight
-
-		else: #split on right subtree
-			rLeft, rRight = currRight.split(node) #recursivly splitting right subtree
-			#joining smaller keys subtrees with root inbetween
-			rLeft.join(currLeft, self.root.get_key(), self.root.get_value()) 
-			return rLeft, rRight
-
-	"""returns an array representing the dictionary 
-
-	@rtype: list
-	@returns: a sorted list according to key of tuples (key, value) representing the dictionary
-	"""
-	# time complexity: O(n)
-
-	def avl_to_array(self):
-		arr = []
-		self.avl_to_array_rec(self.root, arr)
-		return arr
-
-	"""returns an array representing the dictionary, recursive
-	
-	@type node: AVLNode
-	@:param node: the current node being traversed
-	type result: list
-	@:param result: list to store the in-order traversal
-	"""
-	# time complexity O(n)
-
-	def avl_to_array_rec(self, node, arr):
-		if node and node.is_real_node(): #node is a real node
-			self.avl_to_array_rec(node.get_left(), arr)
-			arr.append((node.get_key(), node.get_value()))
-			self.avl_to_array_rec(node.get_right(), arr)
-	
-	"""returns the node with the maximal key in the dictionary
-
-	@rtype: AVLNode
-	@returns: the maximal node, None if the dictionary is empty
-	"""
-	#complexity: O(1)
-
-	def max_node(self):
-		return self.max 
-
-	"""returns the number of items in dictionary 
-
-	@rtype: int
-	@returns: the number of items in dictionary 
-	"""
-	#complexity: O(1)
-
-	def size(self):
-		return self.tree_size
-
-	"""returns the root of the tree representing the dictionary
-
-	@rtype: AVLNode
-	@returns: the root, None if the dictionary is empty
-	"""
-	#complexity: O(1)
-
-	def get_root(self):
-		return self.root
\ No newline at end of file
+"""A class representing a node in an AVL tree"""
+
+import heapq
+import math
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from AVLCache import POLICIES
+from AVLTreeStats import AVLTreeStats
+
+class AVLNode(object):
+	"""Constructor for class AVLNode
+	
+	@type key: int
+	@param key: key of your node
+	@type value: string
+	@param value: data of your node
+	"""
+	#time complexity: O(1)
+
+	__slots__ = ("key", "value", "left", "right", "parent", "height", "size")
+
+	def __init__(self, key, value):
+		self.key = key
+		self.value = value
+		self.left = None
+		self.right = None
+		self.parent = None
+		self.height = -1
+		self.size = 0
+
+	"""returns whether self is not a virtual node 
+
+	@rtype: bool
+	@returns: False if self is a virtual node, True otherwise.
+	"""
+	#time complexity: O(1)
+
+	def is_real_node(self):
+		if self.key is None: return False
+		return True
+
+	"""returns the left child
+
+	@rtype: AVLNode
+	@returns: the left child of self, None if there is no left child (if self is virtual)
+	"""
+	#time complexity: O(1)
+
+	def get_left(self):
+		return self.left
+
+	"""returns the right child
+
+	@rtype: AVLNode
+	@returns: the right child of self, None if there is no right child (if self is virtual)
+	"""
+	#time complexity: O(1)
+
+	def get_right(self):
+		return self.right
+
+	"""returns the parent
+
+	@rtype: AVLNode
+	@returns: the parent of self, None if there is no parent
+	"""
+	#time complexity: O(1)
+
+	def get_parent(self):
+		return self.parent
+
+	"""returns the key
+
+	@rtype: int or None
+	@returns: the key of self, None if the node is virtual
+	"""
+	#time complexity: O(1)
+
+	def get_key(self):
+		return self.key
+
+	"""returns the value
+
+	@rtype: any
+	@returns: the value of self, None if the node is virtual
+	"""
+	#time complexity: O(1)
+
+	def get_value(self):
+		return self.value
+
+	"""returns the height
+
+	@rtype: int
+	@returns: the height of self, -1 if the node is virtual
+	"""
+	#time complexity: O(1)
+
+	def get_height(self):
+		return self.height
+
+	"""returns the size of the subtree of the node
+
+	@rtype: int
+	@returns: the number of real nodes in the subtree of self, 0 if the node is virtual
+	"""
+	#time complexity: O(1)
+
+	def get_size(self):
+		return self.size
+
+	"""sets left child
+
+	@type node: AVLNode
+	@param node: a node
+	"""
+	#time complexity: O(1)
+
+	def set_left(self, node):
+		self.left = node
+
+	"""sets right child
+
+	@type node: AVLNode
+	@param node: a node
+	"""
+	#time complexity: O(1)
+
+	def set_right(self, node):
+		self.right = node
+
+	"""sets parent
+
+	@type node: AVLNode
+	@param node: a node
+	"""
+	#time complexity: O(1)
+
+	def set_parent(self, node):
+		self.parent = node
+
+	"""sets key
+
+	@type key: int or None
+	@param key: key
+	"""
+	#time complexity: O(1)
+
+	def set_key(self, key):
+		self.key = key
+
+	"""sets value
+
+	@type value: any
+	@param value: data
+	"""
+	#time complexity: O(1)
+
+	def set_value(self, value):
+		self.value = value
+
+	"""sets the height of the node
+
+	@type h: int
+	@param h: the height
+	"""
+	#time complexity: O(1)
+
+	def set_height(self, h):
+		self.height = h
+
+	"""sets the size of the subtree of the node
+
+	@type s: int
+	@param s: the size
+	"""
+	#time complexity: O(1)
+
+	def set_size(self, s):
+		self.size = s
+
+	""""calculates the height of node according to children
+
+	@rtype: int
+	@returns: the calculated height of self, -1 if the node is virtual
+	"""
+	#time complexity: O(1)
+
+	def calc_height(self):
+		if not self.is_real_node(): return -1
+		else: return max(self.left.height , self.right.height) + 1
+
+	""""fixes the height and the subtree size of node according to children, if node is not virtual
+	"""
+	#time complexity: O(1)
+
+	def fix_height(self):
+		if self.is_real_node():
+			self.height = max(self.left.height , self.right.height) + 1
+			self.size = self.left.size + self.right.size + 1
+
+	"""returns the balance factor of a node - height difference between left child
+	to right child, if node is not virtual
+
+	@rtype: int
+	@returns: the balance factor of self
+	"""
+	#time complexity: O(1)
+
+	def get_balance_factor(self):
+		return self.left.height - self.right.height
+
+	"""sets node as the right child of self and sets node's parent as self
+
+	@type node: AVLNode
+	@param node: a node
+	"""
+	#time complexity: O(1)
+
+	def set_right_with_parent(self, node):
+		self.right = node
+		node.set_parent(self)
+
+	"""sets node as the left child of self and sets node's parent as self
+
+	@type node: AVLNode
+	@param node: a node
+	"""
+	#time complexity: O(1)
+
+	def set_left_with_parent(self, node):
+		self.left = node
+		node.set_parent(self)
+
+"""A class representing a node of a tree with a key function, node.key caches the result of the
+key function, which is the key the tree is ordered by"""
+
+class KeyedAVLNode(AVLNode):
+	"""Constructor for class KeyedAVLNode
+
+	@type key: any
+	@param key: the result of the key function on itemKey
+	@type value: string
+	@param value: data of your node
+	@type itemKey: any
+	@param itemKey: the key given by the user
+	"""
+	#time complexity: O(1)
+
+	__slots__ = ("item_key",)
+
+	def __init__(self, key, value, itemKey):
+		AVLNode.__init__(self, key, value)
+		self.item_key = itemKey
+
+	"""returns the key given by the user
+
+	@rtype: any
+	@returns: the key of self, None if the node is virtual.
+	"""
+	#time complexity: O(1)
+
+	def get_key(self):
+		return self.item_key
+
+"""A class representing a node of an augmented tree, which keeps the aggregate of its subtree
+under a monoid. The aggregate is recomputed with the height, wherever fix_height runs"""
+
+class AugmentedAVLNode(KeyedAVLNode):
+	"""Constructor for class AugmentedAVLNode, the node is a leaf until it gets children
+
+	@type key: any
+	@param key: the key the tree is ordered by, see KeyedAVLNode
+	@type value: string
+	@param value: data of your node
+	@type itemKey: any
+	@param itemKey: the key given by the user, the same as key in a tree without a key function
+	@type monoid: Monoid
+	@param monoid: the monoid of the tree
+	"""
+	#time complexity: O(1)
+
+	__slots__ = ("aggregate", "monoid")
+
+	def __init__(self, key, value, itemKey, monoid):
+		KeyedAVLNode.__init__(self, key, value, itemKey)
+		self.monoid = monoid
+		self.aggregate = monoid.lift(itemKey, value)
+
+	"""returns the aggregate of the subtree of self
+
+	@rtype: any
+	@returns: the combination of the elements of the items in the subtree, in order of keys
+	"""
+	#time complexity: O(1)
+
+	def get_aggregate(self):
+		return self.aggregate
+
+	""""fixes the height, the subtree size and the aggregate of node according to children
+	"""
+	#time complexity: O(1)
+
+	def fix_height(self):
+		left = self.left
+		right = self.right
+		self.height = max(left.height , right.height) + 1
+		self.size = left.size + right.size + 1
+		monoid = self.monoid
+		aggregate = monoid.lift(self.item_key, self.value)
+		if left.size > 0: aggregate = monoid.combine(left.aggregate, aggregate) #left is a real node
+		if right.size > 0: aggregate = monoid.combine(aggregate, right.aggregate)
+		self.aggregate = aggregate
+
+"""A class representing the virtual node shared by all the leaves of all the trees"""
+
+class AVLVirtualNode(AVLNode):
+	"""Constructor for class AVLVirtualNode, the node has no key, no value and no children
+	"""
+	#time complexity: O(1)
+
+	__slots__ = ()
+
+	def __init__(self):
+		object.__setattr__(self, "key", None)
+		object.__setattr__(self, "value", None)
+		object.__setattr__(self, "left", None)
+		object.__setattr__(self, "right", None)
+		object.__setattr__(self, "parent", None)
+		object.__setattr__(self, "height", -1)
+		object.__setattr__(self, "size", 0)
+
+	"""the virtual node is shared, so it keeps no parent - setting the parent does nothing
+
+	@type node: AVLNode
+	@param node: a node
+	"""
+	#time complexity: O(1)
+
+	def set_parent(self, node):
+		pass
+
+	"""the virtual node is immutable, any other change raises an error
+	"""
+	#time complexity: O(1)
+
+	def __setattr__(self, name, value):
+		raise AttributeError("the virtual node is immutable")
+
+	"""pickles the virtual node by reference, so it unpickles to the single VIRTUAL_NODE
+
+	@rtype: str
+	@returns: the name of the module global holding the virtual node
+	"""
+	#time complexity: O(1)
+
+	def __reduce__(self):
+		return "VIRTUAL_NODE"
+
+	"""the virtual node is shared, so a copy of it is itself
+
+	@rtype: AVLVirtualNode
+	"""
+	#time complexity: O(1)
+
+	def __copy__(self):
+		return self
+
+	"""the virtual node is shared, so a deep copy of it is itself
+
+	@type memo: dict
+	@param memo: the objects copied so far by copy.deepcopy
+	@rtype: AVLVirtualNode
+	"""
+	#time complexity: O(1)
+
+	def __deepcopy__(self, memo):
+		return self
+
+"""the single virtual node used as the child of every real leaf"""
+VIRTUAL_NODE = AVLVirtualNode()
+
+"""
+A class representing an AVL tree
+"""
+
+class AVLTree(object):
+
+	"""
+	Constructor for class AVLTree 
+
+	@type keyFunc: function
+	@param keyFunc: a function of one key returning the key to order the tree by, computed once
+	per node and cached in it. None to order the tree by the keys themselves
+	@type monoid: Monoid
+	@param monoid: the monoid each node aggregates its subtree with, see AVLMonoid. None for a tree
+	without aggregates
+	"""
+	#time complexity: O(1)
+
+	def __init__(self, selfRoot = None, selfMax = None , selfTreeSize = 0, selfMin = None, keyFunc = None, monoid = None):
+		self.root = selfRoot
+		self.max = selfMax
+		self.tree_size = selfTreeSize
+		self.min = selfMin
+		self.key_func = keyFunc
+		self.monoid = monoid
+		self.finger = None #the last accessed node, None if there is none
+		self.stats = None #the AVLTreeStats counting the work of the tree, None while disabled
+		self.cache = None #the cache of lookup, mapping keys to nodes, None while disabled
+		self.relaxed = None #the settings, marked nodes and counters of relaxed balance, None in strict mode
+
+	"""builds a perfectly balanced tree from items sorted by key
+
+	@type items: iterable
+	@param items: (key, value) tuples
+	@type keyFunc: function
+	@param keyFunc: the key function of the new tree, see the constructor
+	@type monoid: Monoid
+	@param monoid: the monoid of the new tree, see the constructor
+	@pre: the keys are distinct and sorted in increasing order (of keyFunc(key) with a key function)
+	@rtype: AVLTree
+	@returns: a new tree holding all the items
+	"""
+	# time complexity: O(n)
+
+	@classmethod
+	def from_sorted(cls, items, keyFunc = None, monoid = None):
+		if not isinstance(items, list): items = list(items)
+		tree = cls(keyFunc = keyFunc, monoid = monoid)
+		if len(items) == 0: return tree #empty tree
+		tree.root = tree.build_subtree(items, 0, len(items) - 1)
+		tree.root.set_parent(None)
+		tree.tree_size = len(items)
+		tree.update_max()
+		tree.update_min()
+		return tree
+
+	"""builds a perfectly balanced tree from items in any order
+
+	@type items: iterable
+	@param items: (key, value) tuples
+	@type keyFunc: function
+	@param keyFunc: the key function of the new tree, see the constructor
+	@type monoid: Monoid
+	@param monoid: the monoid of the new tree, see the constructor
+	@pre: the keys are distinct
+	@rtype: AVLTree
+	@returns: a new tree holding all the items
+	"""
+	# time complexity: O(n log(n)) for sorting, O(n) for building
+
+	@classmethod
+	def from_items(cls, items, keyFunc = None, monoid = None):
+		if keyFunc is None: return cls.from_sorted(sorted(items, key = lambda item: item[0]), None, monoid)
+		return cls.from_sorted(sorted(items, key = lambda item: keyFunc(item[0])), keyFunc, monoid)
+
+	"""builds a balanced subtree from items[lo..hi] - recursive function
+
+	@type items: list
+	@param items: (key, value) tuples sorted by key
+	@type lo: int
+	@param lo: index of the first item of the subtree
+	@type hi: int
+	@param hi: index of the last item of the subtree
+	@rtype: AVLNode
+	@returns: the root of the subtree, the virtual node if lo > hi
+	"""
+	# time complexity: O(hi - lo)
+
+	def build_subtree(self, items, lo, hi):
+		if lo > hi: return VIRTUAL_NODE
+		mid = (lo + hi) // 2 #middle item is the root, so both sides differ in size by at most 1
+		key, val = items[mid]
+		node = self.new_node(key, val)
+		node.set_left_with_parent(self.build_subtree(items, lo, mid - 1))
+		node.set_right_with_parent(self.build_subtree(items, mid + 1, hi))
+		node.fix_height()
+		return node
+
+	"""searches for a node in the dictionary corresponding to the key (starting at the root)
+        
+	@type key: int
+	@param key: a key to be searched
+	@rtype: (AVLNode,int)
+	@returns: a tuple (x,e) where x is the node corresponding to key (or None if not found),
+	and e is the number of edges on the path between the starting node and ending node+1.
+	"""
+	# time complexity: O(log(n))
+
+	def search(self, key):
+		node, edges = self.find(key)
+		if node is not None: self.finger = node
+		return node, edges
+
+	"""searches for a node like search, without moving the finger - it only reads the tree, so
+	several threads may run it together
+
+	@type key: int
+	@param key: a key to be searched
+	@rtype: (AVLNode,int)
+	@returns: see search
+	"""
+	# time complexity: O(log(n))
+
+	def find(self, key):
+		if self.key_func is not None: key = self.key_func(key)
+		node = self.root
+		edges = 1
+		while (node is not None) and (node.is_real_node()):
+			currKey = node.key
+			if currKey == key:
+				return node, edges
+			if currKey < key:
+				node = node.get_right()
+				edges += 1
+			else: 
+				node = node.get_left()
+				edges += 1
+		if node is not None and not node.is_real_node(): #did not find key, remove 1 edge travelled to virtual node
+			edges = edges - 1
+		return None, edges
+
+	"""searches for a node in the dictionary corresponding to the key, starting at the closest
+	of the max, the min and the last accessed node
+        
+	@type key: int
+	@param key: a key to be searched
+	@rtype: (AVLNode,int)
+	@returns: a tuple (x,e) where x is the node corresponding to key (or None if not found),
+	and e is the number of edges on the path between the starting node and ending node+1.
+	"""
+	# time complexity: O(log(n)), O(log(d)) when key is d keys away from a finger and the path
+	# between them is short
+
+	def finger_search(self, key):
+		if self.max is None: return None, 1 #empty tree
+		if self.key_func is not None: key = self.key_func(key)
+		#going up from the closest finger until we reach the node key could be in the subtree of
+		node, edges = self.climb_from_finger(self.closest_finger(key), key)
+		edges += 1
+
+		#searching the subtree starting from the node we found with regular search
+		while (node is not None) and (node.is_real_node()):
+			currKey = node.key
+			if currKey == key:
+				self.finger = node
+				return node, edges
+			if currKey < key:
+				node = node.get_right()
+				edges += 1
+			else:
+				node = node.get_left()
+				edges += 1
+		if node is not None and not node.is_real_node():  # did not find key, remove 1 edge travelled to virtual node
+			edges = edges - 1
+		return None, edges
+
+	"""searches for many keys at once - the keys are sorted and the tree is walked once, each node
+	splitting the keys that reach it between its left and right subtrees
+
+	@type keys: sequence
+	@param keys: keys to be searched, in any order. any sequence with a tolist() method (such as a
+	NumPy array) is converted with it first
+	@rtype: list
+	@returns: for each key, in the order of keys, the node corresponding to it or None if not found
+	"""
+	# time complexity: O(k log(k) + k log(n/k + 1)) for k keys
+
+	def search_many_nodes(self, keys):
+		if hasattr(keys, "tolist"): keys = keys.tolist()
+		if self.key_func is not None: keys = [self.key_func(key) for key in keys]
+		order = sorted(range(len(keys)), key = keys.__getitem__)
+		sortedKeys = [keys[i] for i in order]
+		found = [None] * len(keys)
+		stack = [(self.root, 0, len(sortedKeys))] #a subtree and the range of keys that reach it
+		while stack:
+			node, lo, hi = stack.pop()
+			if lo >= hi or node is None or not node.is_real_node(): continue
+			key = node.key
+			mid = bisect_left(sortedKeys, key, lo, hi) #sortedKeys[lo:mid] are smaller than key
+			end = mid
+			while end < hi and sortedKeys[end] == key:
+				found[order[end]] = node
+				end += 1
+			stack.append((node.left, lo, mid))
+			stack.append((node.right, end, hi))
+		return found
+
+	"""searches for many keys at once and returns their values
+
+	@type keys: sequence
+	@param keys: keys to be searched, in any order, see search_many_nodes
+	@type default: any
+	@param default: the value returned for keys that are not found
+	@rtype: list
+	@returns: for each key, in the order of keys, its value or default if not found
+	"""
+	# time complexity: O(k log(k) + k log(n/k + 1)) for k keys
+
+	def search_many(self, keys, default = None):
+		return [default if node is None else node.value for node in self.search_many_nodes(keys)]
+
+	"""checks for many keys at once whether they appear in the dictionary
+
+	@type keys: sequence
+	@param keys: keys to be searched, in any order, see search_many_nodes
+	@rtype: list
+	@returns: for each key, in the order of keys, True if it is found and False otherwise
+	"""
+	# time complexity: O(k log(k) + k log(n/k + 1)) for k keys
+
+	def contains_many(self, keys):
+		return [node is not None for node in self.search_many_nodes(keys)]
+
+	"""returns the node of a key, from the cache if it is cached and by search otherwise. found nodes
+	are added to the cache
+
+	@type key: int
+	@param key: a key to be searched
+	@rtype: AVLNode
+	@returns: the node corresponding to key, None if not found
+	"""
+	# time complexity: O(1) for a cached key, O(log(n)) otherwise
+
+	def lookup(self, key):
+		cache = self.cache
+		if cache is None: return self.search(key)[0]
+		sortKey = key if self.key_func is None else self.key_func(key)
+		node = cache.get(sortKey)
+		if node is None:
+			node = self.search(key)[0]
+			if node is not None: cache.put(sortKey, node)
+		else:
+			self.finger = node
+		return node
+
+	"""returns the finger closest to key out of the max, the min and the last accessed node
+
+	@type key: int
+	@param key: a key to be searched, the result of the key function if the tree has one
+	@pre: the dictionary is not empty
+	@rtype: AVLNode
+	@returns: the finger with the key closest to key. for keys without a distance (such as
+	tuples, strings and bytes) the max or the min if key is outside their range, the last
+	accessed node otherwise
+	"""
+	# time complexity: O(1)
+
+	def closest_finger(self, key):
+		best = self.max
+		try:
+			bestDistance = abs(best.key - key)
+		except TypeError: #the keys cannot be subtracted, comparing them instead
+			if not key < best.key: return best
+			if not self.min.key < key: return self.min
+			return self.finger if self.finger is not None else best
+		for node in (self.min, self.finger):
+			if node is not None and abs(node.key - key) < bestDistance:
+				best = node
+				bestDistance = abs(node.key - key)
+		return best
+
+	"""goes up from a finger until reaching a node key is in the subtree of (or should be inserted to)
+
+	@type node: AVLNode
+	@param node: the finger to start from
+	@type key: int
+	@param key: a key to be searched
+	@rtype: (AVLNode,int)
+	@returns: a tuple (x,e) where x is the node to continue the search from,
+	and e is the number of edges travelled up
+	"""
+	# time complexity: O(log(n)), O(log(d)) when key is d keys away from node and the path
+	# between them is short
+
+	def climb_from_finger(self, node, key):
+		edges = 0
+		while node.parent is not None:
+			currKey = node.key
+			if currKey == key: break
+			parent = node.parent
+			if currKey < key: #key is to the right of node, bounded by parent if node is its left child
+				if parent.left is node and key < parent.key: break
+			else: #key is to the left of node, bounded by parent if node is its right child
+				if parent.right is node and parent.key < key: break
+			node = parent
+			edges += 1
+		return node, edges
+
+	"""inserts a new node into the dictionary with the corresponding key and value (starting at the root)
+
+	@type key: int
+	@pre: key currently does not appear in the dictionary
+	@param key: key of item that is to be inserted to self
+	@type val: string
+	@param val: the value of the item
+	@rtype: (AVLNode,int,int)
+	@returns: a 3-tuple (x,e,h) where x is the new node,
+	e is the number of edges on the path between the starting node and new node before rebalancing,
+	and h is the number of PROMOTE cases during the AVL rebalancing
+	"""
+	# time complexity: O(log(n))
+
+	def insert(self, key, val):
+		newNode = self.new_leaf(key, val)
+		key = newNode.key #the key the tree is ordered by, computed once by the key function
+		node = self.root
+		edges = 0
+		cntPromotes = 0
+
+		if node is None or not node.is_real_node(): #empty tree - insert new node as root and done
+			self.root = newNode
+			self.max = self.root
+			self.min = self.root
+			self.finger = self.root
+			self.tree_size = 1  # update tree size
+			return self.root, edges, cntPromotes
+		
+		else: #not an empty tree
+			#look for insertion point in a virtual node through searching the key
+			while node.is_real_node():
+				parent = node
+				if node.key < key:
+					node = node.get_right()
+					edges += 1
+				else: 
+					node = node.get_left()
+					edges += 1
+
+			#now, node is the virtual node we insert in, replacing it with the new leaf:
+			node = newNode
+			if parent.key < key: parent.set_right_with_parent(node)
+			else: parent.set_left_with_parent(node)
+			# rebalance starting from parent of node we found
+			cntPromotes = self.rebalance(parent)
+
+		if key > self.max.key: self.max = node #update max key of tree
+		if key < self.min.key: self.min = node #update min key of tree
+		self.finger = node
+		self.tree_size += 1 #update tree size
+		self.fix_root() # fixing root if needed
+		if self.relaxed is not None: self.check_relaxed()
+
+		return node, edges, cntPromotes 
+
+	"""inserts a new item into the dictionary, or overwrites the value if key already appears in it,
+	in one pass from the root
+
+	@type key: int
+	@param key: key of the item
+	@type val: string
+	@param val: the value of the item
+	@rtype: (AVLNode,bool)
+	@returns: a tuple (x,b) where x is the node of key,
+	and b is True if a new node was inserted, False if the value was overwritten
+	"""
+	# time complexity: O(log(n))
+
+	def upsert(self, key, val):
+		node = self.root
+		if node is None or not node.is_real_node(): #empty tree
+			return self.insert(key, val)[0], True
+		itemKey = key
+		if self.key_func is not None: key = self.key_func(key)
+
+		while node.is_real_node():
+			currKey = node.key
+			if currKey == key: #key exists, overwriting the value in place
+				node.set_value(val)
+				if self.monoid is not None: self.fix_aggregates(node)
+				self.finger = node
+				return node, False
+			parent = node
+			if currKey < key: node = node.get_right()
+			else: node = node.get_left()
+
+		#key does not exist, inserting a new leaf at the virtual node we found, same as in method insert
+		node = self.new_leaf(itemKey, val, key)
+		if parent.key < key: parent.set_right_with_parent(node)
+		else: parent.set_left_with_parent(node)
+		self.rebalance(parent)
+
+		if key > self.max.key: self.max = node #update max key of tree
+		if key < self.min.key: self.min = node #update min key of tree
+		self.finger = node
+		self.tree_size += 1 #update tree size
+		self.fix_root() # fixing root if needed
+		if self.relaxed is not None: self.check_relaxed()
+		return node, True
+
+	"""creates a new node - a KeyedAVLNode caching the result of the key function if the tree has
+	one, and an AugmentedAVLNode if the tree has a monoid
+
+	@type key: int
+	@param key: key of the new node
+	@type val: string
+	@param val: the value of the new node
+	@type sortKey: any
+	@param sortKey: the result of the key function on key if it was already computed, None otherwise
+	@rtype: AVLNode
+	@returns: the new node, not connected yet to any other node
+	"""
+	# time complexity: O(1) and one call of the key function
+
+	def new_node(self, key, val, sortKey = None):
+		if self.key_func is None:
+			if self.monoid is None: return AVLNode(key, val)
+			sortKey = key
+		elif sortKey is None: sortKey = self.key_func(key)
+		if self.monoid is None: return KeyedAVLNode(sortKey, val, key)
+		return AugmentedAVLNode(sortKey, val, key, self.monoid)
+
+	"""creates a new real leaf, its children are the shared virtual node
+
+	@type key: int
+	@param key: key of the new leaf
+	@type val: string
+	@param val: the value of the new leaf
+	@type sortKey: any
+	@param sortKey: see new_node
+	@rtype: AVLNode
+	@returns: the new leaf, not connected yet to any parent
+	"""
+	# time complexity: O(1)
+
+	def new_leaf(self, key, val, sortKey = None):
+		node = self.new_node(key, val, sortKey)
+		node.height = 0
+		node.size = 1
+		node.left = VIRTUAL_NODE
+		node.right = VIRTUAL_NODE
+		return node
+
+	"""rebalances AVL tree after insertion
+
+	@type node: AVLNode
+	@pre: node is the parent of an inserted node
+	@rtype: int
+	@returns: the number of PROMOTE cases during rebalancing
+	"""
+	# time complexity: O(log(n))
+
+	def rebalance (self, node):
+		if self.relaxed is not None: return self.relaxed_rebalance(node)
+		cntPromotes = 0
+		while node is not None: #going up the tree, rebalancing where needed
+				bf = node.get_balance_factor()
+				if -1 <= bf <= 1: #valid balance factor for node
+					if node.get_height() < node.calc_height(): #height needs to be promoted
+						cntPromotes += 1
+					node.fix_height()
+					node = node.get_parent() #moving up
+				else: #invalid balance factor - rotations needed
+					self.rotate(node) #rotating tree around node 
+		return  cntPromotes
+
+	"""rotates tree around node with an invalid balance factor
+
+	@type node: AVLNode
+	@pre: node points to a node in self
+	"""
+	# time complexity: O(1)
+
+	def rotate (self, node):
+		if node.get_balance_factor() == 2: #left subtree is longer
+			if node.get_left().get_balance_factor() >= 0: #bf = 1 (or 0 after deletion), right rotation 
+				self.right_rotate(node)
+			else: #bf = -1, left rotation (on left child) then right rotation (on node) 
+				self.left_rotate(node.get_left())
+				self.right_rotate(node)
+		else: #bf = -2, right subtree is longer	
+			if node.get_right().get_balance_factor() <= 0: #bf = -1 (or 0 after deletion), left rotation 
+				self.left_rotate(node)
+			else: #bf = 1, right rotation (on right child) then left rotation (on node) 
+				self.right_rotate(node.get_right())
+				self.left_rotate(node)
+		
+	"""rotates edge between node and left child to right
+
+	@type node: AVLNode
+	@pre: node points to a node in self
+	"""
+	# time complexity: O(1)
+
+	def right_rotate (self, node):
+		temp = node.get_left() #the new root of the subtree of node 
+		#fixing parent of node to be parent of new root
+		parent = node.get_parent()
+		if parent is None: #node is the root of whole tree
+			self.root = temp
+			temp.set_parent(None)
+		else: #parent exists
+			if parent.right is node: #node is right child of parent
+				parent.set_right_with_parent(temp)
+			else: #node is left child of parent
+				parent.set_left_with_parent(temp)
+		node.set_left_with_parent(temp.get_right()) #moving right child of temp
+		temp.set_right_with_parent(node) #temp is the new root
+		node.fix_height() #node is now the child of temp, fixing it first
+		temp.fix_height()
+
+	"""rotates edge between node and right child to left
+
+	@type node: AVLNode
+	@pre: node points to a node in self
+	"""
+	# time complexity: O(1)
+
+	def left_rotate (self, node):
+		temp = node.get_right() #the new root of the subtree of node 
+		#fixing parent of node to be parent of new root
+		parent = node.get_parent()
+		if parent is None: #node is the root of whole tree
+			self.root = temp
+			temp.set_parent(None)
+		else: #parent exists
+			if parent.right is node: #node is right child of parent
+				parent.set_right_with_parent(temp)
+			else: #node is left child of parent
+				parent.set_left_with_parent(temp)
+		node.set_right_with_parent(temp.get_left()) #moving left child of temp
+		temp.set_left_with_parent(node) #temp is the new root
+		node.fix_height() #node is now the child of temp, fixing it first
+		temp.fix_height()
+
+	"""inserts a new node into the dictionary with corresponding key and value, starting at the closest
+	of the max, the min and the last accessed node
+
+	@type key: int
+	@pre: key currently does not appear in the dictionary
+	@param key: key of item that is to be inserted to self
+	@type val: string
+	@param val: the value of the item
+	@rtype: (AVLNode,int,int)
+	@returns: a 3-tuple (x,e,h) where x is the new node,
+	e is the number of edges on the path between the starting node and new node before rebalancing,
+	and h is the number of PROMOTE cases during the AVL rebalancing
+	"""
+	# time complexity: O(log(n))
+
+	def finger_insert(self, key, val):
+		if self.max is None: return self.insert(key, val) #tree is empty, perform regular insert
+		newNode = self.new_leaf(key, val)
+		key = newNode.key #the key the tree is ordered by, computed once by the key function
+
+		#finger search - going up from the closest finger until we reach the node key should have been in the subtree of
+		node, edges = self.climb_from_finger(self.closest_finger(key), key)
+
+		#look for insertion point in a virtual node through searching the key, starting from node
+		cntPromotes = 0
+		while node.is_real_node():
+			parent = node
+			if node.key < key:
+				node = node.get_right()
+				edges += 1
+			else:
+				node = node.get_left()
+				edges += 1
+
+		# now, node is the virtual node we insert in
+		# #inserting the new leaf at the subtree starting from the node we found, same as in method insert
+		node = newNode
+		if parent.key < key: parent.set_right_with_parent(node)
+		else: parent.set_left_with_parent(node)
+		cntPromotes += self.rebalance(parent)  # rebalance starting from parent of node we found
+
+		if key > self.max.key: self.max = node  # update max key of tree
+		if key < self.min.key: self.min = node  # update min key of tree
+		self.finger = node
+		self.tree_size += 1  # update tree size
+		self.fix_root() # fixing root if needed
+		if self.relaxed is not None: self.check_relaxed()
+
+		return node, edges, cntPromotes
+
+	"""fixes the root of the tree if the root has a new father
+
+	@pre: root is a node in self
+	"""
+	# time complexity: O(1)
+
+	def fix_root(self):
+		while self.root.get_parent() is not None:
+			self.root = self.root.get_parent()
+
+	"""deletes node from the dictionary
+
+	@type node: AVLNode
+	@pre: node is a real pointer to a node in self
+	"""
+	# time complexity: O(log(n))
+
+	def delete(self, node):
+		if not node or not node.is_real_node(): #node is a virtual node
+			return None
+		if self.cache is not None: self.cache.discard(node.key) #the only cached key delete changes
+
+		#the max has no right child, so its predecessor is the max of its left subtree - its left child,
+		#a leaf, unless relaxed balance left the subtree taller - or its parent. the min is symmetric.
+		#finding them before the tree changes, instead of searching from the root
+		if node is self.max:
+			newMax = node.get_parent()
+			if node.get_left().is_real_node():
+				newMax = node.get_left()
+				while newMax.get_right().is_real_node():
+					newMax = newMax.get_right()
+		if node is self.min:
+			newMin = node.get_parent()
+			if node.get_right().is_real_node():
+				newMin = node.get_right()
+				while newMin.get_left().is_real_node():
+					newMin = newMin.get_left()
+
+		#Case 1: node is a leaf (has only virtual children)
+		if not node.get_left().is_real_node() and not node.get_right().is_real_node():
+			parent = node.get_parent()
+			if parent is None: #node is the root
+				self.root =  None
+			elif parent.get_left() is node: #replace with virtual node
+				parent.set_left(VIRTUAL_NODE) #node is left child
+			else:
+				parent.set_right(VIRTUAL_NODE) #node is right child
+			self.rebalance_delete(parent) #rebalancing
+			self.finger = parent #the finger stays where node was
+
+		#Case 2: node has one real child, one virtual child
+		elif not node.get_left().is_real_node(): #the virtual child is the left child
+			self.replace_node_delete(node, node.get_right())
+			self.rebalance_delete(node.get_right()) #rebalancing after delete
+			self.finger = node.get_right()
+		elif not node.get_right().is_real_node(): #the virtual child is the right child
+			self.replace_node_delete(node, node.get_left())
+			self.rebalance_delete(node.get_left()) #rebalancing after delete
+			self.finger = node.get_left()
+
+		#Case 3: node has 2 real children
+		else:
+			successor = self.successor(node)  # finding the successor of node
+			successor_parent = successor.get_parent()
+
+			if successor_parent is not node: #successor's is not the direct right child of node
+				self.replace_node_delete(successor, successor.get_right())
+				successor.set_right_with_parent(node.get_right())
+
+			self.replace_node_delete(node, successor)
+			successor.set_left_with_parent(node.get_left())
+			successor.height = node.height #the height of the place it took, before rebalancing
+
+			#rebalance after all the changes
+			if successor_parent is not node:
+				self.rebalance_delete(successor_parent)
+			else:
+				self.rebalance_delete(successor)
+			if self.relaxed is not None: #successor took the place of node, and the walk up may stop below it
+				imbalanced = self.relaxed["imbalanced"]
+				imbalanced.pop(node, None)
+				bf = successor.get_balance_factor()
+				if (bf > 1 or bf < -1) and successor not in imbalanced:
+					imbalanced[successor] = None
+					self.relaxed["counters"]["rotations_deferred"] += 1
+			self.finger = successor
+
+		#update the max and min pointers and the tree size 
+		self.tree_size -= 1
+		if self.tree_size == 0: ##if the tree is empty after deletion
+			self.max = None
+			self.min = None
+		else: #tree is not empty
+			if node is self.max: self.max = newMax
+			if node is self.min: self.min = newMin
+		if self.relaxed is not None: self.check_relaxed()
+
+	"""deletes the item with the given key from the dictionary, if it appears in it
+
+	@type key: int
+	@param key: the key to be deleted
+	@rtype: AVLNode
+	@returns: the deleted node, None if key does not appear in the dictionary
+	"""
+	# time complexity: O(log(n))
+
+	def delete_key(self, key):
+		node = self.search(key)[0]
+		if node is not None: self.delete(node)
+		return node
+
+	"""deletes the item with the maximal key from the dictionary
+
+	@rtype: (int, any)
+	@returns: a tuple (key, value) of the deleted item, None if the dictionary is empty
+	"""
+	# time complexity: O(log(n))
+
+	def pop_max(self):
+		node = self.max
+		if node is None: return None
+		self.delete(node)
+		return node.get_key(), node.get_value()
+
+	"""deletes the item with the minimal key from the dictionary
+
+	@rtype: (int, any)
+	@returns: a tuple (key, value) of the deleted item, None if the dictionary is empty
+	"""
+	# time complexity: O(log(n))
+
+	def pop_min(self):
+		node = self.min
+		if node is None: return None
+		self.delete(node)
+		return node.get_key(), node.get_value()
+
+	"""rebalances the tree after deleting a node
+	
+	@type node: AVLNode
+	@pre: node is a parent of a deleted node
+	"""
+	#time complexity: O(log(n))
+	
+	def rebalance_delete(self,node): 
+		if self.relaxed is not None: return self.relaxed_rebalance(node)
+		while node is not None:
+			node.fix_height()
+			bf = node.get_balance_factor()
+			if abs(bf) > 1:
+				self.rotate(node)
+			node = node.get_parent()
+
+	"""rebalances the tree after an insertion or a deletion in relaxed balance. Going up, a node whose
+	balance factor is beyond +-1 is marked for fix_balance instead of being rotated. Once a height stops
+	changing, the heights above it do not change either, so the ancestors above only get their sizes
+	and aggregates fixed
+
+	@type node: AVLNode
+	@pre: node is the lowest node whose subtree changed, or the node moved up in its place
+	@rtype: int
+	@returns: the number of heights promoted
+	"""
+	# time complexity: O(log(n))
+
+	def relaxed_rebalance(self, node):
+		relaxed = self.relaxed
+		counters = relaxed["counters"]
+		imbalanced = relaxed["imbalanced"]
+		bound = relaxed["slack"] + 1
+		counters["updates"] += 1
+		cntPromotes = 0
+		first = True #the first node may be a child moved up by delete, with a height that did not change
+		while node is not None:
+			oldHeight = node.height
+			node.fix_height()
+			counters["ancestor_visits"] += 1
+			bf = node.left.height - node.right.height
+			if bf > 1 or bf < -1: #marked, the rotation is left to fix_balance
+				if node not in imbalanced: #each node is marked and counted once
+					imbalanced[node] = None
+					counters["rotations_deferred"] += 1
+				if bf > bound or bf < -bound: relaxed["overflow"] = True #fixed at the end of the update
+			if node.height > oldHeight: cntPromotes += 1
+			elif node.height == oldHeight and not first: break
+			first = False
+			node = node.parent
+		if node is not None: node = node.parent
+		augmented = self.monoid is not None
+		while node is not None: #the heights did not change, fixing the sizes and aggregates only
+			if augmented: node.fix_height()
+			else: node.size = node.left.size + node.right.size + 1
+			counters["ancestors_skipped"] += 1
+			node = node.parent
+		return cntPromotes
+
+	"""returns the depth of a node in self, checking each link on the way up to the root
+
+	@type node: AVLNode
+	@rtype: int
+	@returns: the number of edges from the root to node, None if node is not in self
+	"""
+	# time complexity: O(log(n))
+
+	def depth_in_tree(self, node):
+		depth = 0
+		while node.parent is not None:
+			parent = node.parent
+			if parent.left is not node and parent.right is not node: return None #node was removed
+			node = parent
+			depth += 1
+		return depth if node is self.root else None
+
+	"""restores the AVL balance of a node whose subtrees are AVL trees, joining them through the node
+	in O(|h1 - h2|)
+
+	@type node: AVLNode
+	@pre: node is in self, and the tree is in strict balance while restoring
+	@rtype: AVLNode
+	@returns: the new root of the subtree of node, in its place
+	"""
+	# time complexity: O(|h1 - h2|) for the heights of the subtrees
+
+	def restore_balance(self, node):
+		parent = node.parent
+		isRight = parent is not None and parent.right is node
+		root = self.root
+		node = self.join_subtrees(node.left, node, node.right) #rotates on the way up like delete
+		self.root = root #a rotation at the top of the detached subtree moved the root pointer
+		if parent is None: self.root = node
+		elif isRight: parent.set_right_with_parent(node)
+		else: parent.set_left_with_parent(node)
+		return node
+
+	"""restores the AVL balance of the whole tree, fixing the marked nodes from the deepest up. The
+	heights above a restored node are fixed, and the ancestors it leaves out of balance are fixed in
+	turn, so the subtrees of a node are always restored before it
+
+	@post: the tree is an AVL tree, and no node is marked
+	"""
+	# time complexity: O(k log(n)) for k marked nodes
+
+	def fix_balance(self):
+		relaxed = self.relaxed
+		if relaxed is None: return None
+		heap = [] #(-depth, order, node), the deepest node first
+		for node in relaxed["imbalanced"]:
+			depth = self.depth_in_tree(node)
+			if depth is not None: heap.append((-depth, len(heap), node)) #deleted nodes and nodes of other trees are dropped
+		heapq.heapify(heap)
+		order = len(heap)
+		self.relaxed = None #join_subtrees rebalances strictly while restoring
+		try:
+			while heap:
+				negDepth, i, node = heapq.heappop(heap)
+				bf = node.get_balance_factor()
+				if -1 <= bf <= 1: continue #restored already, or never restored since it was marked
+				node = self.restore_balance(node) #the subtree keeps its depth, the nodes above keep theirs
+				relaxed["counters"]["fixer_joins"] += 1
+				depth = -negDepth
+				node = node.parent
+				while node is not None: #fixing the heights above, queueing the ancestors left out of balance
+					oldHeight = node.height
+					node.fix_height()
+					depth -= 1
+					bf = node.left.height - node.right.height
+					if bf > 1 or bf < -1:
+						heapq.heappush(heap, (-depth, order, node))
+						order += 1
+					if node.height == oldHeight: break
+					node = node.parent
+		finally:
+			self.relaxed = relaxed
+		relaxed["imbalanced"] = {}
+		relaxed["overflow"] = False
+		relaxed["counters"]["fixes"] += 1
+
+	"""runs fix_balance if a balance factor went beyond +-(slack + 1), if budget nodes are marked, or if
+	the height drifted more than slack levels above the AVL bound for the size - called at the end of
+	each update in relaxed balance
+	"""
+	# time complexity: O(1), amortized O(log(n)) for the fix_balance calls
+
+	def check_relaxed(self):
+		relaxed = self.relaxed
+		if relaxed["overflow"] or len(relaxed["imbalanced"]) >= relaxed["budget"] or (self.root is not None
+				and self.root.height > 1.4405 * math.log2(self.tree_size + 2) + relaxed["slack"]):
+			self.fix_balance()
+
+	"""replaces a node with his one son
+	
+	@type old_node: AVLNode
+	@type new_node: AVLNode
+	"""
+	#time complexity: O(1)
+
+	def replace_node_delete(self, old_node, new_node):
+		parent = old_node.get_parent()
+		if parent is None: #old node is the root
+			self.root = new_node
+			if new_node.is_real_node():
+				new_node.set_parent(None)
+		else: #old node is not the root
+			if parent.get_left() is old_node:
+				parent.set_left_with_parent(new_node)
+			else:
+				parent.set_right_with_parent(new_node)
+
+	"""updates the max pointer by searching the tree
+	
+	@post: the max pointer points to the node with the highest key in the tree, or None if the tree is empty
+	"""
+	# time complexity: O(log(n))
+
+	def update_max(self): 
+		if self.root is None or not self.root.is_real_node(): #the tree is empty, has no max
+			self.max = None
+			return None
+		currentNode = self.root #tree is not empty, going the last right child
+		while currentNode.get_right().is_real_node():
+			currentNode = currentNode.get_right()
+		self.max = currentNode
+
+	"""updates the min pointer by searching the tree
+	
+	@post: the min pointer points to the node with the lowest key in the tree, or None if the tree is empty
+	"""
+	# time complexity: O(log(n))
+
+	def update_min(self): 
+		if self.root is None or not self.root.is_real_node(): #the tree is empty, has no min
+			self.min = None
+			return None
+		currentNode = self.root #tree is not empty, going the last left child
+		while currentNode.get_left().is_real_node():
+			currentNode = currentNode.get_left()
+		self.min = currentNode
+
+	"""returns the successor of node, going down its right subtree if it has one, and up the parent
+	pointers otherwise. walking the whole tree with successor costs O(1) amortized per node
+
+	@type node: AVLNode
+	@pre: node is a real pointer to a node in self
+	@rtype: AVLNode
+	@returns: the successor of node, None if node has the max key
+	"""
+	# time complexity O(log(n)), O(1) amortized over an in-order walk
+
+	def successor(self, node):
+		temp = node.right
+		if temp.is_real_node(): #the successor is the smallest node of the right subtree
+			while temp.left.is_real_node():
+				temp = temp.left
+			return temp
+		parent = node.parent #the successor is the first ancestor node is in the left subtree of
+		while parent is not None and parent.right is node:
+			node = parent
+			parent = node.parent
+		return parent
+
+	"""returns the predecessor of node, going down its left subtree if it has one, and up the parent
+	pointers otherwise
+
+	@type node: AVLNode
+	@pre: node is a real pointer to a node in self
+	@rtype: AVLNode
+	@returns: the predecessor of node, None if node has the min key
+	"""
+	# time complexity O(log(n)), O(1) amortized over an in-order walk
+
+	def predecessor(self, node):
+		temp = node.left
+		if temp.is_real_node(): #the predecessor is the largest node of the left subtree
+			while temp.right.is_real_node():
+				temp = temp.right
+			return temp
+		parent = node.parent #the predecessor is the first ancestor node is in the right subtree of
+		while parent is not None and parent.left is node:
+			node = parent
+			parent = node.parent
+		return parent
+
+	"""returns the node with the largest key at most key
+
+	@type key: int
+	@param key: a key, does not have to be in the dictionary
+	@rtype: AVLNode
+	@returns: the node, None if all the keys are larger than key
+	"""
+	# time complexity: O(log(n)), O(1) when key is at least the max key
+
+	def floor(self, key):
+		if self.max is None: return None #empty tree
+		if self.key_func is not None: key = self.key_func(key)
+		if not key < self.max.key: return self.max #starting from the max finger, as in finger_search
+		if key < self.min.key: return None
+		return self.nearest(key, True, True)
+
+	"""returns the node with the smallest key at least key
+
+	@type key: int
+	@param key: a key, does not have to be in the dictionary
+	@rtype: AVLNode
+	@returns: the node, None if all the keys are smaller than key
+	"""
+	# time complexity: O(log(n)), O(1) when key is at most the min key
+
+	def ceiling(self, key):
+		if self.max is None: return None #empty tree
+		if self.key_func is not None: key = self.key_func(key)
+		if not self.min.key < key: return self.min
+		if self.max.key < key: return None
+		return self.nearest(key, False, True)
+
+	"""returns the first node with a key at least key, the same as ceiling
+
+	@type key: int
+	@param key: a key, does not have to be in the dictionary
+	@rtype: AVLNode
+	@returns: the node, None if all the keys are smaller than key
+	"""
+	# time complexity: O(log(n))
+
+	def lower_bound(self, key):
+		return self.ceiling(key)
+
+	"""returns the first node with a key larger than key
+
+	@type key: int
+	@param key: a key, does not have to be in the dictionary
+	@rtype: AVLNode
+	@returns: the node, None if no key is larger than key
+	"""
+	# time complexity: O(log(n)), O(1) when key is smaller than the min key
+
+	def upper_bound(self, key):
+		if self.max is None: return None #empty tree
+		if self.key_func is not None: key = self.key_func(key)
+		if key < self.min.key: return self.min
+		if not key < self.max.key: return None
+		return self.nearest(key, False, False)
+
+	"""searches for the nearest node to key on one side of it, with the same descent as search
+
+	@type key: int
+	@param key: a key, the result of the key function if the tree has one
+	@type below: bool
+	@param below: True for the largest key below key, False for the smallest key above key
+	@type inclusive: bool
+	@param inclusive: whether key itself counts as below or above key
+	@rtype: AVLNode
+	@returns: the nearest node, None if there is none
+	"""
+	# time complexity: O(log(n))
+
+	def nearest(self, key, below, inclusive):
+		node = self.root
+		best = None
+		while (node is not None) and (node.is_real_node()):
+			currKey = node.key
+			if currKey == key and inclusive: return node
+			if below:
+				if currKey < key: #node is a candidate, a nearer one can only be on its right
+					best = node
+					node = node.right
+				else:
+					node = node.left
+			else:
+				if key < currKey: #node is a candidate, a nearer one can only be on its left
+					best = node
+					node = node.left
+				else:
+					node = node.right
+		return best
+
+	"""inserts a batch of new items into the dictionary - small batches are inserted one by one in
+	sorted order with finger_insert, large batches are merged with the dictionary and the tree is rebuilt
+
+	@type items: iterable
+	@param items: (key, value) tuples
+	@pre: the keys are distinct and currently do not appear in the dictionary
+	@rtype: int
+	@returns: the number of inserted items
+	"""
+	# time complexity: O(k log(k) + min(k log(n), n + k)) for k items
+
+	def insert_many(self, items):
+		keyFunc = self.key_func
+		if keyFunc is None: batch = sorted(items, key = lambda item: item[0])
+		else: batch = sorted(items, key = lambda item: keyFunc(item[0]))
+		if self.is_large_batch(len(batch)):
+			newNodes = [self.new_node(key, val) for key, val in batch]
+			self.relink(self.merge_nodes(list(self.nodes()), newNodes))
+		else: #each key is close to the previous one, finger_insert starts from it
+			for key, val in batch:
+				self.finger_insert(key, val)
+		return len(batch)
+
+	"""deletes a batch of keys from the dictionary - small batches are deleted one by one in
+	sorted order with finger_search, for large batches the tree is rebuilt without them
+
+	@type keys: iterable
+	@param keys: keys to be deleted, keys that do not appear in the dictionary are ignored
+	@rtype: int
+	@returns: the number of deleted items
+	"""
+	# time complexity: O(k log(k) + min(k log(n), n + k)) for k keys
+
+	def delete_many(self, keys):
+		keyFunc = self.key_func
+		batch = sorted(set(keys), key = keyFunc)
+		if self.is_large_batch(len(batch)):
+			batchSet = set(batch) if keyFunc is None else set(map(keyFunc, batch))
+			if self.cache is not None:
+				for key in batchSet: self.cache.discard(key)
+			kept = [node for node in self.nodes() if node.key not in batchSet]
+			deleted = self.tree_size - len(kept)
+			self.relink(kept)
+			return deleted
+		deleted = 0
+		for key in batch:
+			node = self.finger_search(key)[0]
+			if node is not None:
+				self.delete(node)
+				deleted += 1
+		return deleted
+
+	"""decides whether rebuilding the tree is cheaper than updating it once per key
+
+	@type k: int
+	@param k: the size of the batch
+	@rtype: bool
+	@returns: True if k updates of O(log(n)) cost more than an O(n + k) rebuild
+	"""
+	# time complexity: O(1)
+
+	def is_large_batch(self, k):
+		#a rebuild touches every node, measured to be about twice as slow per node as one update step
+		return k * max(self.tree_size, 1).bit_length() > 2 * self.tree_size
+
+	"""merges two lists of nodes sorted by key into one sorted list
+
+	@type nodes1: list
+	@param nodes1: AVLNodes sorted by key
+	@type nodes2: list
+	@param nodes2: AVLNodes sorted by key
+	@rtype: list
+	@returns: all the nodes, sorted by key
+	"""
+	# time complexity: O(n1 + n2)
+
+	def merge_nodes(self, nodes1, nodes2):
+		merged = []
+		i = j = 0
+		while i < len(nodes1) and j < len(nodes2):
+			if nodes1[i].key < nodes2[j].key:
+				merged.append(nodes1[i])
+				i += 1
+			else:
+				merged.append(nodes2[j])
+				j += 1
+		merged.extend(nodes1[i:])
+		merged.extend(nodes2[j:])
+		return merged
+
+	"""rebuilds self as a perfectly balanced tree over the given nodes, reusing the node objects
+
+	@type nodes: list
+	@param nodes: AVLNodes sorted by key, their links are overridden
+	@post: self holds exactly the given nodes, the finger points to the root
+	"""
+	# time complexity: O(n)
+
+	def relink(self, nodes):
+		if len(nodes) == 0: #empty tree
+			self.root = self.max = self.min = self.finger = None
+			self.tree_size = 0
+			return None
+		self.root = self.link_subtree(nodes, 0, len(nodes) - 1)
+		self.root.set_parent(None)
+		self.max = nodes[-1]
+		self.min = nodes[0]
+		self.finger = self.root
+		self.tree_size = len(nodes)
+
+	"""links nodes[lo..hi] into a balanced subtree - recursive function
+
+	@type nodes: list
+	@param nodes: AVLNodes sorted by key
+	@type lo: int
+	@param lo: index of the first node of the subtree
+	@type hi: int
+	@param hi: index of the last node of the subtree
+	@rtype: AVLNode
+	@returns: the root of the subtree, the virtual node if lo > hi
+	"""
+	# time complexity: O(hi - lo)
+
+	def link_subtree(self, nodes, lo, hi):
+		if lo > hi: return VIRTUAL_NODE
+		mid = (lo + hi) // 2
+		node = nodes[mid]
+		node.set_left_with_parent(self.link_subtree(nodes, lo, mid - 1))
+		node.set_right_with_parent(self.link_subtree(nodes, mid + 1, hi))
+		node.fix_height()
+		return node
+
+	"""joins self with item and another AVLTree
+
+	@type tree2: AVLTree 
+	@param tree2: a dictionary to be joined with self
+	@type key: int 
+	@param key: the key separting self and tree2
+	@type val: string
+	@param val: the value corresponding to key
+	@pre: all keys in self are smaller than key and all keys in tree2 are larger than key,
+	or the opposite way
+	"""
+	# time complexity: O(|h1-h2|)
+
+	def join(self, tree2, key, val):
+		self.take_relaxed(tree2)
+		root1 = self.root if self.root is not None else VIRTUAL_NODE
+		root2 = tree2.get_root() if tree2.get_root() is not None else VIRTUAL_NODE
+		size1 = self.tree_size
+		size2 = tree2.size()  # tree sizes before mutating trees
+		x = self.new_node(key, val)  # node "separating" trees
+		key = x.key
+
+		#finding which tree has the smaller keys, an empty tree is on the side key is not on
+		if root1.is_real_node(): selfSmaller = root1.key < key
+		else: selfSmaller = not root2.is_real_node() or key < root2.key
+
+		if selfSmaller: #all the keys in self are smaller than in tree2
+			self.root = self.join_subtrees(root1, x, root2)
+			self.max = tree2.max_node() if root2.is_real_node() else x
+			if not root1.is_real_node(): self.min = x
+		else: #all the keys in self are larger than in tree2
+			self.root = self.join_subtrees(root2, x, root1)
+			self.min = tree2.min_node() if root2.is_real_node() else x
+			if not root1.is_real_node(): self.max = x
+		self.tree_size = size1 + size2 + 1
+		self.finger = x
+		if self.relaxed is not None: self.check_relaxed()
+		if tree2.cache is not None: #the nodes of tree2 are now in self, so are its cached keys
+			if self.cache is not None: self.cache.merge(tree2.cache)
+			else: tree2.cache.clear()
+
+	"""joins two subtrees with a node between them, the subtrees are not wrapped by AVLTree objects
+
+	@type left: AVLNode
+	@param left: root of the subtree with the smaller keys, may be virtual
+	@type x: AVLNode
+	@param x: the node separating the subtrees, its old children and parent are overridden
+	@type right: AVLNode
+	@param right: root of the subtree with the larger keys, may be virtual
+	@pre: all keys in left are smaller than x.key and all keys in right are larger than x.key
+	@rtype: AVLNode
+	@returns: the root of the joined subtree
+	"""
+	# time complexity: O(|h1-h2|)
+
+	def join_subtrees(self, left, x, right):
+		#the subtrees may be cut from another tree, detaching them from their old parents
+		left.set_parent(None)
+		right.set_parent(None)
+		h1 = left.get_height()
+		h2 = right.get_height()
+
+		if h1 <= h2: #right is taller or the same height as left
+			#travel down left of right to find connection point
+			b = right
+			c = None #parent of b, kept while travelling since b may be the shared virtual node
+			while b.get_height() > h1: 
+				c = b
+				b = b.get_left()
+			#now, b is of height h1 or h1 - 1, c is of height h1 + 1 or h1 + 2
+			#join trees through x
+			x.set_left_with_parent(left)
+			x.set_right_with_parent(b)
+			x.fix_height()
+			if c is None: #b is the root of right, x is the new root and is balanced
+				x.set_parent(None)
+				return x
+			c.set_left_with_parent(x)
+
+		else: #left is taller than right
+			#travel down right of left to find connection point
+			b = left
+			c = None
+			while b.get_height() > h2: 
+				c = b
+				b = b.get_right()
+			#join trees through x
+			x.set_right_with_parent(right)
+			x.set_left_with_parent(b)
+			x.fix_height()
+			#b cannot be the root of left, it's height is lower
+			c.set_right_with_parent(x)
+
+		self.rebalance_delete(x) #rebalancing upwards of connecting node in the same way as in delete
+		root = x #going up to the new root
+		while root.get_parent() is not None:
+			root = root.get_parent()
+		return root
+
+	"""splits the dictionary at a given node, going up from node and joining the subtrees
+	on each side of the path
+
+	@type node: AVLNode
+	@pre: node is in self
+	@param node: the node in the dictionary to be used for the split
+	@rtype: (AVLTree, AVLTree)
+	@returns: a tuple (left, right), where left is an AVLTree representing the keys in the 
+	dictionary smaller than node.key, and right is an AVLTree representing the keys in the 
+	dictionary larger than node.key.
+	@post: self is no longer a valid tree, its nodes are used by left and right
+	"""
+	# time complexity O(log(n))
+
+	def split(self, node):
+		left = node.get_left()
+		right = node.get_right()
+		child = node
+		parent = node.get_parent()
+		while parent is not None:
+			grandparent = parent.get_parent() #parent is moved by the join, keeping the path up
+			if parent.get_right() is child: #parent and its left subtree are smaller than node
+				left = self.join_subtrees(parent.get_left(), parent, left)
+			else: #parent and its right subtree are larger than node
+				right = self.join_subtrees(right, parent, parent.get_right())
+			child = parent
+			parent = grandparent
+		left.set_parent(None)
+		right.set_parent(None)
+
+		t1 = AVLTree(left if left.is_real_node() else None, None, left.get_size(), keyFunc = self.key_func, monoid = self.monoid)
+		t2 = AVLTree(right if right.is_real_node() else None, None, right.get_size(), keyFunc = self.key_func, monoid = self.monoid)
+		t1.update_max()
+		if self.max is not node: t2.max = self.max #all the keys larger than node are in t2
+		else: t2.update_max()
+		t2.update_min()
+		if self.min is not node: t1.min = self.min #all the keys smaller than node are in t1
+		else: t1.update_min()
+		if self.cache is not None: t1.cache, t2.cache = self.cache.partition(node.key)
+		if self.relaxed is not None: #each part keeps the marked nodes, fix_balance drops those of the other part
+			for tree in (t1, t2):
+				tree.enable_relaxed(self.relaxed["slack"], self.relaxed["budget"])
+				tree.relaxed["imbalanced"] = dict(self.relaxed["imbalanced"])
+				tree.relaxed["overflow"] = True #the joins of split may go beyond the slack
+				tree.check_relaxed()
+		return t1, t2
+
+	"""splits a subtree by a key, going down to key and joining the subtrees on each side of the path
+	on the way back up, the subtree is not wrapped by an AVLTree object
+
+	@type root: AVLNode
+	@param root: the root of the subtree, may be virtual
+	@type key: any
+	@param key: a sort key, does not have to be in the subtree
+	@rtype: (AVLNode, AVLNode, AVLNode)
+	@returns: a tuple (left, node, right), where left and right are the roots of the subtrees of the
+	keys smaller and larger than key, and node is the detached node of key, None if key is not in the
+	subtree
+	"""
+	# time complexity: O(log(n))
+
+	def split_subtree(self, root, key):
+		path = [] #the nodes going down to key
+		node = root
+		while node.is_real_node() and node.key != key:
+			path.append(node)
+			node = node.left if key < node.key else node.right
+		if node.is_real_node(): #key is in the subtree
+			left = node.left
+			right = node.right
+			node.set_parent(None)
+		else:
+			left = right = VIRTUAL_NODE
+			node = None
+		for parent in reversed(path):
+			if parent.key < key: #parent and its left subtree are smaller than key
+				left = self.join_subtrees(parent.left, parent, left)
+			else: #parent and its right subtree are larger than key
+				right = self.join_subtrees(right, parent, parent.right)
+		left.set_parent(None)
+		right.set_parent(None)
+		return left, node, right
+
+	"""joins two subtrees without a node between them, using the largest node of left to join them
+
+	@type left: AVLNode
+	@param left: root of the subtree with the smaller keys, may be virtual
+	@type right: AVLNode
+	@param right: root of the subtree with the larger keys, may be virtual
+	@rtype: AVLNode
+	@returns: the root of the joined subtree
+	"""
+	# time complexity: O(log(n))
+
+	def join_subtrees_without_node(self, left, right):
+		if not left.is_real_node(): return right
+		if not right.is_real_node(): return left
+		last = left
+		while last.right.is_real_node():
+			last = last.right
+		left, last, rest = self.split_subtree(left, last.key) #rest is virtual, last was the largest
+		return self.join_subtrees(left, last, right)
+
+	"""returns the union of two subtrees, the nodes of b are kept for the keys in both - recursive function
+
+	@type a: AVLNode
+	@param a: root of a subtree, may be virtual
+	@type b: AVLNode
+	@param b: root of a subtree, may be virtual
+	@rtype: AVLNode
+	@returns: the root of the union, made of the nodes of a and b
+	"""
+	# time complexity: O(m log(n/m + 1)) for m <= n the sizes of the subtrees
+
+	def union_subtrees(self, a, b):
+		if not b.is_real_node(): return a
+		if not a.is_real_node(): return b
+		bLeft = b.left #the children of b are overridden by the join
+		bRight = b.right
+		left, node, right = self.split_subtree(a, b.key) #node of a with the key of b is dropped
+		return self.join_subtrees(self.union_subtrees(left, bLeft), b, self.union_subtrees(right, bRight))
+
+	"""returns the intersection of two subtrees, made of the nodes of a - recursive function
+
+	@type a: AVLNode
+	@param a: root of a subtree, may be virtual
+	@type b: AVLNode
+	@param b: root of a subtree, may be virtual
+	@rtype: AVLNode
+	@returns: the root of the intersection, the nodes of a with keys in b
+	"""
+	# time complexity: O(m log(n/m + 1)) for m <= n the sizes of the subtrees
+
+	def intersection_subtrees(self, a, b):
+		if not a.is_real_node() or not b.is_real_node(): return VIRTUAL_NODE
+		left, node, right = self.split_subtree(a, b.key)
+		left = self.intersection_subtrees(left, b.left)
+		right = self.intersection_subtrees(right, b.right)
+		if node is not None: return self.join_subtrees(left, node, right)
+		return self.join_subtrees_without_node(left, right)
+
+	"""returns the difference of two subtrees - recursive function
+
+	@type a: AVLNode
+	@param a: root of a subtree, may be virtual
+	@type b: AVLNode
+	@param b: root of a subtree, may be virtual
+	@rtype: AVLNode
+	@returns: the root of the difference, the nodes of a with keys not in b
+	"""
+	# time complexity: O(m log(n/m + 1)) for m <= n the sizes of the subtrees
+
+	def difference_subtrees(self, a, b):
+		if not a.is_real_node() or not b.is_real_node(): return a
+		left, node, right = self.split_subtree(a, b.key) #node of a with the key of b is dropped
+		left = self.difference_subtrees(left, b.left)
+		right = self.difference_subtrees(right, b.right)
+		return self.join_subtrees_without_node(left, right)
+
+	"""makes self the union of self and another AVLTree, splitting self by the root of the other tree
+	and joining the unions of the halves
+
+	@type other: AVLTree
+	@param other: a dictionary with the same key function and monoid as self
+	@post: self holds the keys of both dictionaries, with the values of other for the keys in both,
+	like dict.update. other is consumed: it is empty, its nodes are used by self
+	"""
+	# time complexity: O(m log(n/m + 1)) for m <= n the sizes of the dictionaries
+
+	def union(self, other):
+		self.take_relaxed(other)
+		root = self.union_subtrees(self.subtree_root(), other.subtree_root())
+		self.set_operation_result(root, other)
+
+	"""makes self the intersection of self and another AVLTree
+
+	@type other: AVLTree
+	@param other: a dictionary with the same key function as self
+	@post: self holds the keys in both dictionaries, with the values of self. other is not changed,
+	the result is made of the nodes of self only
+	"""
+	# time complexity: O(m log(n/m + 1)) for m <= n the sizes of the dictionaries
+
+	def intersection(self, other):
+		root = self.intersection_subtrees(self.subtree_root(), other.subtree_root())
+		self.set_operation_result(root)
+
+	"""makes self the difference of self and another AVLTree
+
+	@type other: AVLTree
+	@param other: a dictionary with the same key function as self
+	@post: self holds the keys of self not in other. other is not changed, the result is made of the
+	nodes of self only
+	"""
+	# time complexity: O(m log(n/m + 1)) for m <= n the sizes of the dictionaries
+
+	def difference(self, other):
+		root = self.difference_subtrees(self.subtree_root(), other.subtree_root())
+		self.set_operation_result(root)
+
+	"""returns the root of the tree for the subtree functions
+
+	@rtype: AVLNode
+	@returns: the root, the virtual node if the tree is empty
+	"""
+	# time complexity: O(1)
+
+	def subtree_root(self):
+		return self.root if self.root is not None else VIRTUAL_NODE
+
+	"""sets the result of a set operation as the tree of self, and empties the other tree if the
+	result took its nodes
+
+	@type root: AVLNode
+	@param root: the root of the result, may be virtual
+	@type other: AVLTree
+	@param other: the other operand if its nodes are used by root or dropped, None if it is unchanged
+	@post: the cache of self keeps only the keys whose nodes are in root
+	"""
+	# time complexity: O(log(n) + c log(n)) for c cached keys
+
+	def set_operation_result(self, root, other = None):
+		root.set_parent(None)
+		self.root = root if root.is_real_node() else None
+		self.tree_size = root.size
+		self.finger = self.root
+		self.update_max()
+		self.update_min()
+		if other is not None:
+			other.root = other.max = other.min = other.finger = None
+			other.tree_size = 0
+			if other.cache is not None: other.cache.clear()
+		if self.cache is not None: #a dropped node has no path up to the new root
+			for key, node in list(self.cache.entries.items()):
+				while node.parent is not None:
+					node = node.parent
+				if node is not self.root: self.cache.discard(key)
+		if self.relaxed is not None: self.check_relaxed()
+
+	"""returns the number of keys in the dictionary smaller than key, using the subtree sizes
+
+	@type key: int
+	@param key: a key, does not have to be in the dictionary
+	@type inclusive: bool
+	@param inclusive: if True, key itself is counted as well when it is in the dictionary
+	@rtype: int
+	@returns: the number of keys smaller than key (or equal to key, if inclusive)
+	"""
+	# time complexity: O(log(n))
+
+	def rank(self, key, inclusive = False):
+		if self.key_func is not None: key = self.key_func(key)
+		node = self.root
+		count = 0
+		while (node is not None) and (node.is_real_node()):
+			currKey = node.key
+			if currKey < key or (inclusive and currKey == key): #node and its left subtree are counted
+				count += node.left.size + 1
+				node = node.right
+			else:
+				node = node.left
+		return count
+
+	"""returns the node with the k-th smallest key, counting from 0, using the subtree sizes
+
+	@type k: int
+	@param k: the position of the node in the sorted order of the keys
+	@rtype: AVLNode
+	@returns: the node with the k-th smallest key, None if k is out of range
+	"""
+	# time complexity: O(log(n))
+
+	def select(self, k):
+		node = self.root
+		if (node is None) or not (0 <= k < node.size): return None
+		while True:
+			leftSize = node.left.size
+			if k < leftSize: #the node is in the left subtree
+				node = node.left
+			elif k == leftSize:
+				return node
+			else: #the node is in the right subtree, skipping the left subtree and node
+				k -= leftSize + 1
+				node = node.right
+
+	"""returns the number of keys in the dictionary between lo and hi
+
+	@type lo: int
+	@param lo: the lower bound, inclusive
+	@type hi: int
+	@param hi: the upper bound, inclusive
+	@rtype: int
+	@returns: the number of keys k in the dictionary such that lo <= k <= hi
+	"""
+	# time complexity: O(log(n))
+
+	def count_range(self, lo, hi):
+		return max(self.rank(hi, True) - self.rank(lo), 0) #negative when hi < lo
+
+	"""combines the items of the dictionary between lo and hi under the monoid of the tree, using
+	the aggregates of the subtrees on the paths to lo and hi
+
+	@type lo: int
+	@param lo: the lower bound, inclusive, None for no lower bound
+	@type hi: int
+	@param hi: the upper bound, inclusive, None for no upper bound
+	@pre: the tree has a monoid
+	@rtype: any
+	@returns: the combination of the elements of the items with lo <= key <= hi in order of keys,
+	the identity of the monoid if there are none
+	"""
+	# time complexity: O(log(n)) calls of the monoid
+
+	def aggregate(self, lo = None, hi = None):
+		monoid = self.monoid
+		if monoid is None: raise ValueError("the tree has no monoid")
+		if self.key_func is not None:
+			if lo is not None: lo = self.key_func(lo)
+			if hi is not None: hi = self.key_func(hi)
+		combine = monoid.combine
+		#going down to the highest node in the range, the range is split between its subtrees
+		node = self.root
+		while (node is not None) and (node.is_real_node()):
+			if lo is not None and node.key < lo: node = node.right
+			elif hi is not None and node.key > hi: node = node.left
+			else: break
+		if (node is None) or not node.is_real_node(): return monoid.identity
+		result = monoid.lift(node.item_key, node.value)
+
+		#the left subtree, each node at least lo is taken with its right subtree
+		child = node.left
+		while child.is_real_node():
+			if lo is None or not child.key < lo:
+				part = monoid.lift(child.item_key, child.value)
+				if child.right.is_real_node(): part = combine(part, child.right.aggregate)
+				result = combine(part, result)
+				child = child.left
+			else:
+				child = child.right
+
+		#the right subtree, each node at most hi is taken with its left subtree
+		child = node.right
+		while child.is_real_node():
+			if hi is None or not hi < child.key:
+				part = monoid.lift(child.item_key, child.value)
+				if child.left.is_real_node(): part = combine(child.left.aggregate, part)
+				result = combine(result, part)
+				child = child.right
+			else:
+				child = child.left
+		return result
+
+	"""recomputes the aggregates from a node up to the root, after the value of the node was changed
+	in place
+
+	@type node: AVLNode
+	@pre: node is a real pointer to a node in self, and the tree has a monoid
+	"""
+	# time complexity: O(log(n))
+
+	def fix_aggregates(self, node):
+		while node is not None:
+			node.fix_height()
+			node = node.parent
+
+	"""iterates over the nodes of the dictionary in order of keys, using an explicit stack
+
+	@type lo: int
+	@param lo: the lowest key to return, None for no lower bound
+	@type hi: int
+	@param hi: the highest key to return, None for no upper bound
+	@type reverse: bool
+	@param reverse: if True, the nodes are returned from the highest key to the lowest
+	@rtype: generator of AVLNode
+	@returns: the nodes with lo <= key <= hi, sorted by key
+	@pre: the dictionary is not changed during the iteration
+	"""
+	# time complexity: O(log(n) + k) for k returned nodes, O(log(n)) extra memory
+
+	def nodes(self, lo = None, hi = None, reverse = False):
+		stack = []
+		node = self.root
+		if node is None: return
+		if self.key_func is not None: #comparing the bounds with the cached results of the key function
+			if lo is not None: lo = self.key_func(lo)
+			if hi is not None: hi = self.key_func(hi)
+		if not reverse:
+			#going down towards lo, keeping the nodes whose left subtree is still to be returned
+			while node.is_real_node():
+				if lo is not None and node.key < lo:
+					node = node.right
+				else:
+					stack.append(node)
+					node = node.left
+			while stack:
+				node = stack.pop()
+				if hi is not None and node.key > hi: return
+				yield node
+				node = node.right #the next nodes are the left path of the right subtree
+				while node.is_real_node():
+					stack.append(node)
+					node = node.left
+		else: #mirror image, going down towards hi
+			while node.is_real_node():
+				if hi is not None and node.key > hi:
+					node = node.left
+				else:
+					stack.append(node)
+					node = node.right
+			while stack:
+				node = stack.pop()
+				if lo is not None and node.key < lo: return
+				yield node
+				node = node.left
+				while node.is_real_node():
+					stack.append(node)
+					node = node.right
+
+	"""iterates over the items of the dictionary in order of keys
+
+	@type lo: int
+	@param lo: the lowest key to return, None for no lower bound
+	@type hi: int
+	@param hi: the highest key to return, None for no upper bound
+	@type reverse: bool
+	@param reverse: if True, the items are returned from the highest key to the lowest
+	@rtype: generator of (key, value) tuples
+	@returns: the items with lo <= key <= hi, sorted by key
+	"""
+	# time complexity: O(log(n) + k) for k returned items
+
+	def items(self, lo = None, hi = None, reverse = False):
+		if self.key_func is None:
+			for node in self.nodes(lo, hi, reverse):
+				yield node.key, node.value
+		else:
+			for node in self.nodes(lo, hi, reverse):
+				yield node.item_key, node.value
+
+	"""iterates over the keys of the dictionary in order
+
+	@type lo: int
+	@param lo: the lowest key to return, None for no lower bound
+	@type hi: int
+	@param hi: the highest key to return, None for no upper bound
+	@type reverse: bool
+	@param reverse: if True, the keys are returned from the highest to the lowest
+	@rtype: generator of int
+	@returns: the keys k with lo <= k <= hi, sorted
+	"""
+	# time complexity: O(log(n) + k) for k returned keys
+
+	def keys(self, lo = None, hi = None, reverse = False):
+		if self.key_func is None:
+			for node in self.nodes(lo, hi, reverse):
+				yield node.key
+		else:
+			for node in self.nodes(lo, hi, reverse):
+				yield node.item_key
+
+	"""iterates over the keys of the dictionary in increasing order
+
+	@rtype: generator of int
+	"""
+	# time complexity: O(n) for the whole iteration
+
+	def __iter__(self):
+		return self.keys()
+
+	"""iterates over the keys of the dictionary in decreasing order
+
+	@rtype: generator of int
+	"""
+	# time complexity: O(n) for the whole iteration
+
+	def __reversed__(self):
+		return self.keys(reverse = True)
+
+	"""returns an array representing the dictionary, filling a preallocated list in one in-order
+	walk with an explicit stack - no call per node and none per virtual leaf
+
+	@rtype: list
+	@returns: a sorted list according to key of tuples (key, value) representing the dictionary
+	"""
+	# time complexity: O(n), O(log(n)) extra memory for the stack
+
+	def avl_to_array(self):
+		arr = [None] * self.tree_size
+		keyed = self.key_func is not None
+		stack = []
+		push = stack.append
+		pop = stack.pop
+		node = self.root if self.root is not None else VIRTUAL_NODE
+		i = 0
+		while True:
+			while node.size > 0: #going down to the smallest node of the subtree, the virtual node has size 0
+				push(node)
+				node = node.left
+			if not stack: return arr
+			node = pop()
+			arr[i] = (node.item_key if keyed else node.key, node.value)
+			i += 1
+			node = node.right
+
+	"""writes the keys and the values of the dictionary in order into two separate columns, in one
+	in-order walk with an explicit stack
+
+	@type keys: sequence
+	@param keys: a preallocated column of at least n items to write the keys to, such as a list, an
+	array.array or a NumPy array. None to allocate a list
+	@type values: sequence
+	@param values: a preallocated column of at least n items to write the values to, None to
+	allocate a list
+	@rtype: (sequence, sequence)
+	@returns: a tuple (k, v) of the columns, their first n items are the keys sorted and their values
+	"""
+	# time complexity: O(n), O(log(n)) extra memory for the stack
+
+	def avl_to_arrays(self, keys = None, values = None):
+		if keys is None: keys = [None] * self.tree_size
+		if values is None: values = [None] * self.tree_size
+		keyed = self.key_func is not None
+		stack = []
+		push = stack.append
+		pop = stack.pop
+		node = self.root if self.root is not None else VIRTUAL_NODE
+		i = 0
+		while True:
+			while node.size > 0:
+				push(node)
+				node = node.left
+			if not stack: return keys, values
+			node = pop()
+			keys[i] = node.item_key if keyed else node.key
+			values[i] = node.value
+			i += 1
+			node = node.right
+
+	"""returns an array representing the dictionary, recursive - kept to compare with avl_to_array
+	
+	@type node: AVLNode
+	@:param node: the current node being traversed
+	type result: list
+	@:param result: list to store the in-order traversal
+	"""
+	# time complexity O(n)
+
+	def avl_to_array_rec(self, node, arr):
+		if node and node.is_real_node(): #node is a real node
+			self.avl_to_array_rec(node.get_left(), arr)
+			arr.append((node.get_key(), node.get_value()))
+			self.avl_to_array_rec(node.get_right(), arr)
+	
+	"""returns the node with the maximal key in the dictionary
+
+	@rtype: AVLNode
+	@returns: the maximal node, None if the dictionary is empty
+	"""
+	#complexity: O(1)
+
+	def max_node(self):
+		return self.max 
+
+	"""returns the node with the minimal key in the dictionary
+
+	@rtype: AVLNode
+	@returns: the minimal node, None if the dictionary is empty
+	"""
+	#complexity: O(1)
+
+	def min_node(self):
+		return self.min
+
+	"""returns the last accessed node, where finger_search and finger_insert may start from
+
+	@rtype: AVLNode
+	@returns: the last accessed node, None if there is none
+	"""
+	#complexity: O(1)
+
+	def get_finger(self):
+		return self.finger
+
+	"""moves the finger to a node, so the next finger operations may start from it
+
+	@type node: AVLNode
+	@pre: node is a real pointer to a node in self, or None
+	@param node: the new finger
+	"""
+	#complexity: O(1)
+
+	def set_finger(self, node):
+		self.finger = node
+
+	"""returns the number of items in dictionary 
+
+	@rtype: int
+	@returns: the number of items in dictionary 
+	"""
+	#complexity: O(1)
+
+	def size(self):
+		return self.tree_size
+
+	"""returns the root of the tree representing the dictionary
+
+	@rtype: AVLNode
+	@returns: the root, None if the dictionary is empty
+	"""
+	#complexity: O(1)
+
+	def get_root(self):
+		return self.root
+
+	"""starts counting rotations, height fixes, joins, splits and path lengths. while counting is
+	disabled the tree runs its methods without any extra work
+
+	@rtype: AVLTreeStats
+	@returns: the counters of the tree
+	"""
+	#complexity: O(1)
+
+	def enable_stats(self):
+		if self.stats is None:
+			self.stats = AVLTreeStats()
+			self.stats.attach(self)
+		return self.stats
+
+	"""stops counting
+
+	@rtype: AVLTreeStats
+	@returns: the counters of the tree, None if counting was not enabled
+	"""
+	#complexity: O(1)
+
+	def disable_stats(self):
+		stats = self.stats
+		if stats is not None:
+			stats.detach(self)
+			self.stats = None
+		return stats
+
+	"""returns the counters of the tree
+
+	@rtype: dict
+	@returns: a snapshot of the counters, see AVLTreeStats.snapshot, None if counting is disabled
+	"""
+	#complexity: O(1)
+
+	def get_stats(self):
+		return self.stats.snapshot() if self.stats is not None else None
+
+	"""context manager counting the work done by the tree inside a with block
+
+	@rtype: AVLTreeStats
+	@returns: fresh counters, which keep their values after the block
+	"""
+	#complexity: O(1)
+
+	@contextmanager
+	def profile(self):
+		previous = self.disable_stats()
+		stats = self.enable_stats()
+		try:
+			yield stats
+		finally:
+			self.disable_stats()
+			if previous is not None: #the counters enabled before the block go on counting
+				self.stats = previous
+				previous.attach(self)
+
+	"""returns the state of the tree for pickle and copy, without the counting wrappers of
+	enable_stats, which are local functions that cannot be pickled
+
+	@rtype: dict
+	"""
+	#complexity: O(1)
+
+	def __getstate__(self):
+		state = dict(self.__dict__)
+		for name in AVLTreeStats.WRAPPED:
+			state.pop(name, None)
+		return state
+
+	"""restores the state of the tree for pickle and copy, attaching the counters again if they were
+	enabled
+
+	@type state: dict
+	"""
+	#complexity: O(1)
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		if self.stats is not None: self.stats.attach(self)
+
+	"""puts a bounded cache in front of lookup. only found nodes are cached, and delete, split, join
+	and delete_many remove or move exactly the entries of the keys they change
+
+	@type capacity: int
+	@param capacity: the maximal number of cached keys
+	@type policy: str
+	@param policy: "lru" to evict the least recently used key, "lfu" the least frequently used one
+	"""
+	#complexity: O(1)
+
+	def enable_cache(self, capacity = 1024, policy = "lru"):
+		if policy not in POLICIES: raise ValueError("unknown cache policy %r, expected one of %s" % (policy, ", ".join(POLICIES)))
+		self.cache = POLICIES[policy](capacity)
+
+	"""removes the cache of lookup
+	"""
+	#complexity: O(1)
+
+	def disable_cache(self):
+		self.cache = None
+
+	"""returns the counters of the cache of lookup
+
+	@rtype: dict
+	@returns: the hits, misses, evictions and invalidations, the hit rate, the number of cached keys,
+	the capacity and the policy. None if the cache is disabled
+	"""
+	#complexity: O(1)
+
+	def get_cache_stats(self):
+		cache = self.cache
+		if cache is None: return None
+		result = dict(cache.counters)
+		lookups = result["hits"] + result["misses"]
+		result["hit_rate"] = result["hits"] / lookups if lookups > 0 else 0.0
+		result["size"] = len(cache)
+		result["capacity"] = cache.capacity
+		result["policy"] = cache.policy
+		return result
+
+	"""switches to relaxed balance: updates stop rotating, marking the nodes left out of balance, and
+	fix_balance restores the AVL balance once budget nodes are marked or the balance drifts too far
+
+	@type slack: int
+	@param slack: fix_balance runs at the end of an update that leaves a balance factor beyond
+	+-(slack + 1), or the height more than slack levels above the AVL bound for the size
+	@type budget: int
+	@param budget: the number of marked nodes that makes fix_balance run
+	"""
+	#complexity: O(1)
+
+	def enable_relaxed(self, slack = 1, budget = 1024):
+		if slack < 1: raise ValueError("slack must be at least 1, got %r" % (slack,))
+		counters = {"updates": 0, "ancestor_visits": 0, "ancestors_skipped": 0, "rotations_deferred": 0,
+			"fixer_joins": 0, "fixes": 0}
+		self.relaxed = {"slack": slack, "budget": budget, "imbalanced": {}, "overflow": False, "counters": counters}
+
+	"""restores the AVL balance with fix_balance and switches back to strict balance
+	"""
+	#complexity: O(k log(n)) for k marked nodes
+
+	def disable_relaxed(self):
+		self.fix_balance()
+		self.relaxed = None
+
+	"""returns the counters of relaxed balance
+
+	@rtype: dict
+	@returns: the numbers of updates, of ancestors visited and skipped, of rotations deferred, of nodes
+	joined by fix_balance, of fix_balance calls, and of nodes marked now. None in strict mode
+	"""
+	#complexity: O(1)
+
+	def get_relaxed_stats(self):
+		if self.relaxed is None: return None
+		result = dict(self.relaxed["counters"])
+		result["imbalanced"] = len(self.relaxed["imbalanced"])
+		return result
+
+	"""takes over the marked nodes of a tree whose nodes are moved into self by join or a set operation.
+	if self is in strict balance, the other tree is restored first
+
+	@type other: AVLTree
+	"""
+	#complexity: O(1), O(k log(m)) for k nodes marked in other in strict balance
+
+	def take_relaxed(self, other):
+		if other.relaxed is None: return None
+		if self.relaxed is not None:
+			self.relaxed["imbalanced"].update(other.relaxed["imbalanced"])
+			other.relaxed["imbalanced"] = {}
+		else:
+			other.fix_balance()
@@ -0,0 +1,154 @@
+"""Counters of the work done by an AVL tree, attached to a tree only while they are enabled"""
+
+
+"""
+A class representing the counters of one AVLTree. While attached, it shadows the rebalancing
+and searching methods of the tree with counting wrappers set on the tree object itself, so the
+methods of AVLTree stay untouched and a tree without counters pays nothing for them.
+"""
+
+class AVLTreeStats(object):
+
+	"""names of the methods of the tree shadowed by wrappers while the counters are attached"""
+	WRAPPED = ("rotate", "rebalance", "rebalance_delete", "join_subtrees", "split",
+		"search", "finger_search", "insert", "finger_insert")
+
+	"""
+	Constructor for class AVLTreeStats, all the counters are 0
+	"""
+	#time complexity: O(1)
+
+	def __init__(self):
+		self.counters = {
+			"single_rotations": 0,
+			"double_rotations": 0,
+			"height_fixes": 0, #heights fixed by rebalancing and by rotations
+			"ancestor_visits": 0, #nodes visited by rebalance and rebalance_delete
+			"rebalances": 0,
+			"joins": 0,
+			"join_height_diff": 0, #sum of |h1-h2| over the joins, including those of split
+			"max_join_height_diff": 0,
+			"splits": 0,
+			"split_depth": 0, #sum of the depths of the split nodes, one join per level
+			"max_split_depth": 0,
+		}
+		self.search_paths = {} #histogram of edges returned by search and finger_search
+		self.insert_paths = {} #histogram of edges returned by insert and finger_insert
+
+	"""returns a copy of the counters and histograms
+
+	@rtype: dict
+	@returns: the counters, with the histograms under "search_paths" and "insert_paths"
+	"""
+	#time complexity: O(number of distinct path lengths)
+
+	def snapshot(self):
+		result = dict(self.counters)
+		result["search_paths"] = dict(sorted(self.search_paths.items()))
+		result["insert_paths"] = dict(sorted(self.insert_paths.items()))
+		return result
+
+	"""sets all the counters back to 0
+	"""
+	#time complexity: O(1)
+
+	def reset(self):
+		for name in self.counters:
+			self.counters[name] = 0
+		self.search_paths.clear()
+		self.insert_paths.clear()
+
+	"""attaches the counters to a tree, shadowing its methods with counting wrappers
+
+	@type tree: AVLTree
+	@param tree: the tree to count the work of
+	"""
+	#time complexity: O(1)
+
+	def attach(self, tree):
+		cls = type(tree)
+		counters = self.counters
+		searchPaths = self.search_paths
+		insertPaths = self.insert_paths
+
+		def depth(node): #number of nodes from node up to the root
+			count = 0
+			while node is not None:
+				count += 1
+				node = node.get_parent()
+			return count
+
+		def rotate(node):
+			if node.get_balance_factor() == 2: #the same cases as in AVLTree.rotate
+				double = node.get_left().get_balance_factor() < 0
+			else:
+				double = node.get_right().get_balance_factor() > 0
+			if double:
+				counters["double_rotations"] += 1
+				counters["height_fixes"] += 4
+			else:
+				counters["single_rotations"] += 1
+				counters["height_fixes"] += 2
+			return cls.rotate(tree, node)
+
+		def rebalanced(method, node): #both strict rebalancing loops go up to the root, fixing every height
+			counters["rebalances"] += 1
+			if tree.relaxed is None:
+				visits = depth(node)
+				result = method(tree, node)
+			else: #the relaxed loop stops once a height does not change, it counts the nodes it visits
+				relaxedCounters = tree.relaxed["counters"]
+				before = relaxedCounters["ancestor_visits"]
+				result = method(tree, node)
+				visits = relaxedCounters["ancestor_visits"] - before
+			counters["ancestor_visits"] += visits
+			counters["height_fixes"] += visits
+			return result
+
+		def rebalance(node):
+			return rebalanced(cls.rebalance, node)
+
+		def rebalance_delete(node):
+			return rebalanced(cls.rebalance_delete, node)
+
+		def join_subtrees(left, x, right):
+			diff = abs(left.get_height() - right.get_height())
+			counters["joins"] += 1
+			counters["join_height_diff"] += diff
+			if diff > counters["max_join_height_diff"]: counters["max_join_height_diff"] = diff
+			return cls.join_subtrees(tree, left, x, right)
+
+		def split(node):
+			levels = depth(node) - 1
+			counters["splits"] += 1
+			counters["split_depth"] += levels
+			if levels > counters["max_split_depth"]: counters["max_split_depth"] = levels
+			return cls.split(tree, node)
+
+		def counted(method, histogram): #wrapper adding the returned edges to a histogram
+			def wrapper(*args):
+				result = method(tree, *args)
+				histogram[result[1]] = histogram.get(result[1], 0) + 1
+				return result
+			return wrapper
+
+		tree.rotate = rotate
+		tree.rebalance = rebalance
+		tree.rebalance_delete = rebalance_delete
+		tree.join_subtrees = join_subtrees
+		tree.split = split
+		tree.search = counted(cls.search, searchPaths)
+		tree.finger_search = counted(cls.finger_search, searchPaths)
+		tree.insert = counted(cls.insert, insertPaths)
+		tree.finger_insert = counted(cls.finger_insert, insertPaths)
+
+	"""removes the counting wrappers from a tree
+
+	@type tree: AVLTree
+	@param tree: a tree the counters are attached to
+	"""
+	#time complexity: O(1)
+
+	def detach(self, tree):
+		for name in self.WRAPPED:
+			tree.__dict__.pop(name, None)
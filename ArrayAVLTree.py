@@ -0,0 +1,638 @@
+"""An AVL tree stored in parallel arrays, the nodes are integer indices into the arrays"""
+
+from array import array
+
+
+"""
+A class representing the storage of the nodes of array-backed AVL trees - every field of the
+nodes is kept in its own array, and a node is its index in the arrays. Index 0 is the virtual
+node: key 0, height -1, size 0, it is the child of every real leaf and it is never written to
+(except for its parent, which is never read). Deleted indices are kept in a free list linked
+through the left array, and are reused by the next insertions. Trees made by split and join
+share the storage of the tree they came from.
+"""
+
+class ArrayAVLStore(object):
+
+	"""Constructor for class ArrayAVLStore, holding only the virtual node
+	"""
+	#time complexity: O(1)
+
+	def __init__(self):
+		self.keys = array("q", [0])
+		self.values = [None]
+		self.left = array("q", [0])
+		self.right = array("q", [0])
+		self.parent = array("q", [0])
+		self.heights = array("b", [-1])
+		self.sizes = array("q", [0])
+		self.free = 0 #first index of the free list, 0 if the list is empty
+
+	"""allocates a new real leaf
+
+	@type key: int
+	@param key: key of the new leaf
+	@type val: any
+	@param val: value of the new leaf
+	@rtype: int
+	@returns: the index of the new leaf, its children and parent are the virtual node
+	"""
+	# time complexity: O(1) amortized
+
+	def alloc(self, key, val):
+		node = self.free
+		if node: #reusing a deleted index
+			self.free = self.left[node]
+			self.keys[node] = key
+			self.values[node] = val
+			self.left[node] = 0
+			self.right[node] = 0
+			self.parent[node] = 0
+			self.heights[node] = 0
+			self.sizes[node] = 1
+		else:
+			node = len(self.keys)
+			self.keys.append(key)
+			self.values.append(val)
+			self.left.append(0)
+			self.right.append(0)
+			self.parent.append(0)
+			self.heights.append(0)
+			self.sizes.append(1)
+		return node
+
+	"""returns a deleted node to the free list
+
+	@type node: int
+	@param node: the index of a node not in any tree
+	"""
+	# time complexity: O(1)
+
+	def release(self, node):
+		self.values[node] = None #not keeping the value alive
+		self.left[node] = self.free
+		self.free = node
+
+	"""fixes the height and the subtree size of node according to children
+
+	@type node: int
+	@pre: node is a real node
+	"""
+	# time complexity: O(1)
+
+	def fix_height(self, node):
+		heights = self.heights
+		l = self.left[node]
+		r = self.right[node]
+		hl = heights[l]
+		hr = heights[r]
+		heights[node] = (hl if hl > hr else hr) + 1
+		self.sizes[node] = self.sizes[l] + self.sizes[r] + 1
+
+
+"""
+A class representing an array-backed AVL tree, with the same interface as AVLTree. Nodes are
+integer indices into an ArrayAVLStore, keys must be integers that fit in 64 bits.
+"""
+
+class ArrayAVLTree(object):
+
+	"""
+	Constructor for class ArrayAVLTree
+
+	@type store: ArrayAVLStore
+	@param store: the storage of the nodes, a new one if None
+	"""
+	#time complexity: O(1)
+
+	def __init__(self, store = None):
+		self.store = store if store is not None else ArrayAVLStore()
+		self.root = 0 #0 is the virtual node, the tree is empty
+		self.max = 0
+		self.tree_size = 0
+
+	"""builds a perfectly balanced tree from items sorted by key
+
+	@type items: iterable
+	@param items: (key, value) tuples
+	@pre: the keys are distinct and sorted in increasing order
+	@type store: ArrayAVLStore
+	@param store: the storage of the nodes, a new one if None
+	@rtype: ArrayAVLTree
+	@returns: a new tree holding all the items
+	"""
+	# time complexity: O(n)
+
+	@classmethod
+	def from_sorted(cls, items, store = None):
+		tree = cls(store)
+		tree.root = tree.build_sorted(items)
+		tree.tree_size = tree.store.sizes[tree.root]
+		tree.update_max()
+		return tree
+
+	"""allocates nodes for items sorted by key and links them into a balanced subtree
+
+	@type items: iterable
+	@param items: (key, value) tuples sorted by key
+	@rtype: int
+	@returns: the root of the subtree, 0 if there are no items
+	"""
+	# time complexity: O(n)
+
+	def build_sorted(self, items):
+		store = self.store
+		nodes = [store.alloc(key, val) for key, val in items]
+		root = self.link_subtree(nodes, 0, len(nodes) - 1)
+		store.parent[root] = 0
+		return root
+
+	"""links nodes[lo..hi] into a balanced subtree - recursive function
+
+	@rtype: int
+	@returns: the root of the subtree, 0 if lo > hi
+	"""
+	# time complexity: O(hi - lo)
+
+	def link_subtree(self, nodes, lo, hi):
+		if lo > hi: return 0
+		mid = (lo + hi) // 2
+		node = nodes[mid]
+		store = self.store
+		l = self.link_subtree(nodes, lo, mid - 1)
+		r = self.link_subtree(nodes, mid + 1, hi)
+		store.left[node] = l
+		store.right[node] = r
+		store.parent[l] = node
+		store.parent[r] = node
+		store.fix_height(node)
+		return node
+
+	"""searches for a node in the dictionary corresponding to the key (starting at the root)
+
+	@type key: int
+	@param key: a key to be searched
+	@rtype: (int,int)
+	@returns: a tuple (x,e) where x is the node corresponding to key (or None if not found),
+	and e is the number of edges on the path between the starting node and ending node+1.
+	"""
+	# time complexity: O(log(n))
+
+	def search(self, key):
+		keys = self.store.keys
+		left = self.store.left
+		right = self.store.right
+		node = self.root
+		edges = 1
+		while node:
+			currKey = keys[node]
+			if currKey == key: return node, edges
+			node = right[node] if currKey < key else left[node]
+			edges += 1
+		if self.root: edges -= 1 #did not find key, remove 1 edge travelled to virtual node
+		return None, edges
+
+	"""inserts a new node into the dictionary with the corresponding key and value (starting at the root)
+
+	@type key: int
+	@pre: key currently does not appear in the dictionary
+	@param key: key of item that is to be inserted to self
+	@type val: any
+	@param val: the value of the item
+	@rtype: (int,int,int)
+	@returns: a 3-tuple (x,e,h) where x is the new node,
+	e is the number of edges on the path between the starting node and new node before rebalancing,
+	and h is the number of PROMOTE cases during the AVL rebalancing
+	"""
+	# time complexity: O(log(n))
+
+	def insert(self, key, val):
+		store = self.store
+		node = store.alloc(key, val)
+		self.tree_size += 1
+		if not self.root: #empty tree - new node is the root
+			self.root = node
+			self.max = node
+			return node, 0, 0
+
+		keys = store.keys
+		left = store.left
+		right = store.right
+		parent = self.root
+		edges = 0
+		while True: #look for the virtual node to replace through searching the key
+			edges += 1
+			if keys[parent] < key:
+				if not right[parent]:
+					right[parent] = node
+					break
+				parent = right[parent]
+			else:
+				if not left[parent]:
+					left[parent] = node
+					break
+				parent = left[parent]
+		store.parent[node] = parent
+		cntPromotes = self.rebalance(parent)
+		if key > keys[self.max]: self.max = node
+		return node, edges, cntPromotes
+
+	"""rebalances AVL tree after insertion
+
+	@type node: int
+	@pre: node is the parent of an inserted node
+	@rtype: int
+	@returns: the number of PROMOTE cases during rebalancing
+	"""
+	# time complexity: O(log(n))
+
+	def rebalance(self, node):
+		store = self.store
+		heights = store.heights
+		sizes = store.sizes
+		left = store.left
+		right = store.right
+		parent = store.parent
+		cntPromotes = 0
+		while node:
+			hl = heights[left[node]]
+			hr = heights[right[node]]
+			if -1 <= hl - hr <= 1: #valid balance factor for node
+				h = (hl if hl > hr else hr) + 1
+				if heights[node] < h: cntPromotes += 1
+				heights[node] = h
+				sizes[node] = sizes[left[node]] + sizes[right[node]] + 1
+				node = parent[node]
+			else: #invalid balance factor - rotations needed
+				self.rotate(node)
+		return cntPromotes
+
+	"""rotates tree around node with an invalid balance factor
+
+	@type node: int
+	@pre: node points to a node in self
+	"""
+	# time complexity: O(1)
+
+	def rotate(self, node):
+		store = self.store
+		heights = store.heights
+		left = store.left
+		right = store.right
+		if heights[left[node]] - heights[right[node]] == 2: #left subtree is longer
+			child = left[node]
+			if heights[left[child]] >= heights[right[child]]: #right rotation
+				self.right_rotate(node)
+			else: #left rotation (on left child) then right rotation (on node)
+				self.left_rotate(child)
+				self.right_rotate(node)
+		else: #right subtree is longer
+			child = right[node]
+			if heights[right[child]] >= heights[left[child]]: #left rotation
+				self.left_rotate(node)
+			else: #right rotation (on right child) then left rotation (on node)
+				self.right_rotate(child)
+				self.left_rotate(node)
+
+	"""rotates edge between node and left child to right
+
+	@type node: int
+	@pre: node points to a node in self
+	"""
+	# time complexity: O(1)
+
+	def right_rotate(self, node):
+		store = self.store
+		left = store.left
+		right = store.right
+		parent = store.parent
+		temp = left[node] #the new root of the subtree of node
+		self.replace_child(node, temp)
+		inner = right[temp]
+		left[node] = inner #moving right child of temp
+		parent[inner] = node
+		right[temp] = node #temp is the new root
+		parent[node] = temp
+		store.fix_height(node)
+		store.fix_height(temp)
+
+	"""rotates edge between node and right child to left
+
+	@type node: int
+	@pre: node points to a node in self
+	"""
+	# time complexity: O(1)
+
+	def left_rotate(self, node):
+		store = self.store
+		left = store.left
+		right = store.right
+		parent = store.parent
+		temp = right[node] #the new root of the subtree of node
+		self.replace_child(node, temp)
+		inner = left[temp]
+		right[node] = inner #moving left child of temp
+		parent[inner] = node
+		left[temp] = node #temp is the new root
+		parent[node] = temp
+		store.fix_height(node)
+		store.fix_height(temp)
+
+	"""puts new_node in the place of old_node under the parent of old_node
+
+	@type old_node: int
+	@type new_node: int
+	"""
+	# time complexity: O(1)
+
+	def replace_child(self, old_node, new_node):
+		store = self.store
+		p = store.parent[old_node]
+		if not p: #old node is the root
+			self.root = new_node
+		elif store.left[p] == old_node:
+			store.left[p] = new_node
+		else:
+			store.right[p] = new_node
+		store.parent[new_node] = p
+
+	"""deletes node from the dictionary
+
+	@type node: int
+	@pre: node is a real node in self
+	"""
+	# time complexity: O(log(n))
+
+	def delete(self, node):
+		if not node: return None #node is the virtual node
+		store = self.store
+		left = store.left
+		right = store.right
+		parent = store.parent
+		if node == self.max: #the predecessor of the max is its left child (a leaf) or its parent
+			self.max = left[node] if left[node] else parent[node]
+
+		if not left[node] or not right[node]: #Case 1 and 2: node has at most one real child
+			child = left[node] if left[node] else right[node]
+			start = parent[node]
+			self.replace_child(node, child)
+		else: #Case 3: node has 2 real children, its successor takes its place
+			successor = right[node]
+			while left[successor]:
+				successor = left[successor]
+			start = parent[successor]
+			if start != node: #successor is not the direct right child of node
+				self.replace_child(successor, right[successor])
+				right[successor] = right[node]
+				parent[right[node]] = successor
+			else:
+				start = successor
+			self.replace_child(node, successor)
+			left[successor] = left[node]
+			parent[left[node]] = successor
+
+		self.rebalance_delete(start)
+		store.release(node)
+		self.tree_size -= 1
+
+	"""rebalances the tree after deleting a node
+
+	@type node: int
+	@pre: node is a parent of a deleted node
+	"""
+	# time complexity: O(log(n))
+
+	def rebalance_delete(self, node):
+		store = self.store
+		heights = store.heights
+		sizes = store.sizes
+		left = store.left
+		right = store.right
+		parent = store.parent
+		while node:
+			l = left[node] #fixing the height and size in place, as in ArrayAVLStore.fix_height
+			r = right[node]
+			hl = heights[l]
+			hr = heights[r]
+			heights[node] = (hl if hl > hr else hr) + 1
+			sizes[node] = sizes[l] + sizes[r] + 1
+			if hl - hr > 1 or hr - hl > 1:
+				self.rotate(node)
+			node = parent[node]
+
+	"""updates the max pointer by searching the tree
+	"""
+	# time complexity: O(log(n))
+
+	def update_max(self):
+		right = self.store.right
+		node = self.root
+		while right[node]:
+			node = right[node]
+		self.max = node
+
+	"""joins self with item and another ArrayAVLTree
+
+	@type tree2: ArrayAVLTree
+	@param tree2: a dictionary to be joined with self. if it does not share the storage of self,
+	its items are copied into it first, in O(size of tree2)
+	@type key: int
+	@param key: the key separting self and tree2
+	@type val: any
+	@param val: the value corresponding to key
+	@pre: all keys in self are smaller than key and all keys in tree2 are larger than key,
+	or the opposite way
+	"""
+	# time complexity: O(|h1-h2|) when the storage is shared
+
+	def join(self, tree2, key, val):
+		store = self.store
+		root2 = tree2.root
+		max2 = tree2.max
+		if tree2.store is not store: #moving the items of tree2 into the storage of self
+			root2 = self.build_sorted(tree2.avl_to_array())
+			max2 = root2
+			while store.right[max2]:
+				max2 = store.right[max2]
+		root1 = self.root
+		x = store.alloc(key, val)
+		keys = store.keys
+
+		if root1: selfSmaller = keys[root1] < key
+		else: selfSmaller = not root2 or key < keys[root2]
+		if selfSmaller:
+			self.root = self.join_subtrees(root1, x, root2)
+			self.max = max2 if root2 else x
+		else:
+			self.root = self.join_subtrees(root2, x, root1)
+			if not root1: self.max = x
+		self.tree_size = store.sizes[self.root]
+		tree2.root = tree2.max = tree2.tree_size = 0 #the nodes of tree2 belong to self now
+
+	"""joins two subtrees with a node between them
+
+	@type left: int
+	@param left: root of the subtree with the smaller keys, may be 0
+	@type x: int
+	@param x: the node separating the subtrees
+	@type right: int
+	@param right: root of the subtree with the larger keys, may be 0
+	@rtype: int
+	@returns: the root of the joined subtree
+	"""
+	# time complexity: O(|h1-h2|)
+
+	def join_subtrees(self, left, x, right):
+		store = self.store
+		heights = store.heights
+		parent = store.parent
+		parent[left] = 0
+		parent[right] = 0
+		h1 = heights[left]
+		h2 = heights[right]
+		if h1 <= h2: #travel down left of right to find connection point
+			b = right
+			c = 0
+			while heights[b] > h1:
+				c = b
+				b = store.left[b]
+			store.left[x] = left
+			store.right[x] = b
+			if c: store.left[c] = x
+		else: #travel down right of left to find connection point
+			b = left
+			c = 0
+			while heights[b] > h2:
+				c = b
+				b = store.right[b]
+			store.left[x] = b
+			store.right[x] = right
+			store.right[c] = x
+		parent[store.left[x]] = x
+		parent[store.right[x]] = x
+		parent[x] = c
+		store.fix_height(x)
+		if not c: return x #x is the root, its subtrees differ in height by at most 1
+
+		self.rebalance_delete(x)
+		root = x #going up to the new root
+		while parent[root]:
+			root = parent[root]
+		return root
+
+	"""splits the dictionary at a given node, going up from node and joining the subtrees
+	on each side of the path
+
+	@type node: int
+	@pre: node is in self
+	@rtype: (ArrayAVLTree, ArrayAVLTree)
+	@returns: a tuple (left, right) of trees sharing the storage of self, with the keys smaller
+	and larger than the key of node. node is deleted and self is empty afterwards
+	"""
+	# time complexity: O(log(n))
+
+	def split(self, node):
+		store = self.store
+		parent = store.parent
+		left = store.left[node]
+		right = store.right[node]
+		child = node
+		p = parent[node]
+		while p:
+			grandparent = parent[p] #p is moved by the join, keeping the path up
+			if store.right[p] == child: #p and its left subtree are smaller than node
+				left = self.join_subtrees(store.left[p], p, left)
+			else: #p and its right subtree are larger than node
+				right = self.join_subtrees(right, p, store.right[p])
+			child = p
+			p = grandparent
+		parent[left] = 0
+		parent[right] = 0
+
+		t1 = ArrayAVLTree(store)
+		t1.root = left
+		t1.tree_size = store.sizes[left]
+		t1.update_max()
+		t2 = ArrayAVLTree(store)
+		t2.root = right
+		t2.tree_size = store.sizes[right]
+		if self.max != node: t2.max = self.max
+		else: t2.update_max()
+		store.release(node)
+		self.root = self.max = self.tree_size = 0
+		return t1, t2
+
+	"""returns an array representing the dictionary, using an explicit stack
+
+	@rtype: list
+	@returns: a sorted list according to key of tuples (key, value) representing the dictionary
+	"""
+	# time complexity: O(n)
+
+	def avl_to_array(self):
+		store = self.store
+		keys = store.keys
+		values = store.values
+		left = store.left
+		right = store.right
+		arr = []
+		stack = []
+		node = self.root
+		while node or stack:
+			while node:
+				stack.append(node)
+				node = left[node]
+			node = stack.pop()
+			arr.append((keys[node], values[node]))
+			node = right[node]
+		return arr
+
+	"""returns the key of a node
+
+	@type node: int
+	@rtype: int
+	"""
+	#complexity: O(1)
+
+	def get_key(self, node):
+		return self.store.keys[node]
+
+	"""returns the value of a node
+
+	@type node: int
+	@rtype: any
+	"""
+	#complexity: O(1)
+
+	def get_value(self, node):
+		return self.store.values[node]
+
+	"""returns the node with the maximal key in the dictionary
+
+	@rtype: int
+	@returns: the maximal node, None if the dictionary is empty
+	"""
+	#complexity: O(1)
+
+	def max_node(self):
+		return self.max if self.max else None
+
+	"""returns the number of items in dictionary
+
+	@rtype: int
+	@returns: the number of items in dictionary
+	"""
+	#complexity: O(1)
+
+	def size(self):
+		return self.tree_size
+
+	"""returns the root of the tree representing the dictionary
+
+	@rtype: int
+	@returns: the root, None if the dictionary is empty
+	"""
+	#complexity: O(1)
+
+	def get_root(self):
+		return self.root if self.root else None
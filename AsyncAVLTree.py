@@ -0,0 +1,363 @@
+"""An AVL tree for asyncio programs, never holding the event loop for long
+
+Point lookups are coalesced: the lookups made in the same tick of the event loop are answered by one
+search_many_nodes call, a single descent over the sorted keys. The changes and the long reads are
+serialized through a queue served by one task, so none of them runs while another one is half done.
+Point changes run on the loop, since they take O(log(n)). Batches run in an executor, and lookups
+wait for them to finish. Exports walk the tree in chunks, letting the loop run between chunks.
+A lookup sees every change whose call has returned, but not the changes still waiting in the queue.
+"""
+
+import asyncio
+from itertools import islice
+
+from AVLTree import AVLTree
+
+CHUNK = 1024 #number of items exported between two yields to the event loop
+
+
+"""
+A class representing an AVL tree shared by the coroutines of one event loop. It must only be used
+from that loop, and the wrapped tree must not be used directly afterwards.
+"""
+
+class AsyncAVLTree(object):
+
+	"""Constructor for class AsyncAVLTree
+
+	@type tree: AVLTree
+	@param tree: the tree to serve, a new empty tree if None
+	@type chunk: int
+	@param chunk: the number of items exported between two yields to the event loop
+	@type executor: concurrent.futures.Executor
+	@param executor: the executor of the batches, None for the default executor of the loop
+	"""
+	#time complexity: O(1)
+
+	def __init__(self, tree = None, chunk = CHUNK, executor = None):
+		self.tree = tree if tree is not None else AVLTree()
+		self.chunk = chunk
+		self.executor = executor
+		self.lookups = [] #(key, future) of the lookups of this tick
+		self.scheduled = False #True while a call of run_lookups is scheduled
+		self.exclusive = False #True while a batch runs in the executor, lookups wait for it
+		self.queue = None #the queue of the changes and long reads, made on first use
+		self.server = None #the task serving the queue
+		self.counters = {"lookups": 0, "descents": 0, "jobs": 0}
+
+	"""searches for a key, together with the other lookups of the same tick
+
+	@type key: int
+	@param key: a key to be searched
+	@rtype: AVLNode
+	@returns: the node corresponding to key, None if not found
+	"""
+	# time complexity: O(log(n)), O(k log(k) + k log(n/k + 1)) for the k lookups of a tick together
+
+	async def search(self, key):
+		future = asyncio.get_running_loop().create_future()
+		self.lookups.append((key, future))
+		self.schedule_lookups()
+		return await future
+
+	"""returns the value of a key, see search
+
+	@type key: int
+	@type default: any
+	@param default: the value returned if key is not found
+	@rtype: any
+	"""
+	# time complexity: O(log(n))
+
+	async def get(self, key, default = None):
+		node = await self.search(key)
+		return node.get_value() if node is not None else default
+
+	"""schedules answering the pending lookups after the coroutines ready in this tick
+	"""
+	# time complexity: O(1)
+
+	def schedule_lookups(self):
+		if self.scheduled or self.exclusive or len(self.lookups) == 0: return None
+		self.scheduled = True
+		asyncio.get_running_loop().call_soon(self.run_lookups)
+
+	"""answers the pending lookups with one descent of the tree
+	"""
+	# time complexity: O(k log(k) + k log(n/k + 1)) for k pending lookups
+
+	def run_lookups(self):
+		self.scheduled = False
+		if self.exclusive: return None #scheduled again when the batch finishes
+		lookups = self.lookups
+		self.lookups = []
+		try:
+			nodes = self.tree.search_many_nodes([key for key, future in lookups])
+		except Exception as error: #a key that cannot be compared fails the lookups of its tick
+			for key, future in lookups:
+				if not future.done(): future.set_exception(error)
+			return None
+		for (key, future), node in zip(lookups, nodes):
+			if not future.done(): future.set_result(node) #a cancelled lookup is done already
+		self.counters["lookups"] += len(lookups)
+		self.counters["descents"] += 1
+
+	"""runs a job after the jobs queued before it
+
+	@type job: function
+	@param job: a coroutine function with no arguments, running the job
+	@rtype: any
+	@returns: the result of the job
+	"""
+	# time complexity: the time of the jobs queued before it and of job
+
+	async def submit(self, job):
+		if self.queue is None:
+			self.queue = asyncio.Queue()
+			self.server = asyncio.get_running_loop().create_task(self.serve())
+		future = asyncio.get_running_loop().create_future()
+		await self.queue.put((job, future))
+		return await future
+
+	"""serves the queue, running one job at a time - the coroutine of the server task. A job failing
+	with any exception, even CancelledError, fails its own call only. If the server task itself is
+	cancelled, the queued calls are cancelled with it and the next call starts a new server
+
+	@raises CancelledError: if the server task is cancelled
+	"""
+	# time complexity: runs until close
+
+	async def serve(self):
+		while True:
+			future = None
+			try:
+				job, future = await self.queue.get()
+				if job is None: #queued by close
+					future.set_result(None)
+					return None
+				result = await job()
+			except BaseException as error:
+				if future is None or self.cancelling(): #waiting for a job or running one, the task is cancelled
+					self.stop_serving(future)
+					raise
+				if future is not None and not future.done():
+					if isinstance(error, asyncio.CancelledError): future.cancel()
+					else: future.set_exception(error)
+			else:
+				if not future.done(): future.set_result(result)
+			self.counters["jobs"] += 1
+
+	"""returns whether the current task, the server task, is being cancelled
+
+	@rtype: bool
+	@returns: True if a cancellation of the task is pending, always False before Python 3.11, where a
+	cancellation while a job runs cannot be told apart from the job raising CancelledError
+	"""
+	# time complexity: O(1)
+
+	def cancelling(self):
+		task = asyncio.current_task()
+		return hasattr(task, "cancelling") and task.cancelling() > 0
+
+	"""cancels the call of the running job and the queued calls, and lets the next call start a new
+	server - called by the server task when it is cancelled
+
+	@type future: asyncio.Future
+	@param future: the future of the running job, None if none was running
+	"""
+	# time complexity: O(number of queued calls)
+
+	def stop_serving(self, future):
+		if future is not None: future.cancel()
+		while not self.queue.empty():
+			job, queued = self.queue.get_nowait()
+			queued.cancel()
+		self.queue = self.server = None
+
+	"""queues a change that runs on the event loop
+
+	@type method: function
+	@param method: a method of the tree
+	@rtype: any
+	@returns: the result of method
+	"""
+	# time complexity: the time of the jobs queued before it and of method
+
+	async def change(self, method, *args):
+		async def job():
+			return method(*args)
+		return await self.submit(job)
+
+	"""queues a batch that runs in the executor, the lookups wait until it finishes
+
+	@type method: function
+	@param method: a method of the tree
+	@rtype: any
+	@returns: the result of method
+	"""
+	# time complexity: the time of the jobs queued before it and of method
+
+	async def run_exclusive(self, method, *args):
+		async def job():
+			self.exclusive = True
+			try:
+				return await asyncio.get_running_loop().run_in_executor(self.executor, method, *args)
+			finally:
+				self.exclusive = False
+				self.schedule_lookups()
+		return await self.submit(job)
+
+	"""inserts a new item into the dictionary
+
+	@rtype: (AVLNode,int,int)
+	@returns: see AVLTree.insert
+	"""
+	# time complexity: O(log(n))
+
+	async def insert(self, key, val):
+		return await self.change(self.tree.insert, key, val)
+
+	"""inserts a new item, or overwrites the value if key already appears
+
+	@rtype: (AVLNode,bool)
+	@returns: see AVLTree.upsert
+	"""
+	# time complexity: O(log(n))
+
+	async def upsert(self, key, val):
+		return await self.change(self.tree.upsert, key, val)
+
+	"""deletes node from the dictionary
+
+	@type node: AVLNode
+	@pre: node is a real pointer to a node in self
+	"""
+	# time complexity: O(log(n))
+
+	async def delete(self, node):
+		return await self.change(self.tree.delete, node)
+
+	"""deletes the item with the given key, if it appears in the dictionary
+
+	@rtype: AVLNode
+	@returns: see AVLTree.delete_key
+	"""
+	# time complexity: O(log(n))
+
+	async def delete_key(self, key):
+		return await self.change(self.tree.delete_key, key)
+
+	"""inserts a batch of new items into the dictionary, in the executor
+
+	@rtype: int
+	@returns: see AVLTree.insert_many
+	"""
+	# time complexity: O(k log(k) + min(k log(n), n + k)) for k items
+
+	async def insert_many(self, items):
+		return await self.run_exclusive(self.tree.insert_many, list(items))
+
+	"""deletes a batch of keys from the dictionary, in the executor
+
+	@rtype: int
+	@returns: see AVLTree.delete_many
+	"""
+	# time complexity: O(k log(k) + min(k log(n), n + k)) for k keys
+
+	async def delete_many(self, keys):
+		return await self.run_exclusive(self.tree.delete_many, list(keys))
+
+	"""joins self with item and another AVLTree
+
+	@type tree2: AVLTree
+	@param tree2: a dictionary to be joined with self, it is used by self afterwards
+	"""
+	# time complexity: O(log(n))
+
+	async def join(self, tree2, key, val):
+		return await self.change(self.tree.join, tree2, key, val)
+
+	"""splits the dictionary at a given node, self is left empty
+
+	@type node: AVLNode
+	@pre: node is in self
+	@rtype: (AsyncAVLTree, AsyncAVLTree)
+	@returns: a tuple (left, right) of new facades of the smaller and larger keys, see AVLTree.split
+	"""
+	# time complexity: O(log(n))
+
+	async def split(self, node):
+		t1, t2 = await self.change(self.split_tree, node)
+		return AsyncAVLTree(t1, self.chunk, self.executor), AsyncAVLTree(t2, self.chunk, self.executor)
+
+	"""splits the tree at a given node and replaces it by an empty tree - run by the server task
+
+	@type node: AVLNode
+	@rtype: (AVLTree, AVLTree)
+	"""
+	# time complexity: O(log(n))
+
+	def split_tree(self, node):
+		t1, t2 = self.tree.split(node)
+		self.tree = AVLTree(keyFunc = self.tree.key_func, monoid = self.tree.monoid)
+		return t1, t2
+
+	"""returns the items in order of keys, yielding to the event loop every chunk items
+
+	@type lo: int
+	@param lo: the lowest key to return, None for no lower bound
+	@type hi: int
+	@param hi: the highest key to return, None for no upper bound
+	@rtype: list
+	@returns: the items with lo <= key <= hi, see AVLTree.items. no change runs while they are read
+	"""
+	# time complexity: O(log(n) + k) for k returned items
+
+	async def items(self, lo = None, hi = None):
+		async def job():
+			iterator = self.tree.items(lo, hi)
+			result = []
+			while True:
+				part = list(islice(iterator, self.chunk))
+				result.extend(part)
+				if len(part) < self.chunk: return result
+				await asyncio.sleep(0) #lookups may run, they do not change the tree
+		return await self.submit(job)
+
+	"""returns an array representing the dictionary, see items
+
+	@rtype: list
+	@returns: a sorted list according to key of tuples (key, value)
+	"""
+	# time complexity: O(n)
+
+	async def avl_to_array(self):
+		return await self.items()
+
+	"""returns the number of items in the dictionary
+
+	@rtype: int
+	"""
+	# time complexity: O(1)
+
+	def size(self):
+		return self.tree.size()
+
+	"""returns the numbers of lookups, of descents answering them and of jobs served
+
+	@rtype: dict
+	"""
+	# time complexity: O(1)
+
+	def get_stats(self):
+		return dict(self.counters)
+
+	"""stops the server task after the jobs queued before
+	"""
+	# time complexity: the time of the jobs queued before
+
+	async def close(self):
+		if self.server is None: return None
+		await self.submit(None)
+		await self.server
+		self.queue = self.server = None
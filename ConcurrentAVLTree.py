@@ -0,0 +1,387 @@
+"""A thread-safe AVL tree, readers share the tree and writers get it exclusively"""
+
+import threading
+from contextlib import contextmanager
+
+from AVLTree import AVLTree
+
+
+"""
+A class representing a reader-writer lock
+"""
+
+class RWLock(object):
+
+	"""Constructor for class RWLock, writers waiting for the lock block new readers,
+	so a stream of readers cannot starve them
+	"""
+	#time complexity: O(1)
+
+	def __init__(self):
+		self.cond = threading.Condition(threading.Lock())
+		self.readers = 0 #number of readers holding the lock
+		self.writer = False #whether a writer holds the lock
+		self.waiting_writers = 0
+
+	"""acquires the lock for reading, waiting while a writer holds it or waits for it
+	"""
+	#time complexity: O(1) without contention
+
+	def acquire_read(self):
+		with self.cond:
+			while self.writer or self.waiting_writers > 0:
+				self.cond.wait()
+			self.readers += 1
+
+	"""releases the lock after reading
+	"""
+	#time complexity: O(1)
+
+	def release_read(self):
+		with self.cond:
+			self.readers -= 1
+			if self.readers == 0: self.cond.notify_all()
+
+	"""acquires the lock for writing, waiting until no reader or writer holds it
+	"""
+	#time complexity: O(1) without contention
+
+	def acquire_write(self):
+		with self.cond:
+			self.waiting_writers += 1
+			while self.writer or self.readers > 0:
+				self.cond.wait()
+			self.waiting_writers -= 1
+			self.writer = True
+
+	"""releases the lock after writing
+	"""
+	#time complexity: O(1)
+
+	def release_write(self):
+		with self.cond:
+			self.writer = False
+			self.cond.notify_all()
+
+	"""context manager holding the lock for reading
+	"""
+
+	@contextmanager
+	def read_locked(self):
+		self.acquire_read()
+		try:
+			yield
+		finally:
+			self.release_read()
+
+	"""context manager holding the lock for writing
+	"""
+
+	@contextmanager
+	def write_locked(self):
+		self.acquire_write()
+		try:
+			yield
+		finally:
+			self.release_write()
+
+
+"""
+A class representing an AVL tree shared by threads - the methods that only read the tree run
+under the read lock, so reads run together, and the methods that change the tree, its finger or its
+counters run under the write lock. search uses AVLTree.find, which does not move the finger and is
+not counted by enable_stats, so it only reads.
+"""
+
+class ConcurrentAVLTree(object):
+
+	"""Constructor for class ConcurrentAVLTree
+
+	@type tree: AVLTree
+	@param tree: the tree to share, a new empty tree if None. it must not be used directly afterwards
+	"""
+	#time complexity: O(1)
+
+	def __init__(self, tree = None):
+		self.tree = tree if tree is not None else AVLTree()
+		self.lock = RWLock()
+
+	"""searches for a node in the dictionary corresponding to the key (starting at the root),
+	without moving the finger
+
+	@type key: int
+	@param key: a key to be searched
+	@rtype: (AVLNode,int)
+	@returns: see AVLTree.search
+	"""
+	# time complexity: O(log(n))
+
+	def search(self, key):
+		with self.lock.read_locked():
+			return self.tree.find(key) #search would move the finger
+
+	"""searches for a node in the dictionary corresponding to the key, starting at the closest finger,
+	under the write lock since it moves the finger
+
+	@type key: int
+	@param key: a key to be searched
+	@rtype: (AVLNode,int)
+	@returns: see AVLTree.finger_search
+	"""
+	# time complexity: O(log(n))
+
+	def finger_search(self, key):
+		with self.lock.write_locked(): #it moves the finger, and the counters of enable_stats
+			return self.tree.finger_search(key)
+
+	"""returns a list of the items of the dictionary in order of keys, read in one consistent pass
+
+	@type lo: int
+	@param lo: the lowest key to return, None for no lower bound
+	@type hi: int
+	@param hi: the highest key to return, None for no upper bound
+	@type reverse: bool
+	@param reverse: if True, the items are returned from the highest key to the lowest
+	@rtype: list
+	@returns: (key, value) tuples with lo <= key <= hi, sorted by key
+	"""
+	# time complexity: O(log(n) + k) for k returned items
+
+	def items(self, lo = None, hi = None, reverse = False):
+		with self.lock.read_locked():
+			return list(self.tree.items(lo, hi, reverse))
+
+	"""returns a list of the keys of the dictionary in order, read in one consistent pass
+
+	@type lo: int
+	@param lo: the lowest key to return, None for no lower bound
+	@type hi: int
+	@param hi: the highest key to return, None for no upper bound
+	@type reverse: bool
+	@param reverse: if True, the keys are returned from the highest to the lowest
+	@rtype: list
+	@returns: the keys k with lo <= k <= hi, sorted
+	"""
+	# time complexity: O(log(n) + k) for k returned keys
+
+	def keys(self, lo = None, hi = None, reverse = False):
+		with self.lock.read_locked():
+			return list(self.tree.keys(lo, hi, reverse))
+
+	"""returns the number of keys in the dictionary smaller than key
+
+	@rtype: int
+	@returns: see AVLTree.rank
+	"""
+	# time complexity: O(log(n))
+
+	def rank(self, key, inclusive = False):
+		with self.lock.read_locked():
+			return self.tree.rank(key, inclusive)
+
+	"""returns the node with the k-th smallest key, counting from 0
+
+	@rtype: AVLNode
+	@returns: see AVLTree.select
+	"""
+	# time complexity: O(log(n))
+
+	def select(self, k):
+		with self.lock.read_locked():
+			return self.tree.select(k)
+
+	"""returns the number of keys in the dictionary between lo and hi
+
+	@rtype: int
+	@returns: see AVLTree.count_range
+	"""
+	# time complexity: O(log(n))
+
+	def count_range(self, lo, hi):
+		with self.lock.read_locked():
+			return self.tree.count_range(lo, hi)
+
+	"""combines the items of the dictionary between lo and hi under the monoid of the tree
+
+	@rtype: any
+	@returns: see AVLTree.aggregate
+	"""
+	# time complexity: O(log(n))
+
+	def aggregate(self, lo = None, hi = None):
+		with self.lock.read_locked():
+			return self.tree.aggregate(lo, hi)
+
+	"""returns an array representing the dictionary
+
+	@rtype: list
+	@returns: see AVLTree.avl_to_array
+	"""
+	# time complexity: O(n)
+
+	def avl_to_array(self):
+		with self.lock.read_locked():
+			return self.tree.avl_to_array()
+
+	"""inserts a new node into the dictionary (starting at the root)
+
+	@rtype: (AVLNode,int,int)
+	@returns: see AVLTree.insert
+	"""
+	# time complexity: O(log(n))
+
+	def insert(self, key, val):
+		with self.lock.write_locked():
+			return self.tree.insert(key, val)
+
+	"""inserts a new node into the dictionary, starting at the closest finger
+
+	@rtype: (AVLNode,int,int)
+	@returns: see AVLTree.finger_insert
+	"""
+	# time complexity: O(log(n))
+
+	def finger_insert(self, key, val):
+		with self.lock.write_locked():
+			return self.tree.finger_insert(key, val)
+
+	"""inserts a new item, or overwrites the value if key already appears
+
+	@rtype: (AVLNode,bool)
+	@returns: see AVLTree.upsert
+	"""
+	# time complexity: O(log(n))
+
+	def upsert(self, key, val):
+		with self.lock.write_locked():
+			return self.tree.upsert(key, val)
+
+	"""deletes node from the dictionary
+
+	@type node: AVLNode
+	@pre: node is a real pointer to a node in self
+	"""
+	# time complexity: O(log(n))
+
+	def delete(self, node):
+		with self.lock.write_locked():
+			return self.tree.delete(node)
+
+	"""deletes the item with the given key, if it appears in the dictionary
+
+	@rtype: AVLNode
+	@returns: see AVLTree.delete_key
+	"""
+	# time complexity: O(log(n))
+
+	def delete_key(self, key):
+		with self.lock.write_locked():
+			return self.tree.delete_key(key)
+
+	"""deletes the item with the maximal key and returns it
+
+	@rtype: (int, any)
+	@returns: see AVLTree.pop_max
+	"""
+	# time complexity: O(log(n))
+
+	def pop_max(self):
+		with self.lock.write_locked():
+			return self.tree.pop_max()
+
+	"""deletes the item with the minimal key and returns it
+
+	@rtype: (int, any)
+	@returns: see AVLTree.pop_min
+	"""
+	# time complexity: O(log(n))
+
+	def pop_min(self):
+		with self.lock.write_locked():
+			return self.tree.pop_min()
+
+	"""inserts a batch of new items into the dictionary
+
+	@rtype: int
+	@returns: see AVLTree.insert_many
+	"""
+	# time complexity: O(k log(k) + min(k log(n), n + k)) for k items
+
+	def insert_many(self, items):
+		items = list(items) #not consuming a generator while holding the lock
+		with self.lock.write_locked():
+			return self.tree.insert_many(items)
+
+	"""deletes a batch of keys from the dictionary
+
+	@rtype: int
+	@returns: see AVLTree.delete_many
+	"""
+	# time complexity: O(k log(k) + min(k log(n), n + k)) for k keys
+
+	def delete_many(self, keys):
+		keys = list(keys)
+		with self.lock.write_locked():
+			return self.tree.delete_many(keys)
+
+	"""joins self with item and another ConcurrentAVLTree, locking both trees in a fixed order
+	so two opposite joins cannot deadlock
+
+	@type tree2: ConcurrentAVLTree
+	@param tree2: a dictionary to be joined with self, it must not be used afterwards
+	@pre: see AVLTree.join
+	@raises ValueError: if tree2 is self, whose lock would be taken twice
+	"""
+	# time complexity: O(|h1-h2|)
+
+	def join(self, tree2, key, val):
+		if tree2 is self: raise ValueError("cannot join a tree with itself")
+		first, second = (self, tree2) if id(self) < id(tree2) else (tree2, self)
+		with first.lock.write_locked():
+			with second.lock.write_locked():
+				self.tree.join(tree2.tree, key, val)
+
+	"""splits the dictionary at a given node
+
+	@type node: AVLNode
+	@pre: node is in self
+	@rtype: (ConcurrentAVLTree, ConcurrentAVLTree)
+	@returns: see AVLTree.split, self is empty afterwards
+	"""
+	# time complexity: O(log(n))
+
+	def split(self, node):
+		with self.lock.write_locked():
+			t1, t2 = self.tree.split(node)
+			self.tree = AVLTree(keyFunc = self.tree.key_func, monoid = self.tree.monoid)
+		return ConcurrentAVLTree(t1), ConcurrentAVLTree(t2)
+
+	"""returns the node with the maximal key in the dictionary
+
+	@rtype: AVLNode
+	@returns: the maximal node, None if the dictionary is empty
+	"""
+	#complexity: O(1)
+
+	def max_node(self):
+		return self.tree.max_node()
+
+	"""returns the node with the minimal key in the dictionary
+
+	@rtype: AVLNode
+	@returns: the minimal node, None if the dictionary is empty
+	"""
+	#complexity: O(1)
+
+	def min_node(self):
+		return self.tree.min_node()
+
+	"""returns the number of items in dictionary
+
+	@rtype: int
+	@returns: the number of items in dictionary
+	"""
+	#complexity: O(1)
+
+	def size(self):
+		return self.tree.size()
@@ -0,0 +1,668 @@
+"""A durable AVL tree, writing its changes to a write-ahead log and recovering after a restart
+
+The tree lives in a directory of checkpoints and log segments:
+	checkpoint.<s>.avl:  a file saved in the format of MappedAVLTree, holding the items written by
+	                     all the segments before segment s
+	wal.<s>.log:         segment s of the log, b"AVLW" and its version (uint32), then the records
+
+Each record is framed as its length (uint32) and the CRC-32 of its payload (uint32), followed by the
+payload - the operation (one byte) and its items, each an int64 key, the kind of the value (one
+byte), the length of its encoding (uint32) and the encoded value, all in native byte order. A crash
+in the middle of writing a record leaves a torn tail, which recovery finds by its length or CRC and
+cuts off.
+
+Recovery loads the latest checkpoint and replays the segments from its number on. A checkpoint
+closes the current segment, then exports the tree as it was at that moment in chunks of CHUNK items,
+letting the writers go on between chunks. A writer changing a key the export has not reached yet
+first remembers the item it replaces, and the export takes the remembered items instead of the ones
+in the tree.
+"""
+
+import heapq
+from itertools import islice
+import os
+import struct
+import threading
+import zlib
+
+from AVLTree import AVLTree
+from MappedAVLTree import decode_value, encode_value, load, save_items
+
+MAGIC = b"AVLW"
+VERSION = 1
+HEADER = struct.Struct("=4sI")
+FRAME = struct.Struct("=II") #length and CRC-32 of the payload
+ITEM = struct.Struct("=qBI") #key, kind and length of the value
+COUNT = struct.Struct("=Q")
+CHUNK = 4096 #number of items a checkpoint exports between two releases of the lock
+
+OP_INSERT = 1
+OP_UPSERT = 2
+OP_DELETE = 3
+OP_JOIN = 4
+OP_SPLIT = 5
+
+"""the fsync policies, see DurableAVLTree"""
+POLICIES = ("always", "batch", "none")
+
+
+"""encodes an item of a record
+
+@type key: int
+@type val: None, str or bytes
+@rtype: bytes
+"""
+# time complexity: O(len(val))
+
+def encode_item(key, val):
+	kind, data = encode_value(val)
+	return ITEM.pack(key, kind, len(data)) + data
+
+
+"""decodes an item of a record
+
+@type payload: bytes
+@type offset: int
+@param offset: the position of the item in payload
+@rtype: (int, any, int)
+@returns: a tuple (k, v, o) of the key, the value and the position after the item
+"""
+# time complexity: O(length of the value)
+
+def decode_item(payload, offset):
+	key, kind, length = ITEM.unpack_from(payload, offset)
+	offset += ITEM.size
+	return key, decode_value(kind, memoryview(payload)[offset:offset + length]), offset + length
+
+
+"""frames a payload as a record
+
+@type payload: bytes
+@rtype: bytes
+"""
+# time complexity: O(len(payload))
+
+def frame(payload):
+	return FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+"""applies one record to a tree, as the operation it logged
+
+@type tree: AVLTree
+@type payload: bytes
+@param payload: the payload of the record
+@rtype: AVLTree
+@returns: the tree after the operation, a new tree after a split
+"""
+# time complexity: O(log(n)), O(m + log(n)) for a join of m items
+
+def replay(tree, payload):
+	op = payload[0]
+	key, val, offset = decode_item(payload, 1)
+	if op == OP_INSERT: tree.insert(key, val)
+	elif op == OP_UPSERT: tree.upsert(key, val)
+	elif op == OP_DELETE: tree.delete_key(key)
+	elif op == OP_SPLIT: tree = tree.split(tree.search(key)[0])[0] #the smaller keys are kept
+	elif op == OP_JOIN:
+		count = COUNT.unpack_from(payload, offset)[0]
+		offset += COUNT.size
+		items = []
+		for i in range(count):
+			itemKey, itemVal, offset = decode_item(payload, offset)
+			items.append((itemKey, itemVal))
+		tree.join(AVLTree.from_sorted(items), key, val)
+	else:
+		raise ValueError("unknown log operation %d" % op)
+	return tree
+
+
+"""replays a segment of the log into a tree, cutting off a torn tail
+
+@type tree: AVLTree
+@type path: str
+@param path: the path of the segment
+@rtype: (AVLTree, int)
+@returns: a tuple (t, r) of the tree after the segment and the number of records replayed
+"""
+# time complexity: O(size of the segment + r log(n)) for r records
+
+def replay_segment(tree, path):
+	with open(path, "rb") as f:
+		data = f.read()
+	if len(data) < HEADER.size or HEADER.unpack_from(data, 0) != (MAGIC, VERSION):
+		raise ValueError("%s is not a log segment of version %d" % (path, VERSION))
+	offset = HEADER.size
+	records = 0
+	while offset + FRAME.size <= len(data):
+		length, crc = FRAME.unpack_from(data, offset)
+		payload = data[offset + FRAME.size:offset + FRAME.size + length]
+		if len(payload) < length or zlib.crc32(payload) != crc: break #a torn record, written last
+		tree = replay(tree, payload)
+		offset += FRAME.size + length
+		records += 1
+	if offset < len(data): #cutting off the torn tail, so new records follow the last whole one
+		with open(path, "r+b") as f:
+			f.truncate(offset)
+			os.fsync(f.fileno())
+	return tree, records
+
+
+"""makes the creation, renaming or removal of files in a directory durable
+
+@type directory: str
+"""
+# time complexity: O(1)
+
+def sync_directory(directory):
+	fd = os.open(directory, os.O_RDONLY)
+	try:
+		os.fsync(fd)
+	finally:
+		os.close(fd)
+
+
+"""
+A class representing an AVL tree whose changes survive a crash. Each change is applied to an AVLTree
+in memory and appended to the log, and the tree is rebuilt from the latest checkpoint and the log on
+the next start. Keys are integers that fit in 64 bits and values are None, str or bytes, as in the
+files of MappedAVLTree.
+
+The fsync policy decides when a change is durable:
+	"always": each change is fsynced before the call returns. Calls of several threads waiting for
+	          the disk at the same time share one fsync (group commit)
+	"batch":  a background thread writes and fsyncs the log every interval seconds, or sooner when
+	          batch records are pending. A crash loses at most the last interval of changes
+	"none":   the log is written to the operating system every batch records and never fsynced,
+	          a crash of the machine may lose any change since the last checkpoint
+"""
+
+class DurableAVLTree(object):
+
+	"""
+	Constructor for class DurableAVLTree, recovering the tree saved in a directory
+
+	@type directory: str
+	@param directory: the directory of the checkpoints and the log, created if missing
+	@type sync: str
+	@param sync: the fsync policy, "always", "batch" or "none"
+	@type interval: float
+	@param interval: the seconds between the fsyncs of the "batch" policy
+	@type batch: int
+	@param batch: the number of pending records written at once by the "batch" and "none" policies
+	@raises ValueError: if sync is not a policy
+	"""
+	#time complexity: O(n + r log(n)) for n items in the checkpoint and r records in the log
+
+	def __init__(self, directory, sync = "batch", interval = 0.01, batch = 1024):
+		if sync not in POLICIES:
+			raise ValueError("unknown fsync policy %r, expected one of %s" % (sync, ", ".join(POLICIES)))
+		self.directory = directory
+		self.sync = sync
+		self.interval = interval
+		self.batch = batch
+		self.lock = threading.RLock() #guards the tree and the pending records
+		self.file_lock = threading.Lock() #guards the log file, taken before lock
+		self.checkpoint_lock = threading.Lock() #one checkpoint at a time
+		self.export = None #the state of the export of a checkpoint, None while no checkpoint exports
+		self.pending = [] #framed records not written to the file yet
+		self.lsn = 0 #number of records appended
+		self.durable_lsn = 0 #number of records fsynced
+		self.counters = {"records": 0, "bytes": 0, "writes": 0, "fsyncs": 0, "checkpoints": 0}
+		self.recover()
+		self.closed = False
+		self.wakeup = threading.Event()
+		self.flusher = None
+		if sync == "batch":
+			self.flusher = threading.Thread(target = self.flush_loop, daemon = True)
+			self.flusher.start()
+
+	"""returns the path of a file of the directory
+
+	@type kind: str
+	@param kind: "checkpoint" or "wal"
+	@type seq: int
+	@param seq: the number of the checkpoint or of the segment
+	@rtype: str
+	"""
+	#time complexity: O(1)
+
+	def path(self, kind, seq):
+		extension = "avl" if kind == "checkpoint" else "log"
+		return os.path.join(self.directory, "%s.%08d.%s" % (kind, seq, extension))
+
+	"""lists the numbers of the checkpoints or of the segments in the directory
+
+	@type kind: str
+	@param kind: "checkpoint" or "wal"
+	@rtype: list
+	@returns: the numbers, sorted
+	"""
+	#time complexity: O(number of files in the directory)
+
+	def list_files(self, kind):
+		seqs = []
+		for name in os.listdir(self.directory):
+			parts = name.split(".")
+			if len(parts) == 3 and parts[0] == kind and parts[1].isdigit() and parts[2] in ("avl", "log"):
+				seqs.append(int(parts[1]))
+		return sorted(seqs)
+
+	"""loads the latest checkpoint, replays the log after it and opens the last segment for appending
+
+	@post: self.recovery holds the number of items of the checkpoint and of records replayed
+	"""
+	#time complexity: O(n + r log(n)) for n items in the checkpoint and r records in the log
+
+	def recover(self):
+		os.makedirs(self.directory, exist_ok = True)
+		for name in os.listdir(self.directory): #a checkpoint cut by a crash before it was renamed
+			if name.endswith(".tmp"): os.remove(os.path.join(self.directory, name))
+		checkpoints = self.list_files("checkpoint")
+		start = checkpoints[-1] if len(checkpoints) > 0 else 0
+		self.tree = load(self.path("checkpoint", start)) if len(checkpoints) > 0 else AVLTree()
+		self.recovery = {"checkpoint": self.tree.size(), "records": 0}
+		segments = [seq for seq in self.list_files("wal") if seq >= start]
+		for seq in segments:
+			self.tree, records = replay_segment(self.tree, self.path("wal", seq))
+			self.recovery["records"] += records
+		self.remove_before(start) #files left by a crash after the checkpoint was renamed
+		self.seq = segments[-1] if len(segments) > 0 else start
+		self.open_segment()
+
+	"""opens segment self.seq for appending, writing its header if it is new
+	"""
+	#time complexity: O(1)
+
+	def open_segment(self):
+		path = self.path("wal", self.seq)
+		isNew = not os.path.exists(path)
+		self.file = open(path, "ab")
+		if isNew:
+			self.file.write(HEADER.pack(MAGIC, VERSION))
+			self.file.flush()
+			os.fsync(self.file.fileno())
+			sync_directory(self.directory)
+
+	"""removes the checkpoints and the segments older than a checkpoint
+
+	@type seq: int
+	@param seq: the number of the checkpoint
+	"""
+	#time complexity: O(number of files in the directory)
+
+	def remove_before(self, seq):
+		for kind in ("checkpoint", "wal"):
+			for old in self.list_files(kind):
+				if old < seq: os.remove(self.path(kind, old))
+
+	"""appends a record to the pending records, must be called holding lock
+
+	@type payload: bytes
+	@param payload: the payload of the record
+	@rtype: int
+	@returns: the number of the record, it is durable once durable_lsn reaches it
+	"""
+	#time complexity: O(len(payload))
+
+	def append(self, payload):
+		record = frame(payload)
+		self.pending.append(record)
+		self.lsn += 1
+		self.counters["records"] += 1
+		self.counters["bytes"] += len(record)
+		return self.lsn
+
+	"""waits until a record is durable as the fsync policy requires
+
+	@type lsn: int
+	@param lsn: the number of the record
+	"""
+	#time complexity: O(1), and the time of an fsync for the "always" policy
+
+	def commit(self, lsn):
+		if self.sync == "always":
+			with self.file_lock:
+				if self.durable_lsn < lsn: self.write_pending(True) #else an fsync of another call covered it
+		elif len(self.pending) >= self.batch:
+			if self.sync == "batch": self.wakeup.set()
+			else:
+				with self.file_lock:
+					self.write_pending(False)
+
+	"""writes the pending records to the log file, must be called holding file_lock
+
+	@type sync: bool
+	@param sync: True to fsync the file after writing
+	"""
+	#time complexity: O(size of the pending records), and the time of an fsync
+
+	def write_pending(self, sync):
+		with self.lock:
+			records = self.pending
+			self.pending = []
+			lsn = self.lsn
+		if len(records) > 0:
+			self.file.write(b"".join(records))
+			self.counters["writes"] += 1
+		self.file.flush()
+		if sync and self.durable_lsn < lsn:
+			os.fsync(self.file.fileno())
+			self.counters["fsyncs"] += 1
+			self.durable_lsn = lsn
+
+	"""the loop of the background thread of the "batch" policy, fsyncing the log every interval
+	"""
+	#time complexity: runs until close
+
+	def flush_loop(self):
+		while not self.closed:
+			self.wakeup.wait(self.interval)
+			self.wakeup.clear()
+			with self.file_lock:
+				if not self.closed: self.write_pending(True)
+
+	"""writes and fsyncs the pending records now, whatever the fsync policy
+	"""
+	#time complexity: O(size of the pending records), and the time of an fsync
+
+	def flush(self):
+		with self.file_lock:
+			self.write_pending(True)
+
+	"""inserts a new item, see AVLTree.insert
+
+	@type key: int
+	@pre: key currently does not appear in the dictionary
+	@type val: None, str or bytes
+	@rtype: (AVLNode,int,int)
+	@returns: see AVLTree.insert
+	"""
+	# time complexity: O(log(n))
+
+	def insert(self, key, val):
+		payload = bytes((OP_INSERT,)) + encode_item(key, val) #encoding first, a bad value changes nothing
+		with self.lock:
+			self.remember(key)
+			result = self.tree.insert(key, val)
+			lsn = self.append(payload)
+		self.commit(lsn)
+		return result
+
+	"""inserts a new item, or overwrites the value if key already appears, see AVLTree.upsert
+
+	@type key: int
+	@type val: None, str or bytes
+	@rtype: (AVLNode,bool)
+	@returns: see AVLTree.upsert
+	"""
+	# time complexity: O(log(n))
+
+	def upsert(self, key, val):
+		payload = bytes((OP_UPSERT,)) + encode_item(key, val)
+		with self.lock:
+			self.remember(key)
+			result = self.tree.upsert(key, val)
+			lsn = self.append(payload)
+		self.commit(lsn)
+		return result
+
+	"""deletes the item with the given key, if it appears in the dictionary
+
+	@type key: int
+	@rtype: AVLNode
+	@returns: the deleted node, None if key was not found. Nothing is logged if it was not found
+	"""
+	# time complexity: O(log(n))
+
+	def delete_key(self, key):
+		payload = bytes((OP_DELETE,)) + encode_item(key, None) #encoding first, a bad key changes nothing
+		with self.lock:
+			self.remember(key)
+			node = self.tree.delete_key(key)
+			if node is None: return None
+			lsn = self.append(payload)
+		self.commit(lsn)
+		return node
+
+	"""joins self with item and another AVLTree, logging all the items of the other tree
+
+	@type tree2: AVLTree
+	@param tree2: a dictionary to be joined with self, it is used by self afterwards
+	@type key: int
+	@type val: None, str or bytes
+	@pre: all keys in self are smaller than key and all keys in tree2 are larger than key,
+	or the opposite way
+	"""
+	# time complexity: O(m + log(n)) for m items in tree2
+
+	def join(self, tree2, key, val):
+		keys, values = tree2.avl_to_arrays()
+		payload = b"".join([bytes((OP_JOIN,)), encode_item(key, val), COUNT.pack(len(keys))] +
+			[encode_item(itemKey, itemVal) for itemKey, itemVal in zip(keys, values)])
+		with self.lock:
+			if self.export is not None: #the keys of tree2 are new, their items at the checkpoint are none
+				for itemKey in keys:
+					self.remember(itemKey)
+				self.remember(key)
+			self.tree.join(tree2, key, val)
+			lsn = self.append(payload)
+		self.commit(lsn)
+
+	"""splits the dictionary at a key, keeping the keys smaller than key in self
+
+	@type key: int
+	@pre: key is in the dictionary
+	@rtype: AVLTree
+	@returns: a new AVLTree, not durable, of the keys larger than key. The item of key is in neither
+	"""
+	# time complexity: O(log(n))
+
+	def split(self, key):
+		payload = bytes((OP_SPLIT,)) + encode_item(key, None) #replayed by splitting at the same key
+		with self.lock:
+			export = self.export
+			while export is not None and not export["done"]: #split removes a range of keys at once
+				self.export_chunk(export)
+			left, right = self.tree.split(self.tree.search(key)[0])
+			self.tree = left
+			lsn = self.append(payload)
+		self.commit(lsn)
+		return right
+
+	"""searches for a key in the dictionary
+
+	@rtype: (AVLNode,int)
+	@returns: see AVLTree.search
+	"""
+	# time complexity: O(log(n))
+
+	def search(self, key):
+		with self.lock:
+			return self.tree.search(key)
+
+	"""returns the items in order of keys, read in one consistent pass
+
+	@rtype: list
+	@returns: see AVLTree.items
+	"""
+	# time complexity: O(log(n) + k) for k returned items
+
+	def items(self, lo = None, hi = None):
+		with self.lock:
+			return list(self.tree.items(lo, hi))
+
+	"""returns an array representing the dictionary
+
+	@rtype: list
+	@returns: see AVLTree.avl_to_array
+	"""
+	# time complexity: O(n)
+
+	def avl_to_array(self):
+		with self.lock:
+			return self.tree.avl_to_array()
+
+	"""returns the number of items in the dictionary
+
+	@rtype: int
+	"""
+	# time complexity: O(1)
+
+	def size(self):
+		return self.tree.size()
+
+	"""writes a checkpoint, so recovery does not replay the log written before it. The writers wait
+	while the log is rotated and while a chunk of the tree is exported, not for the whole export
+
+	@type background: bool
+	@param background: True to export and save the checkpoint in a new thread and return at once
+	@rtype: threading.Thread
+	@returns: the thread saving the checkpoint if background, None otherwise
+	"""
+	# time complexity: O(n), O(CHUNK) at a time while the writers wait
+
+	def checkpoint(self, background = False):
+		self.checkpoint_lock.acquire() #released once the checkpoint is saved
+		try:
+			with self.file_lock:
+				with self.lock:
+					self.write_pending(True) #the closed segment is whole and durable
+					self.file.close()
+					self.seq += 1
+					self.open_segment() #the changes from now on go to the next segment
+					export = {"cursor": None, "before": {}, "items": [], "done": False}
+					self.export = export
+					seq = self.seq
+		except BaseException:
+			self.export = None
+			self.checkpoint_lock.release()
+			raise
+		if not background:
+			self.save_checkpoint(seq, export)
+			return None
+		thread = threading.Thread(target = self.save_checkpoint, args = (seq, export))
+		thread.start()
+		return thread
+
+	"""remembers the item of a key as it was when the checkpoint started, before a change of the key
+	that the export has not reached yet - must be called holding lock
+
+	@type key: int
+	@param key: the key about to be changed
+	"""
+	# time complexity: O(1) while no checkpoint exports, O(log(n)) otherwise
+
+	def remember(self, key):
+		export = self.export
+		if export is None: return None
+		cursor = export["cursor"]
+		if (cursor is None or key > cursor) and key not in export["before"]:
+			node = self.tree.search(key)[0]
+			export["before"][key] = (node is not None, node.get_value() if node is not None else None)
+
+	"""exports the next chunk of the tree for the checkpoint, skipping the remembered keys - must be
+	called holding lock
+
+	@type export: dict
+	@param export: the state of the export
+	"""
+	# time complexity: O(log(n) + CHUNK)
+
+	def export_chunk(self, export):
+		if export["done"]: return None
+		cursor = export["cursor"]
+		before = export["before"]
+		items = export["items"]
+		chunk = list(islice(self.tree.items(cursor + 1 if cursor is not None else None), CHUNK))
+		for key, val in chunk:
+			if key not in before: items.append((key, val))
+		if len(chunk) > 0: export["cursor"] = chunk[-1][0]
+		if len(chunk) < CHUNK:
+			export["done"] = True
+			self.export = None
+
+	"""exports the tree as it was when the checkpoint started, releasing the lock between chunks
+
+	@type export: dict
+	@param export: the state of the export, a split may have finished it already
+	@rtype: list
+	@returns: the items of the checkpoint, sorted by key
+	"""
+	# time complexity: O(n + r log(r)) for r keys changed during the export
+
+	def export_checkpoint(self, export):
+		while not export["done"]:
+			with self.lock:
+				self.export_chunk(export)
+		remembered = sorted((key, val) for key, (present, val) in export["before"].items() if present)
+		return list(heapq.merge(export["items"], remembered, key = lambda item: item[0]))
+
+	"""exports the checkpoint, saves it as checkpoint seq, renaming it in place once it is durable,
+	and removes the files it replaces
+
+	@type seq: int
+	@param seq: the number of the checkpoint, it holds the changes of the segments before seq
+	@type export: dict
+	@param export: the state of the export
+	"""
+	# time complexity: O(n)
+
+	def save_checkpoint(self, seq, export):
+		try:
+			items = self.export_checkpoint(export)
+			path = self.path("checkpoint", seq)
+			temp = path + ".tmp"
+			save_items(len(items), lambda: iter(items), temp)
+			fd = os.open(temp, os.O_RDONLY)
+			try:
+				os.fsync(fd)
+			finally:
+				os.close(fd)
+			os.replace(temp, path)
+			sync_directory(self.directory)
+			self.remove_before(seq)
+			self.counters["checkpoints"] += 1
+		finally:
+			with self.lock:
+				self.export = None #the writers stop remembering if the export failed
+			self.checkpoint_lock.release()
+
+	"""returns the counters of the log
+
+	@rtype: dict
+	@returns: the numbers of records, bytes, writes, fsyncs and checkpoints since the tree was
+	opened, and the numbers of items and records recovered when it was opened
+	"""
+	# time complexity: O(1)
+
+	def get_stats(self):
+		stats = dict(self.counters)
+		stats["recovered_items"] = self.recovery["checkpoint"]
+		stats["recovered_records"] = self.recovery["records"]
+		return stats
+
+	"""writes and fsyncs the pending records, stops the background thread and closes the log
+	"""
+	# time complexity: O(size of the pending records)
+
+	def close(self):
+		if self.closed: return None
+		with self.checkpoint_lock: #waiting for a checkpoint in the background
+			self.closed = True
+			self.wakeup.set()
+			if self.flusher is not None: self.flusher.join()
+			with self.file_lock:
+				self.write_pending(True)
+				self.file.close()
+
+	"""entering a with block, the tree is closed at its end
+	"""
+
+	def __enter__(self):
+		return self
+
+	"""leaving a with block, closing the tree
+	"""
+
+	def __exit__(self, *exc):
+		self.close()
@@ -0,0 +1,313 @@
+"""Saving an AVL tree to a binary file, and loading it back or serving it straight from the file
+
+The file is made of columns, all in native byte order:
+	header:  b"AVLT", version (uint32), n (uint64)
+	keys:    n int64 keys, sorted
+	offsets: n + 1 int64 offsets of the values in the blob
+	kinds:   n bytes, the type of each value - 0 for None, 1 for str (UTF-8), 2 for bytes
+	blob:    the encoded values
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+
+from AVLTree import AVLTree
+
+MAGIC = b"AVLT"
+VERSION = 1
+HEADER = struct.Struct("=4sIQ")
+CHUNK = 1 << 16 #number of items written at once
+
+KIND_NONE = 0
+KIND_STR = 1
+KIND_BYTES = 2
+
+
+"""encodes a value for the blob
+
+@type val: None, str or bytes
+@param val: a value of the tree
+@rtype: (int, bytes)
+@returns: a tuple (k, b) of the kind of the value and its encoding
+"""
+# time complexity: O(len(val))
+
+def encode_value(val):
+	if val is None: return KIND_NONE, b""
+	if isinstance(val, str): return KIND_STR, val.encode("utf-8")
+	if isinstance(val, (bytes, bytearray)): return KIND_BYTES, bytes(val)
+	raise TypeError("only None, str and bytes values can be saved, got %s" % type(val).__name__)
+
+
+"""decodes a value from the blob
+
+@type kind: int
+@param kind: the kind of the value
+@type data: memoryview
+@param data: the encoding of the value
+@rtype: None, str or bytes
+"""
+# time complexity: O(len(data))
+
+def decode_value(kind, data):
+	if kind == KIND_STR: return str(data, "utf-8")
+	if kind == KIND_BYTES: return bytes(data)
+	return None
+
+
+"""saves a tree to a file, streaming its items in order - the keys and the value sizes are
+written in a first pass and the values in a second one, so only the offsets and kinds columns
+are kept in memory
+
+@type tree: AVLTree
+@param tree: the tree to save, its keys are integers that fit in 64 bits
+@type path: str
+@param path: the path of the file
+@raises ValueError: if the tree has a key function, its items are in the order of the key function
+and the file is searched by the keys themselves
+"""
+# time complexity: O(n)
+
+def save(tree, path):
+	if tree.key_func is not None:
+		raise ValueError("a tree with a key function cannot be saved, the keys column must be sorted")
+	save_items(tree.size(), tree.items, path)
+
+
+"""saves n items to a file in the format of save, streaming them twice
+
+@type n: int
+@param n: the number of items
+@type items: function
+@param items: a function with no arguments returning an iterator over the (key, value) items sorted
+by key, it is called once per pass
+@type path: str
+@param path: the path of the file
+@raises ValueError: if a key is not an integer that fits in 64 bits or the keys are not ascending,
+the file is removed
+"""
+# time complexity: O(n)
+
+def save_items(n, items, path):
+	try:
+		write_items(n, items, path)
+	except BaseException:
+		os.remove(path)
+		raise
+
+
+"""writes the file of save_items, checking the keys in the first pass
+
+@type n: int
+@type items: function
+@type path: str
+"""
+# time complexity: O(n)
+
+def write_items(n, items, path):
+	offsets = array("q", [0])
+	kinds = array("B")
+	with open(path, "wb") as f:
+		f.write(HEADER.pack(MAGIC, VERSION, n))
+		keys = array("q")
+		offset = 0
+		previous = None
+		for key, val in items(): #first pass - keys, offsets and kinds
+			if type(key) is not int or not -(1 << 63) <= key < (1 << 63):
+				raise ValueError("key %r is not an integer that fits in 64 bits" % (key,))
+			if previous is not None and key <= previous:
+				raise ValueError("the keys are not ascending, %r follows %r" % (key, previous))
+			previous = key
+			kind, data = encode_value(val)
+			keys.append(key)
+			offset += len(data)
+			offsets.append(offset)
+			kinds.append(kind)
+			if len(keys) == CHUNK:
+				keys.tofile(f)
+				del keys[:]
+		keys.tofile(f)
+		offsets.tofile(f)
+		kinds.tofile(f)
+		chunk = []
+		for key, val in items(): #second pass - values
+			chunk.append(encode_value(val)[1])
+			if len(chunk) == CHUNK:
+				f.write(b"".join(chunk))
+				chunk = []
+		f.write(b"".join(chunk))
+
+
+"""loads a tree saved by save, in linear time
+
+@type path: str
+@param path: the path of the file
+@rtype: AVLTree
+@returns: a new perfectly balanced tree holding the items of the file
+"""
+# time complexity: O(n)
+
+def load(path):
+	with MappedAVLTree(path) as mapped:
+		keys = mapped.keys.tolist() #one bulk copy of the column instead of one read per key
+		offsets = mapped.offsets.tolist()
+		kinds = mapped.kinds.tolist()
+		blob = mapped.blob
+		values = [decode_value(kinds[i], blob[offsets[i]:offsets[i + 1]]) for i in range(len(keys))]
+		return AVLTree.from_sorted(list(zip(keys, values)))
+
+
+"""
+A class representing a read-only tree served straight from a file saved by save. The file is
+memory-mapped and no AVLNode is made - a search is a binary search over the keys column, which
+visits the same keys as a search in the tree AVLTree.from_sorted would build from the file.
+Nodes are the indices of the keys in the file.
+"""
+
+class MappedAVLTree(object):
+
+	"""
+	Constructor for class MappedAVLTree, mapping the file
+
+	@type path: str
+	@param path: the path of a file saved by save
+	"""
+	#time complexity: O(1)
+
+	def __init__(self, path):
+		self.file = open(path, "rb")
+		self.map = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+		magic, version, n = HEADER.unpack_from(self.map, 0)
+		if magic != MAGIC or version != VERSION:
+			self.close()
+			raise ValueError("%s is not an AVL tree file of version %d" % (path, VERSION))
+		self.tree_size = n
+		self.view = memoryview(self.map)
+		start = HEADER.size
+		self.keys = self.view[start:start + 8 * n].cast("q")
+		start += 8 * n
+		self.offsets = self.view[start:start + 8 * (n + 1)].cast("q")
+		start += 8 * (n + 1)
+		self.kinds = self.view[start:start + n]
+		self.blob = self.view[start + n:]
+
+	"""releases the views and unmaps the file
+	"""
+	#time complexity: O(1)
+
+	def close(self):
+		for name in ("keys", "offsets", "kinds", "blob", "view"):
+			if hasattr(self, name): getattr(self, name).release()
+		self.map.close()
+		self.file.close()
+
+	"""entering a with block, the file is closed at its end
+	"""
+
+	def __enter__(self):
+		return self
+
+	"""leaving a with block, closing the file
+	"""
+
+	def __exit__(self, *exc):
+		self.close()
+
+	"""searches for a key, going down the implicit balanced tree over the keys column
+
+	@type key: int
+	@param key: a key to be searched
+	@rtype: (int,int)
+	@returns: a tuple (x,e) where x is the index of key in the file (or None if not found),
+	and e is the number of edges on the path between the starting node and ending node+1.
+	"""
+	# time complexity: O(log(n))
+
+	def search(self, key):
+		keys = self.keys
+		lo = 0
+		hi = self.tree_size - 1
+		edges = 1
+		while lo <= hi:
+			mid = (lo + hi) // 2 #the root of keys[lo..hi], as in AVLTree.build_subtree
+			currKey = keys[mid]
+			if currKey == key: return mid, edges
+			if currKey < key: lo = mid + 1
+			else: hi = mid - 1
+			edges += 1
+		if self.tree_size > 0: edges -= 1 #did not find key, remove 1 edge travelled to virtual node
+		return None, edges
+
+	"""returns the key at an index
+
+	@type node: int
+	@rtype: int
+	"""
+	#complexity: O(1)
+
+	def get_key(self, node):
+		return self.keys[node]
+
+	"""returns the value at an index
+
+	@type node: int
+	@rtype: None, str or bytes
+	"""
+	#complexity: O(length of the value)
+
+	def get_value(self, node):
+		return decode_value(self.kinds[node], self.blob[self.offsets[node]:self.offsets[node + 1]])
+
+	"""iterates over the items of the file in order of keys
+
+	@type lo: int
+	@param lo: the lowest key to return, None for no lower bound
+	@type hi: int
+	@param hi: the highest key to return, None for no upper bound
+	@rtype: generator of (key, value) tuples
+	@returns: the items with lo <= key <= hi, sorted by key
+	"""
+	# time complexity: O(log(n) + k) for k returned items
+
+	def items(self, lo = None, hi = None):
+		keys = self.keys
+		offsets = self.offsets
+		kinds = self.kinds
+		blob = self.blob
+		first = 0 if lo is None else bisect_left(keys, lo)
+		last = self.tree_size if hi is None else bisect_right(keys, hi)
+		for i in range(first, last):
+			yield keys[i], decode_value(kinds[i], blob[offsets[i]:offsets[i + 1]])
+
+	"""returns an array representing the dictionary
+
+	@rtype: list
+	@returns: a sorted list according to key of tuples (key, value) representing the dictionary
+	"""
+	# time complexity: O(n)
+
+	def avl_to_array(self):
+		return list(self.items())
+
+	"""returns the index of the maximal key
+
+	@rtype: int
+	@returns: the index of the maximal key, None if the file is empty
+	"""
+	#complexity: O(1)
+
+	def max_node(self):
+		return self.tree_size - 1 if self.tree_size > 0 else None
+
+	"""returns the number of items in the file
+
+	@rtype: int
+	@returns: the number of items
+	"""
+	#complexity: O(1)
+
+	def size(self):
+		return self.tree_size
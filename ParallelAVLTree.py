@@ -0,0 +1,397 @@
+"""Building and exporting large AVL trees with several worker processes
+
+The keys are cut into k key-range shards. Building, the main process deals the items into their
+shards with one bisect per item, then each worker sorts the items of its shard and
+sends them back as compact columns - an array.array of 64-bit integers when the column holds only
+such integers, a list otherwise - and the main process builds each shard with from_sorted and joins
+the shards with k - 1 calls of join. Exporting, each worker walks its shard of the tree and sends it
+back as columns, which the main process concatenates. A set operation of two trees merges the same
+key-range shard of both trees in each worker. No AVLNode is ever pickled.
+
+The workers are forked, so they share the items or the tree of the main process instead of receiving
+a pickled copy. Where fork is not available, or for one worker, the tree is built or exported in the
+main process as usual, and a set operation merges the two trees in the main process.
+"""
+
+import multiprocessing
+import random
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from AVLTree import AVLTree
+
+SAMPLES = 64 #number of sampled keys per shard, when choosing the boundaries of the shards
+
+"""the items, tree, key function and boundaries shared with the forked workers, set by share"""
+shared = {}
+
+
+"""sets the data shared with the workers - the initializer of each worker
+
+@type data: dict
+@param data: the items or the tree, and the key function and the boundaries of the shards
+"""
+# time complexity: O(1)
+
+def share(data):
+	shared.clear()
+	shared.update(data)
+
+
+"""packs a column to send it between processes
+
+@type column: list
+@rtype: (str, bytes or list)
+@returns: ("q", the bytes of an array.array) if the column holds only integers that fit in 64 bits,
+("list", column) otherwise
+"""
+# time complexity: O(len(column))
+
+def pack(column):
+	try:
+		return "q", array("q", column).tobytes()
+	except (TypeError, OverflowError): #not only integers, or too large ones
+		return "list", column
+
+
+"""unpacks a column packed by pack, appending it to another column
+
+@type column: list
+@param column: the column to append to
+@type packed: (str, bytes or list)
+@param packed: a column packed by pack
+"""
+# time complexity: O(length of packed)
+
+def unpack_into(column, packed):
+	kind, data = packed
+	if kind == "q":
+		part = array("q")
+		part.frombytes(data)
+		column.extend(part)
+	else:
+		column.extend(data)
+
+
+"""checks whether workers can be forked
+
+@rtype: bool
+"""
+# time complexity: O(1)
+
+def can_fork():
+	return "fork" in multiprocessing.get_all_start_methods()
+
+
+"""runs a function on each shard in forked worker processes
+
+@type data: dict
+@param data: the data shared with the workers, see share
+@type task: function
+@param task: a function of the index of a shard, returning its result
+@type shards: int
+@param shards: the number of shards
+@type workers: int
+@param workers: the number of worker processes, 1 or less to run the shards in the main process
+@rtype: list
+@returns: the results of the shards, in order
+"""
+# time complexity: the time of the slowest worker
+
+def run_shards(data, task, shards, workers):
+	if workers <= 1 or not can_fork(): #running the shards in the main process
+		share(data)
+		try:
+			return [task(i) for i in range(shards)]
+		finally:
+			shared.clear()
+	context = multiprocessing.get_context("fork")
+	with ProcessPoolExecutor(workers, mp_context = context, initializer = share, initargs = (data,)) as pool:
+		return list(pool.map(task, range(shards)))
+
+
+"""deals items into key-range shards, each item decorated with the key it is sorted by, so the key
+function runs once per item
+
+@type items: list
+@param items: (key, value) tuples
+@type keyFunc: function
+@param keyFunc: the key function of the tree, None to sort by the keys themselves
+@type boundaries: list
+@param boundaries: the sorted boundaries, shard i holds the items with boundaries[i-1] <= key < boundaries[i]
+@rtype: list
+@returns: the len(boundaries) + 1 shards, lists of (sort key, key, value) tuples
+"""
+# time complexity: O(n log(k)) for k shards
+
+def deal_shards(items, keyFunc, boundaries):
+	shards = [[] for i in range(len(boundaries) + 1)]
+	if keyFunc is None:
+		for key, val in items:
+			shards[bisect_right(boundaries, key)].append((key, key, val))
+	else:
+		for key, val in items:
+			sortKey = keyFunc(key)
+			shards[bisect_right(boundaries, sortKey)].append((sortKey, key, val))
+	return shards
+
+
+"""sorts the items of one key-range shard - run by a worker
+
+@type i: int
+@param i: the index of the shard in the shards dealt by deal_shards
+@rtype: ((str, bytes or list), (str, bytes or list))
+@returns: the packed columns of the keys and the values of the shard, sorted by key
+"""
+# time complexity: O(m log(m)) for m items in the shard
+
+def sort_shard(i):
+	shard = shared["shards"][i]
+	shard.sort(key = lambda item: item[0])
+	return pack([item[1] for item in shard]), pack([item[2] for item in shard])
+
+
+"""builds a tree from items in any order, sorting key-range shards of the items in parallel
+
+@type items: iterable
+@param items: (key, value) tuples
+@type workers: int
+@param workers: the number of worker processes, None for the number of CPUs
+@type keyFunc: function
+@param keyFunc: the key function of the new tree, see AVLTree
+@type monoid: Monoid
+@param monoid: the monoid of the new tree, see AVLTree
+@pre: the keys are distinct
+@rtype: AVLTree
+@returns: a new tree holding all the items, the same as AVLTree.from_items would build up to the
+balance of the k - 1 joins
+"""
+# time complexity: O((n/k) log(n/k)) for each of the k workers, O(n log(k)) for the main process
+
+def from_items(items, workers = None, keyFunc = None, monoid = None):
+	if not isinstance(items, list): items = list(items)
+	if workers is None: workers = multiprocessing.cpu_count()
+	if workers <= 1 or len(items) < workers * SAMPLES or not can_fork():
+		return AVLTree.from_items(items, keyFunc, monoid)
+	#the boundaries of the shards are quantiles of a sample of the keys
+	sample = random.Random(0).sample(items, workers * SAMPLES)
+	sample = sorted(item[0] if keyFunc is None else keyFunc(item[0]) for item in sample)
+	boundaries = [sample[i * SAMPLES] for i in range(1, workers)]
+	data = {"shards": deal_shards(items, keyFunc, boundaries)} #the forked workers share the shards
+	return join_shards(run_shards(data, sort_shard, workers, workers), keyFunc, monoid)
+
+
+"""builds a tree from the sorted columns of consecutive key-range shards
+
+@type shards: list
+@param shards: the packed columns of the keys and the values of each shard, in order of keys
+@type keyFunc: function
+@param keyFunc: the key function of the new tree, see AVLTree
+@type monoid: Monoid
+@param monoid: the monoid of the new tree, see AVLTree
+@rtype: AVLTree
+@returns: a new tree holding the items of all the shards
+"""
+# time complexity: O(n + k log(n)) for k shards
+
+def join_shards(shards, keyFunc, monoid):
+	tree = None
+	for packedKeys, packedValues in shards:
+		keys = []
+		values = []
+		unpack_into(keys, packedKeys)
+		unpack_into(values, packedValues)
+		if len(keys) == 0: continue
+		if tree is None: #the first shard
+			tree = AVLTree.from_sorted(list(zip(keys, values)), keyFunc, monoid)
+		else: #the first item of the shard separates it from the tree
+			shard = AVLTree.from_sorted(list(zip(keys[1:], values[1:])), keyFunc, monoid)
+			tree.join(shard, keys[0], values[0])
+	return tree if tree is not None else AVLTree(keyFunc = keyFunc, monoid = monoid)
+
+
+"""walks one shard of the tree in order - run by a worker
+
+@type i: int
+@param i: the index of the shard, it holds the items of ranks starts[i] to starts[i+1] - 1
+@rtype: ((str, bytes or list), (str, bytes or list))
+@returns: the packed columns of the keys and the values of the shard
+"""
+# time complexity: O(log(n) + m) for m items in the shard
+
+def export_shard(i):
+	tree = shared["tree"]
+	starts = shared["boundaries"]
+	first = tree.select(starts[i]).get_key()
+	items = list(islice(tree.items(first), starts[i + 1] - starts[i]))
+	return pack([key for key, val in items]), pack([val for key, val in items])
+
+
+"""writes the keys and the values of a tree in order into two columns, walking key-range shards
+of the tree in parallel
+
+@type tree: AVLTree
+@param tree: the tree to export, it is not changed
+@type workers: int
+@param workers: the number of worker processes, None for the number of CPUs
+@rtype: (list, list)
+@returns: a tuple (k, v) of the keys sorted and their values, see AVLTree.avl_to_arrays
+"""
+# time complexity: O(log(n) + n/k) for each of the k workers, O(n) for the main process
+
+def avl_to_arrays(tree, workers = None):
+	if workers is None: workers = multiprocessing.cpu_count()
+	n = tree.size()
+	if workers <= 1 or n < workers * SAMPLES or not can_fork(): return tree.avl_to_arrays()
+	starts = [i * n // workers for i in range(workers + 1)] #the shards have the same number of items
+	keys = []
+	values = []
+	for packedKeys, packedValues in run_shards({"tree": tree, "boundaries": starts}, export_shard, workers, workers):
+		unpack_into(keys, packedKeys)
+		unpack_into(values, packedValues)
+	return keys, values
+
+
+"""returns an array representing a tree, walking key-range shards of the tree in parallel
+
+@type tree: AVLTree
+@param tree: the tree to export, it is not changed
+@type workers: int
+@param workers: the number of worker processes, None for the number of CPUs
+@rtype: list
+@returns: a sorted list according to key of tuples (key, value), see AVLTree.avl_to_array
+"""
+# time complexity: O(n)
+
+def avl_to_array(tree, workers = None):
+	keys, values = avl_to_arrays(tree, workers)
+	return list(zip(keys, values))
+
+
+"""returns the nodes of one key-range shard of a tree, in order
+
+@type tree: AVLTree
+@type lo: any
+@param lo: the first key of the shard, None for the first key of the tree
+@type hi: any
+@param hi: the sort key the shard ends before, None for the end of the tree
+@rtype: list
+@returns: the AVLNodes with lo <= key < hi
+"""
+# time complexity: O(log(n) + m) for m nodes in the shard
+
+def shard_nodes(tree, lo, hi):
+	shard = []
+	for node in tree.nodes(lo):
+		if hi is not None and not node.key < hi: break
+		shard.append(node)
+	return shard
+
+
+"""merges one key-range shard of two trees by a set operation - run by a worker
+
+@type i: int
+@param i: the index of the shard, it holds the keys with boundaries[i-1] <= key < boundaries[i]
+@rtype: ((str, bytes or list), (str, bytes or list))
+@returns: the packed columns of the keys and the values of the result in the shard
+"""
+# time complexity: O(log(n) + m1 + m2) for m1 and m2 keys of the trees in the shard
+
+def merge_shard(i):
+	boundaries = shared["boundaries"]
+	operation = shared["operation"]
+	lo = boundaries[i - 1][0] if i > 0 else None
+	hi = boundaries[i][1] if i < len(boundaries) else None
+	nodes1 = shard_nodes(shared["tree1"], lo, hi)
+	nodes2 = shard_nodes(shared["tree2"], lo, hi)
+	merged = []
+	i1 = i2 = 0
+	while i1 < len(nodes1) and i2 < len(nodes2):
+		key1 = nodes1[i1].key
+		key2 = nodes2[i2].key
+		if key1 < key2: #only in tree1
+			if operation != "intersection": merged.append(nodes1[i1])
+			i1 += 1
+		elif key2 < key1: #only in tree2
+			if operation == "union": merged.append(nodes2[i2])
+			i2 += 1
+		else: #in both, union keeps the value of tree2 and intersection the value of tree1
+			if operation == "union": merged.append(nodes2[i2])
+			elif operation == "intersection": merged.append(nodes1[i1])
+			i1 += 1
+			i2 += 1
+	if operation != "intersection": merged.extend(nodes1[i1:])
+	if operation == "union": merged.extend(nodes2[i2:])
+	return pack([node.get_key() for node in merged]), pack([node.get_value() for node in merged])
+
+
+"""returns the result of a set operation on two trees as a new tree, merging key-range shards of
+the trees in parallel
+
+@type operation: str
+@param operation: "union", "intersection" or "difference"
+@type tree1: AVLTree
+@type tree2: AVLTree
+@param tree2: a tree with the same key function as tree1, neither tree is changed
+@type workers: int
+@param workers: the number of worker processes, None for the number of CPUs
+@rtype: AVLTree
+@returns: a new tree with the key function and the monoid of tree1, holding the same items as
+AVLTree.union, intersection or difference would leave in tree1
+"""
+# time complexity: O(log(n) + (n + m)/k) for each of the k workers, O(n + m + k log(n)) for the main process
+
+def set_operation(operation, tree1, tree2, workers = None):
+	if workers is None: workers = multiprocessing.cpu_count()
+	larger = tree1 if tree1.size() >= tree2.size() else tree2
+	n = larger.size()
+	if n < workers * SAMPLES: workers = 1
+	#the shards hold the same number of keys of the larger tree, each boundary is a (key, sort key) tuple
+	boundaries = [larger.select(i * n // workers) for i in range(1, workers)]
+	boundaries = [(node.get_key(), node.key) for node in boundaries]
+	data = {"tree1": tree1, "tree2": tree2, "operation": operation, "boundaries": boundaries}
+	return join_shards(run_shards(data, merge_shard, workers, workers), tree1.key_func, tree1.monoid)
+
+
+"""returns the union of two trees as a new tree, see set_operation
+
+@type tree1: AVLTree
+@type tree2: AVLTree
+@type workers: int
+@rtype: AVLTree
+@returns: a new tree with the keys of both trees, with the values of tree2 for the keys in both
+"""
+# time complexity: O(n + m)
+
+def union(tree1, tree2, workers = None):
+	return set_operation("union", tree1, tree2, workers)
+
+
+"""returns the intersection of two trees as a new tree, see set_operation
+
+@type tree1: AVLTree
+@type tree2: AVLTree
+@type workers: int
+@rtype: AVLTree
+@returns: a new tree with the keys in both trees, with the values of tree1
+"""
+# time complexity: O(n + m)
+
+def intersection(tree1, tree2, workers = None):
+	return set_operation("intersection", tree1, tree2, workers)
+
+
+"""returns the difference of two trees as a new tree, see set_operation
+
+@type tree1: AVLTree
+@type tree2: AVLTree
+@type workers: int
+@rtype: AVLTree
+@returns: a new tree with the keys of tree1 not in tree2
+"""
+# time complexity: O(n + m)
+
+def difference(tree1, tree2, workers = None):
+	return set_operation("difference", tree1, tree2, workers)
@@ -0,0 +1,335 @@
+"""A persistent AVL tree - every update returns a new version and leaves the old one readable"""
+
+from AVLTree import AVLNode, VIRTUAL_NODE
+
+
+"""
+A class representing one version of a persistent AVL tree. The nodes of a version are never
+changed after they are created, so versions share every subtree an update did not touch and an
+update copies only the O(log(n)) nodes on its path. The nodes are AVLNodes without parent
+pointers (a shared subtree has many parents), their leaves point to the shared virtual node.
+"""
+
+class PersistentAVLTree(object):
+
+	"""
+	Constructor for class PersistentAVLTree
+
+	@type selfRoot: AVLNode
+	@param selfRoot: the root of the version, None for an empty tree
+	"""
+	#time complexity: O(1)
+
+	def __init__(self, selfRoot = None):
+		self.root = selfRoot if selfRoot is not None else VIRTUAL_NODE
+
+	"""builds a perfectly balanced version from items sorted by key
+
+	@type items: iterable
+	@param items: (key, value) tuples
+	@pre: the keys are distinct and sorted in increasing order
+	@rtype: PersistentAVLTree
+	@returns: a new version holding all the items
+	"""
+	# time complexity: O(n)
+
+	@classmethod
+	def from_sorted(cls, items):
+		if not isinstance(items, list): items = list(items)
+		tree = cls()
+		tree.root = tree.build_subtree(items, 0, len(items) - 1)
+		return tree
+
+	"""builds a perfectly balanced subtree from items[lo..hi] - recursive function
+
+	@rtype: AVLNode
+	@returns: the root of the subtree, the virtual node if lo > hi
+	"""
+	# time complexity: O(hi - lo)
+
+	def build_subtree(self, items, lo, hi):
+		if lo > hi: return VIRTUAL_NODE
+		mid = (lo + hi) // 2
+		key, val = items[mid]
+		return self.make_node(key, val, self.build_subtree(items, lo, mid - 1), self.build_subtree(items, mid + 1, hi))
+
+	"""creates a new node with the given children, its height and size are calculated from them
+
+	@type left: AVLNode
+	@param left: the left child, may be virtual
+	@type right: AVLNode
+	@param right: the right child, may be virtual
+	@rtype: AVLNode
+	@returns: the new node
+	"""
+	# time complexity: O(1)
+
+	def make_node(self, key, val, left, right):
+		node = AVLNode(key, val)
+		node.left = left
+		node.right = right
+		node.height = max(left.height, right.height) + 1
+		node.size = left.size + right.size + 1
+		return node
+
+	"""creates a node with the given children, rotating if their heights differ by 2 - the
+	non-destructive counterpart of AVLTree.rotate
+
+	@type left: AVLNode
+	@param left: the left child, may be virtual
+	@type right: AVLNode
+	@param right: the right child, may be virtual
+	@pre: the heights of left and right differ by at most 2
+	@rtype: AVLNode
+	@returns: the root of the new balanced subtree
+	"""
+	# time complexity: O(1)
+
+	def balance(self, key, val, left, right):
+		bf = left.height - right.height
+		if bf == 2: #left subtree is longer
+			if left.left.height >= left.right.height: #right rotation
+				return self.make_node(left.key, left.value, left.left, self.make_node(key, val, left.right, right))
+			#left rotation (on left child) then right rotation
+			pivot = left.right
+			return self.make_node(pivot.key, pivot.value,
+				self.make_node(left.key, left.value, left.left, pivot.left),
+				self.make_node(key, val, pivot.right, right))
+		if bf == -2: #right subtree is longer
+			if right.right.height >= right.left.height: #left rotation
+				return self.make_node(right.key, right.value, self.make_node(key, val, left, right.left), right.right)
+			#right rotation (on right child) then left rotation
+			pivot = right.left
+			return self.make_node(pivot.key, pivot.value,
+				self.make_node(key, val, left, pivot.left),
+				self.make_node(right.key, right.value, pivot.right, right.right))
+		return self.make_node(key, val, left, right)
+
+	"""searches for a node in the version corresponding to the key
+
+	@type key: int
+	@param key: a key to be searched
+	@rtype: (AVLNode,int)
+	@returns: a tuple (x,e) where x is the node corresponding to key (or None if not found),
+	and e is the number of edges on the path between the starting node and ending node+1.
+	"""
+	# time complexity: O(log(n))
+
+	def search(self, key):
+		node = self.root
+		edges = 1
+		while node.is_real_node():
+			currKey = node.key
+			if currKey == key: return node, edges
+			node = node.right if currKey < key else node.left
+			edges += 1
+		if edges > 1: edges -= 1 #did not find key, remove 1 edge travelled to virtual node
+		return None, edges
+
+	"""returns a new version with the item inserted, or with the value replaced if key appears
+
+	@type key: int
+	@param key: key of the item
+	@type val: string
+	@param val: the value of the item
+	@rtype: PersistentAVLTree
+	@returns: the new version
+	"""
+	# time complexity: O(log(n))
+
+	def insert(self, key, val):
+		return PersistentAVLTree(self.insert_rec(self.root, key, val))
+
+	"""inserts into a subtree by copying the path to key - recursive function
+
+	@rtype: AVLNode
+	@returns: the root of the new subtree
+	"""
+	# time complexity: O(log(n))
+
+	def insert_rec(self, node, key, val):
+		if not node.is_real_node(): return self.make_node(key, val, VIRTUAL_NODE, VIRTUAL_NODE)
+		if key < node.key:
+			return self.balance(node.key, node.value, self.insert_rec(node.left, key, val), node.right)
+		if node.key < key:
+			return self.balance(node.key, node.value, node.left, self.insert_rec(node.right, key, val))
+		return self.make_node(key, val, node.left, node.right) #key appears, replacing the value
+
+	"""returns a new version without key
+
+	@type key: int
+	@param key: the key to be deleted
+	@rtype: PersistentAVLTree
+	@returns: the new version, self if key does not appear in it
+	"""
+	# time complexity: O(log(n))
+
+	def delete(self, key):
+		if self.search(key)[0] is None: return self
+		return PersistentAVLTree(self.delete_rec(self.root, key))
+
+	"""deletes from a subtree by copying the path to key - recursive function
+
+	@pre: key appears in the subtree of node
+	@rtype: AVLNode
+	@returns: the root of the new subtree
+	"""
+	# time complexity: O(log(n))
+
+	def delete_rec(self, node, key):
+		if key < node.key:
+			return self.balance(node.key, node.value, self.delete_rec(node.left, key), node.right)
+		if node.key < key:
+			return self.balance(node.key, node.value, node.left, self.delete_rec(node.right, key))
+		#node has the key
+		if not node.left.is_real_node(): return node.right
+		if not node.right.is_real_node(): return node.left
+		successor = node.right #the successor replaces node
+		while successor.left.is_real_node():
+			successor = successor.left
+		return self.balance(successor.key, successor.value, node.left, self.delete_rec(node.right, successor.key))
+
+	"""returns a new version joining self with item and another version
+
+	@type tree2: PersistentAVLTree
+	@param tree2: a version to be joined with self
+	@type key: int
+	@param key: the key separting self and tree2
+	@type val: string
+	@param val: the value corresponding to key
+	@pre: all keys in self are smaller than key and all keys in tree2 are larger than key,
+	or the opposite way
+	@rtype: PersistentAVLTree
+	@returns: the new version, self and tree2 are unchanged
+	"""
+	# time complexity: O(|h1-h2|)
+
+	def join(self, tree2, key, val):
+		root1, root2 = self.root, tree2.root
+		if root1.is_real_node(): selfSmaller = root1.key < key
+		else: selfSmaller = not root2.is_real_node() or key < root2.key
+		if selfSmaller: return PersistentAVLTree(self.join_subtrees(root1, key, val, root2))
+		return PersistentAVLTree(self.join_subtrees(root2, key, val, root1))
+
+	"""joins two subtrees with a new node between them by copying the spine of the taller one
+	down to the height of the shorter one - recursive function
+
+	@type left: AVLNode
+	@param left: root of the subtree with the smaller keys, may be virtual
+	@type right: AVLNode
+	@param right: root of the subtree with the larger keys, may be virtual
+	@rtype: AVLNode
+	@returns: the root of the joined subtree
+	"""
+	# time complexity: O(|h1-h2|)
+
+	def join_subtrees(self, left, key, val, right):
+		if left.height > right.height + 1: #going down the right spine of left
+			return self.balance(left.key, left.value, left.left, self.join_subtrees(left.right, key, val, right))
+		if right.height > left.height + 1: #going down the left spine of right
+			return self.balance(right.key, right.value, self.join_subtrees(left, key, val, right.left), right.right)
+		return self.make_node(key, val, left, right)
+
+	"""splits the version at a key
+
+	@type key: int
+	@param key: the key to split at, does not have to appear in the version
+	@rtype: (PersistentAVLTree, PersistentAVLTree)
+	@returns: a tuple (left, right) of new versions with the keys smaller than key and the keys
+	larger than key, self is unchanged
+	"""
+	# time complexity: O(log(n))
+
+	def split(self, key):
+		left, right = self.split_rec(self.root, key)
+		return PersistentAVLTree(left), PersistentAVLTree(right)
+
+	"""splits a subtree at a key - recursive function
+
+	@rtype: (AVLNode, AVLNode)
+	@returns: the roots of the subtrees with the keys smaller and larger than key
+	"""
+	# time complexity: O(log(n))
+
+	def split_rec(self, node, key):
+		if not node.is_real_node(): return VIRTUAL_NODE, VIRTUAL_NODE
+		if key < node.key:
+			left, right = self.split_rec(node.left, key)
+			return left, self.join_subtrees(right, node.key, node.value, node.right)
+		if node.key < key:
+			left, right = self.split_rec(node.right, key)
+			return self.join_subtrees(node.left, node.key, node.value, left), right
+		return node.left, node.right
+
+	"""iterates over the items of the version in order of keys, using an explicit stack
+
+	@type lo: int
+	@param lo: the lowest key to return, None for no lower bound
+	@type hi: int
+	@param hi: the highest key to return, None for no upper bound
+	@rtype: generator of (key, value) tuples
+	@returns: the items with lo <= key <= hi, sorted by key
+	"""
+	# time complexity: O(log(n) + k) for k returned items
+
+	def items(self, lo = None, hi = None):
+		stack = []
+		node = self.root
+		while node.is_real_node():
+			if lo is not None and node.key < lo:
+				node = node.right
+			else:
+				stack.append(node)
+				node = node.left
+		while stack:
+			node = stack.pop()
+			if hi is not None and node.key > hi: return
+			yield node.key, node.value
+			node = node.right
+			while node.is_real_node():
+				stack.append(node)
+				node = node.left
+
+	"""returns an array representing the version
+
+	@rtype: list
+	@returns: a sorted list according to key of tuples (key, value) representing the version
+	"""
+	# time complexity: O(n)
+
+	def avl_to_array(self):
+		return list(self.items())
+
+	"""returns the node with the maximal key in the version
+
+	@rtype: AVLNode
+	@returns: the maximal node, None if the version is empty
+	"""
+	# time complexity: O(log(n))
+
+	def max_node(self):
+		node = self.root
+		if not node.is_real_node(): return None
+		while node.right.is_real_node():
+			node = node.right
+		return node
+
+	"""returns the number of items in the version
+
+	@rtype: int
+	@returns: the number of items in the version
+	"""
+	#complexity: O(1)
+
+	def size(self):
+		return self.root.size
+
+	"""returns the root of the version
+
+	@rtype: AVLNode
+	@returns: the root, None if the version is empty
+	"""
+	#complexity: O(1)
+
+	def get_root(self):
+		return self.root if self.root.is_real_node() else None
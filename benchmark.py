@@ -0,0 +1,1023 @@
+"""Benchmarks for the AVL tree
+
+run with: python benchmark.py [--sizes 1e3,1e4,1e5] [--json results.json] [--compare old.json]
+see python benchmark.py --help for all the options
+"""
+
+import argparse
+import asyncio
+import json
+from array import array
+from bisect import bisect_right
+import os
+import platform
+import random
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from ArrayAVLTree import ArrayAVLTree
+from AsyncAVLTree import AsyncAVLTree
+from AVLMonoid import SUM
+from AVLTree import AVLTree
+from ConcurrentAVLTree import ConcurrentAVLTree
+from DurableAVLTree import DurableAVLTree, POLICIES as DURABLE_POLICIES
+from MappedAVLTree import MappedAVLTree, load, save
+from PersistentAVLTree import PersistentAVLTree
+import ParallelAVLTree
+
+DISTRIBUTIONS = ("sorted", "reverse", "random", "clustered")
+OPERATIONS = ("insert", "finger_insert", "search", "finger_search", "delete", "join", "split", "avl_to_array")
+CLUSTER = 64 #number of consecutive keys in a cluster of the clustered distribution
+EXPORT_ITEMS = 10 ** 6 #avl_to_array is repeated until about this many items are exported
+
+
+"""returns the positions of the keys an operation is applied to, in the order of a distribution
+
+@type n: int
+@param n: number of keys in the tree
+@type m: int
+@param m: number of positions, at most n
+@type distribution: str
+@param distribution: one of DISTRIBUTIONS
+@type rand: random.Random
+@rtype: list
+@returns: distinct positions in range(n) - evenly spaced and increasing for sorted, decreasing
+for reverse, uniform for random, and runs of CLUSTER consecutive increasing positions starting
+at random places for clustered
+"""
+
+def workload(n, m, distribution, rand):
+	if distribution == "random": return rand.sample(range(n), m)
+	if distribution == "clustered":
+		blocks = rand.sample(range((n + CLUSTER - 1) // CLUSTER), (m + CLUSTER - 1) // CLUSTER)
+		return [pos for block in blocks for pos in range(block * CLUSTER, min(block * CLUSTER + CLUSTER, n))][:m]
+	positions = [i * n // m for i in range(m)]
+	if distribution == "reverse": positions.reverse()
+	return positions
+
+
+"""applies an operation to a new tree holding the even keys 0, 2, ..., 2n-2, timing each call
+
+insert and finger_insert insert the odd key after each position, search, finger_search and
+delete use the key at each position, split splits at it and joins the parts back untimed, join
+splits untimed and times joining the parts back, avl_to_array exports the whole tree
+
+@type op: str
+@param op: one of OPERATIONS
+@type n: int
+@param n: number of keys in the tree
+@type positions: list
+@param positions: positions returned by workload, ignored by avl_to_array
+@rtype: list
+@returns: the nanoseconds taken by each call
+"""
+
+def run_operation(op, n, positions):
+	tree = AVLTree.from_sorted([(2 * key, None) for key in range(n)])
+	clock = time.perf_counter_ns
+	latencies = []
+	if op == "avl_to_array":
+		for i in range(max(1, min(EXPORT_ITEMS // n, 100))):
+			start = clock()
+			tree.avl_to_array()
+			latencies.append(clock() - start)
+	elif op in ("insert", "finger_insert"):
+		method = getattr(tree, op)
+		for pos in positions:
+			key = 2 * pos + 1
+			start = clock()
+			method(key, None)
+			latencies.append(clock() - start)
+	elif op in ("search", "finger_search"):
+		method = getattr(tree, op)
+		for pos in positions:
+			key = 2 * pos
+			start = clock()
+			method(key)
+			latencies.append(clock() - start)
+	elif op == "delete":
+		for pos in positions:
+			node = tree.search(2 * pos)[0]
+			start = clock()
+			tree.delete(node)
+			latencies.append(clock() - start)
+	else: #split and join
+		for pos in positions:
+			node = tree.search(2 * pos)[0]
+			start = clock()
+			left, right = tree.split(node)
+			if op == "split": latencies.append(clock() - start)
+			start = clock()
+			left.join(right, 2 * pos, None)
+			if op == "join": latencies.append(clock() - start)
+			tree = left
+	return latencies
+
+
+"""measures an operation on one size and distribution
+
+@type op: str
+@param op: one of OPERATIONS
+@type n: int
+@param n: number of keys in the tree
+@type distribution: str
+@param distribution: one of DISTRIBUTIONS, None for avl_to_array
+@type count: int
+@param count: number of calls measured, at most n
+@type seed: int
+@param seed: seed of the random distributions
+@type memory: bool
+@param memory: whether to run the operation a second time under tracemalloc, measuring peak memory
+@rtype: dict
+@returns: the result - calls per second, median and 99th percentile latency in nanoseconds, and the
+peak number of bytes allocated while building the tree and running the calls (None if not measured)
+"""
+
+def bench_operation(op, n, distribution, count = 10000, seed = 0, memory = True):
+	positions = None
+	if distribution is not None: positions = workload(n, min(count, n), distribution, random.Random(seed))
+	latencies = sorted(run_operation(op, n, positions))
+	peak = None
+	if memory:
+		tracemalloc.start()
+		run_operation(op, n, positions)
+		peak = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+	calls = len(latencies)
+	return {
+		"op": op,
+		"n": n,
+		"distribution": distribution,
+		"ops": calls,
+		"ops_per_sec": round(calls * 10 ** 9 / max(sum(latencies), 1), 1),
+		"p50_ns": latencies[calls // 2],
+		"p99_ns": latencies[min(calls - 1, calls * 99 // 100)],
+		"peak_bytes": peak,
+	}
+
+
+"""runs every operation on every size and distribution, printing each result as it is measured
+
+@type sizes: list
+@type distributions: list
+@type operations: list
+@rtype: list
+@returns: the results of bench_operation, avl_to_array is measured once per size
+"""
+
+def run_suite(sizes, distributions, operations, count = 10000, seed = 0, memory = True):
+	results = []
+	for n in sizes:
+		for op in operations:
+			for distribution in (distributions if op != "avl_to_array" else (None,)):
+				result = bench_operation(op, n, distribution, count, seed, memory)
+				print(format_result(result), flush = True)
+				results.append(result)
+	return results
+
+
+"""formats a result as one line of the report
+
+@type result: dict
+@param result: a result of bench_operation
+@rtype: str
+"""
+
+def format_result(result):
+	peak = "-" if result["peak_bytes"] is None else "%.1f MB" % (result["peak_bytes"] / 2 ** 20)
+	return "%-13s n=%-9d %-9s %12.0f ops/s  p50 %9d ns  p99 %9d ns  peak %s" % (result["op"], result["n"],
+		result["distribution"] or "-", result["ops_per_sec"], result["p50_ns"], result["p99_ns"], peak)
+
+
+"""prints the results next to earlier results of the same operation, size and distribution
+
+@type results: list
+@param results: results of run_suite
+@type base: list
+@param base: the earlier results, read from a JSON file written by this script
+"""
+
+def compare_results(results, base):
+	earlier = {(r["op"], r["n"], r["distribution"]): r for r in base}
+	for result in results:
+		old = earlier.get((result["op"], result["n"], result["distribution"]))
+		if old is None: continue
+		print("%-13s n=%-9d %-9s ops/s x%.2f  p50 x%.2f  p99 x%.2f" % (result["op"], result["n"],
+			result["distribution"] or "-", result["ops_per_sec"] / old["ops_per_sec"],
+			result["p50_ns"] / max(old["p50_ns"], 1), result["p99_ns"] / max(old["p99_ns"], 1)))
+
+
+"""measures the memory held by a tree built by repeated insertions
+
+@type n: int
+@param n: number of keys inserted to the tree
+@rtype: float
+@returns: the number of bytes allocated per key
+"""
+
+def bench_memory(n):
+	keys = list(range(n))
+	random.Random(0).shuffle(keys)
+	tracemalloc.start()
+	start = tracemalloc.get_traced_memory()[0]
+	tree = AVLTree()
+	for key in keys:
+		tree.insert(key, None)
+	used = tracemalloc.get_traced_memory()[0] - start
+	tracemalloc.stop()
+	return used / n
+
+
+"""compares building a tree from sorted items with inserting them one by one
+
+@type n: int
+@param n: number of keys
+@rtype: (float, float)
+@returns: a tuple (b, i) of the seconds taken by from_sorted and by repeated insert
+"""
+
+def bench_build(n):
+	items = [(key, None) for key in range(n)]
+	start = time.perf_counter()
+	AVLTree.from_sorted(items)
+	build = time.perf_counter() - start
+	start = time.perf_counter()
+	tree = AVLTree()
+	for key, val in items:
+		tree.insert(key, val)
+	insert = time.perf_counter() - start
+	return build, insert
+
+
+"""compares reading a window of keys with items(lo, hi) and with avl_to_array
+
+@type n: int
+@param n: number of keys in the tree
+@type window: int
+@param window: number of keys in the window
+@rtype: (float, float)
+@returns: a tuple (r, a) of the seconds taken by items(lo, hi) and by avl_to_array
+"""
+
+def bench_window(n, window = 100):
+	tree = AVLTree.from_sorted((key, None) for key in range(n))
+	lo = n // 2
+	start = time.perf_counter()
+	list(tree.items(lo, lo + window - 1))
+	scan = time.perf_counter() - start
+	start = time.perf_counter()
+	[item for item in tree.avl_to_array() if lo <= item[0] < lo + window]
+	array = time.perf_counter() - start
+	return scan, array
+
+
+"""measures splitting a tree at random keys and joining the two parts back
+
+@type n: int
+@param n: number of keys in the tree
+@type repeat: int
+@param repeat: number of split and join pairs
+@rtype: (float, float)
+@returns: a tuple (s, j) of the splits per second and the joins per second
+"""
+
+def bench_split_join(n, repeat = 1000):
+	tree = AVLTree.from_sorted((key, None) for key in range(n))
+	rand = random.Random(0)
+	splitTime = joinTime = 0.0
+	for i in range(repeat):
+		node = tree.select(rand.randrange(n))
+		key, val = node.get_key(), node.get_value()
+		start = time.perf_counter()
+		left, right = tree.split(node)
+		splitTime += time.perf_counter() - start
+		start = time.perf_counter()
+		left.join(right, key, val)
+		joinTime += time.perf_counter() - start
+		tree = left
+	return repeat / splitTime, repeat / joinTime
+
+
+"""compares the edges travelled by search and finger_search, and by insert and finger_insert,
+on a workload where each key is close to the last accessed key
+
+@type n: int
+@param n: number of keys in the tree
+@type ops: int
+@param ops: number of operations of each kind
+@type step: int
+@param step: the largest distance between consecutive keys of the workload
+@rtype: dict
+@returns: average edges per operation for each method
+"""
+
+def bench_finger(n, ops = 10000, step = 20):
+	rand = random.Random(0)
+	walk = [] #random walk over the even keys, inserting the odd keys next to it
+	key = n
+	for i in range(ops):
+		key = min(max(key + 2 * rand.randint(-step, step), 0), 2 * n - 2)
+		walk.append(key)
+	edges = {}
+	for name in ("search", "finger_search"):
+		tree = AVLTree.from_sorted((key, None) for key in range(0, 2 * n, 2))
+		method = getattr(tree, name)
+		edges[name] = sum(method(key)[1] for key in walk) / ops
+	for name in ("insert", "finger_insert"):
+		tree = AVLTree.from_sorted((key, None) for key in range(0, 2 * n, 2))
+		method = getattr(tree, name)
+		total = count = 0
+		for key in walk:
+			if tree.search(key + 1)[0] is None:
+				total += method(key + 1, None)[1]
+				count += 1
+		edges[name] = total / count
+	return edges
+
+
+"""compares inserting and deleting a batch with insert_many and delete_many, and one key at a time
+
+@type n: int
+@param n: number of keys in the tree
+@type k: int
+@param k: number of keys in the batch
+@rtype: dict
+@returns: seconds taken by each method
+"""
+
+def bench_batch(n, k):
+	rand = random.Random(0)
+	batch = [2 * key + 1 for key in rand.sample(range(n), k)]
+	seconds = {}
+	tree = AVLTree.from_sorted((key, None) for key in range(0, 2 * n, 2))
+	start = time.perf_counter()
+	for key in batch:
+		tree.insert(key, None)
+	seconds["insert"] = time.perf_counter() - start
+	start = time.perf_counter()
+	for key in batch:
+		tree.delete(tree.search(key)[0])
+	seconds["delete"] = time.perf_counter() - start
+	start = time.perf_counter()
+	tree.insert_many((key, None) for key in batch)
+	seconds["insert_many"] = time.perf_counter() - start
+	start = time.perf_counter()
+	tree.delete_many(batch)
+	seconds["delete_many"] = time.perf_counter() - start
+	return seconds
+
+
+"""compares the throughput of threads sharing a tree behind one global lock and sharing a
+ConcurrentAVLTree, on a mix of searches and upserts
+
+@type n: int
+@param n: number of keys in the tree
+@type threads: int
+@param threads: number of threads
+@type readRatio: float
+@param readRatio: the fraction of operations that are searches
+@type ops: int
+@param ops: number of operations of each thread
+@rtype: (float, float)
+@returns: a tuple (g, c) of operations per second with the global lock and with ConcurrentAVLTree
+"""
+
+def bench_concurrent(n, threads, readRatio, ops = 10000):
+	items = [(key, None) for key in range(n)]
+	globalLock = threading.Lock()
+	plain = AVLTree.from_sorted(items)
+
+	def locked_search(key):
+		with globalLock: return plain.search(key)
+
+	def locked_upsert(key, val):
+		with globalLock: return plain.upsert(key, val)
+
+	shared = ConcurrentAVLTree(AVLTree.from_sorted(items))
+	results = []
+	for search, upsert in ((locked_search, locked_upsert), (shared.search, shared.upsert)):
+		def worker(seed):
+			rand = random.Random(seed)
+			for i in range(ops):
+				key = rand.randrange(n)
+				if rand.random() < readRatio: search(key)
+				else: upsert(key, i)
+		workers = [threading.Thread(target = worker, args = (seed,)) for seed in range(threads)]
+		start = time.perf_counter()
+		for thread in workers: thread.start()
+		for thread in workers: thread.join()
+		results.append(threads * ops / (time.perf_counter() - start))
+	return results[0], results[1]
+
+
+"""measures the memory added by each version of a persistent tree, keeping all the versions
+
+@type n: int
+@param n: number of keys in the first version
+@type versions: int
+@param versions: number of versions made by inserting one key each
+@rtype: (float, float)
+@returns: a tuple (b, k) of the bytes per version and the bytes per key of the first version
+"""
+
+def bench_versions(n, versions = 1000):
+	tracemalloc.start()
+	start = tracemalloc.get_traced_memory()[0]
+	tree = PersistentAVLTree.from_sorted((2 * key, None) for key in range(n))
+	base = tracemalloc.get_traced_memory()[0] - start
+	history = [tree]
+	rand = random.Random(0)
+	for i in range(versions):
+		tree = tree.insert(2 * rand.randrange(n) + 1, None)
+		history.append(tree)
+	used = tracemalloc.get_traced_memory()[0] - start - base
+	tracemalloc.stop()
+	return used / versions, base / n
+
+
+"""compares the pointer-based AVLTree with the array-backed ArrayAVLTree on random inserts,
+searches and deletes
+
+@type n: int
+@param n: number of keys
+@rtype: dict
+@returns: for each class name, a dict of operations per second and bytes per key
+"""
+
+def bench_engines(n):
+	keys = list(range(n))
+	random.Random(0).shuffle(keys)
+	results = {}
+	for cls in (AVLTree, ArrayAVLTree):
+		result = {}
+		tracemalloc.start()
+		tree = cls()
+		for key in keys:
+			tree.insert(key, None)
+		result["bytes/key"] = tracemalloc.get_traced_memory()[0] / n
+		tracemalloc.stop()
+		start = time.perf_counter()
+		tree = cls()
+		for key in keys:
+			tree.insert(key, None)
+		result["insert/s"] = n / (time.perf_counter() - start)
+		start = time.perf_counter()
+		for key in keys:
+			tree.search(key)
+		result["search/s"] = n / (time.perf_counter() - start)
+		start = time.perf_counter()
+		for key in keys:
+			tree.delete(tree.search(key)[0])
+		result["search+delete/s"] = n / (time.perf_counter() - start)
+		results[cls.__name__] = result
+	return results
+
+
+"""compares looking up a batch of keys with search_many and with a loop of search calls
+
+@type n: int
+@param n: number of keys in the tree
+@type k: int
+@param k: number of keys looked up, half of them appear in the tree
+@rtype: (float, float)
+@returns: a tuple (m, s) of lookups per second with search_many and with search
+"""
+
+def bench_search_many(n, k = 50000):
+	tree = AVLTree.from_sorted((key, key) for key in range(0, 2 * n, 2))
+	rand = random.Random(0)
+	queries = [rand.randrange(2 * n) for i in range(k)]
+	start = time.perf_counter()
+	tree.search_many(queries)
+	many = time.perf_counter() - start
+	start = time.perf_counter()
+	for key in queries:
+		tree.search(key)
+	loop = time.perf_counter() - start
+	return k / many, k / loop
+
+
+"""measures saving a tree to a file, loading it back, and searching the memory-mapped file
+
+@type n: int
+@param n: number of keys in the tree
+@type searches: int
+@param searches: number of searches in the mapped file
+@rtype: dict
+@returns: seconds taken by save, load, opening the mapped file and the searches in it
+"""
+
+def bench_file(n, searches = 10000):
+	tree = AVLTree.from_sorted((key, str(key)) for key in range(n))
+	seconds = {}
+	fd, path = tempfile.mkstemp(suffix = ".avl")
+	os.close(fd)
+	try:
+		start = time.perf_counter()
+		save(tree, path)
+		seconds["save"] = time.perf_counter() - start
+		del tree
+		start = time.perf_counter()
+		load(path)
+		seconds["load"] = time.perf_counter() - start
+		start = time.perf_counter()
+		with MappedAVLTree(path) as mapped:
+			seconds["open"] = time.perf_counter() - start
+			rand = random.Random(0)
+			start = time.perf_counter()
+			for i in range(searches):
+				mapped.get_value(mapped.search(rand.randrange(n))[0])
+			seconds["search"] = time.perf_counter() - start
+	finally:
+		os.remove(path)
+	return seconds
+
+
+"""compares summing the values of windows of keys with aggregate and by scanning avl_to_array
+
+@type n: int
+@param n: number of keys in the tree
+@type queries: int
+@param queries: number of windows
+@rtype: (float, float)
+@returns: a tuple (a, s) of windows per second with aggregate and with the scan
+"""
+
+def bench_aggregate(n, queries = 100):
+	tree = AVLTree.from_sorted(((key, key % 100) for key in range(n)), monoid = SUM)
+	rand = random.Random(0)
+	windows = [sorted((rand.randrange(n), rand.randrange(n))) for i in range(queries)]
+	start = time.perf_counter()
+	for lo, hi in windows:
+		tree.aggregate(lo, hi)
+	aggregate = time.perf_counter() - start
+	start = time.perf_counter()
+	for lo, hi in windows:
+		sum(val for key, val in tree.avl_to_array() if lo <= key <= hi)
+	scan = time.perf_counter() - start
+	return queries / aggregate, queries / scan
+
+
+"""compares exporting the tree with the recursive avl_to_array_rec, the iterative avl_to_array,
+and avl_to_arrays into preallocated lists and into a preallocated array.array of keys
+
+@type n: int
+@param n: number of keys in the tree
+@rtype: dict
+@returns: the seconds taken by each way of exporting, the best of 3 runs
+"""
+
+def bench_export(n):
+	tree = AVLTree.from_sorted((key, key) for key in range(n))
+
+	def recursive():
+		arr = []
+		tree.avl_to_array_rec(tree.get_root(), arr)
+
+	exports = {
+		"avl_to_array_rec": recursive,
+		"avl_to_array": tree.avl_to_array,
+		"avl_to_arrays": tree.avl_to_arrays,
+		"avl_to_arrays(array)": lambda: tree.avl_to_arrays(array("q", bytes(8 * n)), [None] * n),
+	}
+	seconds = {}
+	for name, export in exports.items():
+		best = None
+		for i in range(3):
+			start = time.perf_counter()
+			export()
+			elapsed = time.perf_counter() - start
+			if best is None or elapsed < best: best = elapsed
+		seconds[name] = best
+	return seconds
+
+
+"""measures building a tree from shuffled items and exporting it with ParallelAVLTree, for several
+numbers of worker processes
+
+@type n: int
+@param n: number of keys
+@type workerCounts: tuple
+@param workerCounts: the numbers of workers to measure, 1 builds and exports in the main process
+@rtype: dict
+@returns: for each number of workers, a tuple (b, e) of the seconds taken by the build and the export
+"""
+
+def bench_parallel(n, workerCounts = (1, 2, 4, 8)):
+	items = [(key, key) for key in range(n)]
+	random.Random(0).shuffle(items)
+	seconds = {}
+	for workers in workerCounts:
+		start = time.perf_counter()
+		tree = ParallelAVLTree.from_items(items, workers)
+		build = time.perf_counter() - start
+		start = time.perf_counter()
+		ParallelAVLTree.avl_to_arrays(tree, workers)
+		seconds[workers] = (build, time.perf_counter() - start)
+	return seconds
+
+
+"""compares lookup with an LRU cache, with an LFU cache and without a cache, on a skewed workload
+where a few keys get most of the lookups
+
+@type n: int
+@param n: number of keys in the tree
+@type capacity: int
+@param capacity: the capacity of the caches
+@type ops: int
+@param ops: number of lookups
+@rtype: dict
+@returns: for each cache, a tuple (l, h) of lookups per second and the hit rate
+"""
+
+def bench_cache(n, capacity = 1024, ops = 100000):
+	rand = random.Random(0)
+	keys = [min(int(rand.paretovariate(1.2)) - 1, n - 1) for i in range(ops)] #key k is looked up about 1/k^2.2 of the times
+	results = {}
+	for policy in (None, "lru", "lfu"):
+		tree = AVLTree.from_sorted((key, None) for key in range(n))
+		if policy is not None: tree.enable_cache(capacity, policy)
+		start = time.perf_counter()
+		for key in keys:
+			tree.lookup(key)
+		elapsed = time.perf_counter() - start
+		stats = tree.get_cache_stats()
+		results[policy or "none"] = (ops / elapsed, stats["hit_rate"] if stats is not None else 0.0)
+	return results
+
+
+"""compares finding the latest key at or before a time with floor and with bisect over avl_to_array
+
+@type n: int
+@param n: number of keys in the tree
+@type queries: int
+@param queries: number of queries, half of them after the max key
+@rtype: (float, float)
+@returns: a tuple (f, b) of queries per second with floor and with bisect over avl_to_array
+"""
+
+def bench_floor(n, queries = 100):
+	tree = AVLTree.from_sorted((2 * key, None) for key in range(n))
+	rand = random.Random(0)
+	times = [rand.randrange(2 * n) if i % 2 else 2 * n + i for i in range(queries)]
+	start = time.perf_counter()
+	for t in times:
+		tree.floor(t)
+	floor = time.perf_counter() - start
+	start = time.perf_counter()
+	for t in times:
+		keys = [key for key, val in tree.avl_to_array()]
+		keys[bisect_right(keys, t) - 1]
+	scan = time.perf_counter() - start
+	return queries / floor, queries / scan
+
+
+"""compares the join-based set operations with loops of insert, search and delete, and with the
+sharded merge of ParallelAVLTree, on a tree of n keys and a tree of m keys sharing about half of them
+
+@type n: int
+@param n: number of keys in the first tree
+@type m: int
+@param m: number of keys in the second tree
+@rtype: dict
+@returns: for each operation, a dict of the seconds taken by each method
+"""
+
+def bench_set_operations(n, m):
+	rand = random.Random(0)
+	keys1 = sorted(rand.sample(range(2 * n), n))
+	keys2 = sorted(rand.sample(range(2 * n), m))
+	trees = lambda: (AVLTree.from_sorted((key, key) for key in keys1), AVLTree.from_sorted((key, -key) for key in keys2))
+
+	def loop_union(tree1, tree2):
+		for key, val in tree2.avl_to_array():
+			tree1.upsert(key, val)
+
+	def loop_intersection(tree1, tree2):
+		small, large = (tree2, tree1) if tree2.size() <= tree1.size() else (tree1, tree2)
+		result = AVLTree()
+		for key, val in small.avl_to_array():
+			if large.search(key)[0] is not None: result.insert(key, tree1.search(key)[0].get_value())
+		return result
+
+	def loop_difference(tree1, tree2):
+		for key, val in tree2.avl_to_array():
+			node = tree1.search(key)[0]
+			if node is not None: tree1.delete(node)
+
+	baselines = {"union": loop_union, "intersection": loop_intersection, "difference": loop_difference}
+	results = {}
+	for operation, baseline in baselines.items():
+		seconds = {}
+		for name, run in (("join", lambda t1, t2: getattr(t1, operation)(t2)), ("loop", baseline),
+				("sharded", lambda t1, t2: getattr(ParallelAVLTree, operation)(t1, t2))):
+			tree1, tree2 = trees()
+			start = time.perf_counter()
+			run(tree1, tree2)
+			seconds[name] = time.perf_counter() - start
+		results[operation] = seconds
+	return results
+
+
+"""measures the write throughput of DurableAVLTree under each fsync policy, and of an AVLTree
+
+@type n: int
+@param n: number of inserted keys
+@type threads: int
+@param threads: number of writer threads, more than 1 lets the "always" policy share fsyncs
+@rtype: dict
+@returns: for each policy, a tuple (w, f) of inserts per second and the number of fsyncs
+"""
+
+def bench_durable(n, threads = 1):
+	keys = list(range(n))
+	random.Random(0).shuffle(keys)
+	results = {}
+	tree = AVLTree()
+	start = time.perf_counter()
+	for key in keys:
+		tree.insert(key, None)
+	results["memory"] = (n / (time.perf_counter() - start), 0)
+	for policy in DURABLE_POLICIES:
+		directory = tempfile.mkdtemp()
+		try:
+			durable = DurableAVLTree(directory, policy)
+			def write(part):
+				for key in part:
+					durable.insert(key, None)
+			workers = [threading.Thread(target = write, args = (keys[i::threads],)) for i in range(threads)]
+			start = time.perf_counter()
+			for worker in workers:
+				worker.start()
+			for worker in workers:
+				worker.join()
+			durable.close() #the pending records are fsynced too
+			elapsed = time.perf_counter() - start
+			results[policy] = (n / elapsed, durable.get_stats()["fsyncs"])
+		finally:
+			shutil.rmtree(directory)
+	return results
+
+
+"""measures the recovery of DurableAVLTree from a checkpoint of n keys and a log of k more changes
+
+@type n: int
+@param n: number of keys in the checkpoint
+@type k: int
+@param k: number of records in the log after the checkpoint
+@rtype: dict
+@returns: the seconds taken by the checkpoint, by recovering the checkpoint alone and by recovering
+the checkpoint and the log
+"""
+
+def bench_recovery(n, k = 10 ** 5):
+	directory = tempfile.mkdtemp()
+	seconds = {}
+	try:
+		with DurableAVLTree(directory, "none") as durable:
+			durable.join(AVLTree.from_sorted((key, str(key)) for key in range(1, n)), 0, "0")
+			start = time.perf_counter()
+			durable.checkpoint()
+			seconds["checkpoint"] = time.perf_counter() - start
+		start = time.perf_counter()
+		with DurableAVLTree(directory, "none") as durable:
+			seconds["recover"] = time.perf_counter() - start
+			rand = random.Random(0)
+			for i in range(k):
+				durable.upsert(rand.randrange(2 * n), "x")
+		start = time.perf_counter()
+		with DurableAVLTree(directory, "none") as durable:
+			seconds["recover+log"] = time.perf_counter() - start
+	finally:
+		shutil.rmtree(directory)
+	return seconds
+
+
+"""compares the latency of lookups under a mixed load, calling an AVLTree directly on the event
+loop and through AsyncAVLTree. Clients look up random keys while one coroutine inserts keys and
+another exports the whole tree again and again
+
+@type n: int
+@param n: number of keys in the tree
+@type clients: int
+@param clients: number of client coroutines
+@type lookups: int
+@param lookups: number of lookups of each client
+@rtype: dict
+@returns: for each way, a tuple (p50, p99, max) of the lookup latencies in microseconds, counting
+the time a client waits to be scheduled
+"""
+
+def bench_async(n, clients = 100, lookups = 200):
+
+	def direct(tree):
+		async def search(key):
+			return tree.search(key)[0]
+		async def insert(key, val):
+			return tree.insert(key, val)
+		async def export():
+			return tree.avl_to_array()
+		return search, insert, export
+
+	def facade(tree):
+		served = AsyncAVLTree(tree)
+		return served.search, served.insert, served.avl_to_array
+
+	async def run(search, insert, export):
+		rand = random.Random(0)
+		latencies = []
+		done = []
+		async def client():
+			for i in range(lookups):
+				key = 2 * rand.randrange(n)
+				start = time.perf_counter()
+				await asyncio.sleep(0) #the time waiting for the loop counts
+				await search(key)
+				latencies.append(time.perf_counter() - start)
+			done.append(True)
+		async def writer():
+			key = 1
+			while len(done) < clients:
+				await insert(key, None)
+				key += 2
+				await asyncio.sleep(0)
+		async def exporter():
+			while len(done) < clients:
+				await export()
+				await asyncio.sleep(0.001)
+		await asyncio.gather(writer(), exporter(), *[client() for i in range(clients)])
+		latencies.sort()
+		return tuple(latencies[int(q * (len(latencies) - 1))] * 1e6 for q in (0.5, 0.99, 1.0))
+
+	results = {}
+	for name, way in (("direct", direct), ("AsyncAVLTree", facade)):
+		tree = AVLTree.from_sorted((2 * key, None) for key in range(n))
+		results[name] = asyncio.run(run(*way(tree)))
+	return results
+
+
+"""compares the write throughput of strict and relaxed balance, on a stream of inserts followed by
+deletes of half the keys. The relaxed time includes the last fix_balance, so both trees end AVL
+
+@type n: int
+@param n: number of keys inserted
+@type order: str
+@param order: "random" or "sorted", the order of the inserted keys
+@type slacks: tuple
+@param slacks: the slacks of the relaxed runs, see AVLTree.enable_relaxed
+@rtype: dict
+@returns: for strict and each slack, a tuple (u, r, j, a, h) of updates per second, rotations per
+update, subtrees rebuilt by fix_balance per update, nodes visited for balance per update and final
+height. The rotations and the visits include those of the joins of fix_balance
+"""
+
+def bench_relaxed(n, order = "random", slacks = (1, 2)):
+	keys = list(range(n))
+	if order == "random": random.Random(0).shuffle(keys)
+	deleted = keys[::2]
+	updates = n + len(deleted)
+
+	def run(slack, counted):
+		tree = AVLTree()
+		if slack is not None: tree.enable_relaxed(slack)
+		if counted: tree.enable_stats()
+		start = time.perf_counter()
+		for key in keys:
+			tree.insert(key, None)
+		for key in deleted:
+			tree.delete_key(key)
+		if slack is not None: tree.fix_balance()
+		return time.perf_counter() - start, tree
+
+	results = {}
+	for slack in (None,) + tuple(slacks):
+		elapsed = min(run(slack, False)[0] for i in range(3))
+		tree = run(slack, True)[1] #a second run, counting the work
+		stats = tree.get_stats()
+		rotations = stats["single_rotations"] + stats["double_rotations"] #in relaxed mode, by fix_balance
+		relaxed = tree.get_relaxed_stats()
+		joins = relaxed["fixer_joins"] if relaxed is not None else 0
+		name = "strict" if slack is None else "slack=%d" % slack
+		results[name] = (updates / elapsed, rotations / updates, joins / updates, stats["ancestor_visits"] / updates,
+			tree.get_root().get_height())
+	return results
+
+
+"""runs the side-by-side comparisons of the other modules and methods, printing the results
+"""
+
+def run_comparisons():
+	for n in (10 ** 3, 10 ** 4, 10 ** 5):
+		print("memory  n=%-8d %8.1f bytes/key" % (n, bench_memory(n)))
+	for n in (10 ** 4, 10 ** 5):
+		build, insert = bench_build(n)
+		print("build   n=%-8d from_sorted %.3fs  insert %.3fs  (x%.1f)" % (n, build, insert, insert / build))
+	for n in (10 ** 5, 10 ** 6):
+		scan, array = bench_window(n)
+		print("window  n=%-8d items(lo, hi) %.6fs  avl_to_array %.3fs" % (n, scan, array))
+	for n in (10 ** 4, 10 ** 5, 10 ** 6):
+		splits, joins = bench_split_join(n)
+		print("split   n=%-8d %10.0f splits/s %10.0f joins/s" % (n, splits, joins))
+	for n in (10 ** 4, 10 ** 5):
+		edges = bench_finger(n)
+		print("finger  n=%-8d " % n + "  ".join("%s %.1f edges" % item for item in edges.items()))
+	for n, k in ((10 ** 5, 100), (10 ** 5, 10 ** 4), (10 ** 5, 10 ** 5)):
+		seconds = bench_batch(n, k)
+		print("batch   n=%-8d k=%-7d " % (n, k) + "  ".join("%s %.3fs" % item for item in seconds.items()))
+	for readRatio in (0.5, 0.9, 0.99):
+		locked, shared = bench_concurrent(10 ** 5, 4, readRatio)
+		print("threads n=%-8d reads=%.2f  global lock %8.0f ops/s  ConcurrentAVLTree %8.0f ops/s" % (10 ** 5, readRatio, locked, shared))
+	for n in (10 ** 4, 10 ** 5, 10 ** 6):
+		perVersion, perKey = bench_versions(n)
+		print("persist n=%-8d %8.0f bytes/version  (%.0f bytes/key for the first version)" % (n, perVersion, perKey))
+	for n in (10 ** 4, 10 ** 5):
+		for name, result in bench_engines(n).items():
+			print("engine  n=%-8d %-13s " % (n, name) + "  ".join("%s %.0f" % item for item in result.items()))
+	for n in (10 ** 4, 10 ** 5, 10 ** 6):
+		many, loop = bench_search_many(n)
+		print("lookup  n=%-8d k=50000  search_many %8.0f keys/s  search %8.0f keys/s" % (n, many, loop))
+	for n in (10 ** 5, 10 ** 6):
+		seconds = bench_file(n)
+		print("file    n=%-8d " % n + "  ".join("%s %.3fs" % item for item in seconds.items()))
+	for n in (10 ** 5, 10 ** 6):
+		seconds = bench_export(n)
+		print("export  n=%-8d " % n + "  ".join("%s %.3fs" % item for item in seconds.items()))
+	for n in (10 ** 6,):
+		for workers, (build, export) in bench_parallel(n).items():
+			print("shards  n=%-8d workers=%-3d from_items %.3fs  avl_to_arrays %.3fs  (%d CPUs)" % (n, workers, build, export, os.cpu_count()))
+	for n in (10 ** 5, 10 ** 6):
+		results = bench_cache(n)
+		print("cache   n=%-8d " % n + "  ".join("%s %8.0f lookups/s (hits %.2f)" % (name, rate, hits) for name, (rate, hits) in results.items()))
+	for n in (10 ** 4, 10 ** 5):
+		floor, scan = bench_floor(n)
+		print("floor   n=%-8d floor %10.0f queries/s  avl_to_array + bisect %8.1f queries/s" % (n, floor, scan))
+	for n, m in ((10 ** 5, 100), (10 ** 5, 10 ** 4), (10 ** 5, 10 ** 5)):
+		for operation, seconds in bench_set_operations(n, m).items():
+			print("setop   n=%-8d m=%-7d %-12s " % (n, m, operation) + "  ".join("%s %.4fs" % item for item in seconds.items()))
+	for threads in (1, 8):
+		results = bench_durable(10 ** 4, threads)
+		print("wal     n=%-8d threads=%-3d " % (10 ** 4, threads) + "  ".join("%s %8.0f inserts/s (%d fsyncs)" % (name, rate, fsyncs) for name, (rate, fsyncs) in results.items()))
+	for n in (10 ** 5, 10 ** 6):
+		seconds = bench_recovery(n)
+		print("recover n=%-8d k=%-7d " % (n, 10 ** 5) + "  ".join("%s %.3fs" % item for item in seconds.items()))
+	for n in (10 ** 5, 10 ** 6):
+		for name, (p50, p99, worst) in bench_async(n).items():
+			print("async   n=%-8d %-13s lookup p50 %8.0fus  p99 %8.0fus  max %8.0fus" % (n, name, p50, p99, worst))
+	for n in (10 ** 5,):
+		for order in ("random", "sorted"):
+			for name, (rate, rotations, joins, visits, height) in bench_relaxed(n, order).items():
+				print("relaxed n=%-8d %-7s %-8s %8.0f updates/s  %.3f rotations/update  %.3f fixer joins/update  %5.2f balance visits/update  height %d" % (n, order, name, rate, rotations, joins, visits, height))
+	for n in (10 ** 4, 10 ** 5):
+		aggregate, scan = bench_aggregate(n)
+		print("window  n=%-8d sum: aggregate %10.0f windows/s  avl_to_array scan %8.1f windows/s" % (n, aggregate, scan))
+
+
+"""parses a comma-separated list of the command line
+
+@type text: str
+@param text: the argument
+@type choices: tuple
+@param choices: the allowed names, None for numbers (1e5 is allowed)
+@rtype: list
+"""
+
+def parse_list(text, choices = None):
+	names = [name.strip() for name in text.split(",") if name.strip()]
+	if choices is None: return [int(float(name)) for name in names]
+	for name in names:
+		if name not in choices: raise argparse.ArgumentTypeError("%s is not one of %s" % (name, ", ".join(choices)))
+	return names
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Benchmarks for the AVL tree")
+	parser.add_argument("--sizes", type = parse_list, default = "1e3,1e4,1e5",
+		help = "comma-separated tree sizes, 1e3 to 1e7 (default 1e3,1e4,1e5)")
+	parser.add_argument("--distributions", type = lambda text: parse_list(text, DISTRIBUTIONS),
+		default = ",".join(DISTRIBUTIONS), help = "comma-separated key orders out of " + ", ".join(DISTRIBUTIONS))
+	parser.add_argument("--operations", type = lambda text: parse_list(text, OPERATIONS),
+		default = ",".join(OPERATIONS), help = "comma-separated operations out of " + ", ".join(OPERATIONS))
+	parser.add_argument("--count", type = int, default = 10000, help = "calls measured per size and distribution")
+	parser.add_argument("--seed", type = int, default = 0)
+	parser.add_argument("--no-memory", action = "store_true", help = "skip the second run measuring peak memory")
+	parser.add_argument("--json", help = "write the results to this file")
+	parser.add_argument("--compare", help = "compare with results written earlier with --json")
+	parser.add_argument("--comparisons", action = "store_true",
+		help = "run the side-by-side comparisons of the other modules instead of the suite")
+	args = parser.parse_args()
+	if args.comparisons:
+		run_comparisons()
+	else:
+		results = run_suite(args.sizes, args.distributions, args.operations, args.count, args.seed, not args.no_memory)
+		if args.json:
+			report = {"python": platform.python_version(), "platform": platform.platform(), "count": args.count,
+				"seed": args.seed, "results": results}
+			with open(args.json, "w") as f:
+				json.dump(report, f, indent = 1, sort_keys = True)
+				f.write("\n")
+		if args.compare:
+			with open(args.compare) as f:
+				compare_results(results, json.load(f)["results"])
@@ -0,0 +1,86 @@
+"""Tests of AVLCache, run with python -m unittest"""
+
+import unittest
+
+from AVLCache import LFUCache, LRUCache
+from AVLTree import AVLTree
+
+
+class TestEviction(unittest.TestCase):
+
+	"""LRUCache evicts the least recently used key"""
+
+	def test_lru_order(self):
+		cache = LRUCache(3)
+		for key in (1, 2, 3):
+			cache.put(key, key)
+		cache.get(1) #2 is now the least recently used
+		cache.put(4, 4)
+		self.assertEqual(list(cache.entries), [3, 1, 4])
+		cache.put(5, 5)
+		self.assertEqual(list(cache.entries), [1, 4, 5])
+		self.assertEqual(cache.counters["evictions"], 2)
+
+	"""LFUCache evicts the least frequently used key, the least recently used among equals"""
+
+	def test_lfu_order(self):
+		cache = LFUCache(3)
+		for key in (1, 2, 3):
+			cache.put(key, key)
+		cache.get(1)
+		cache.get(1)
+		cache.get(3)
+		cache.put(4, 4) #2 was used once
+		self.assertEqual(sorted(cache.entries), [1, 3, 4])
+		cache.put(5, 5) #4 was used once, 3 twice
+		self.assertEqual(sorted(cache.entries), [1, 3, 5])
+		cache.discard(5)
+		cache.put(6, 6)
+		cache.put(7, 7) #6 was used once, and is older than 7
+		self.assertEqual(sorted(cache.entries), [1, 3, 7])
+
+
+class TestTreeCache(unittest.TestCase):
+
+	"""split moves the entries to the two trees with the history of the counters, and join merges
+	them back while there is room"""
+
+	def test_split_join(self):
+		for policy in ("lru", "lfu"):
+			tree = AVLTree.from_sorted((key, str(key)) for key in range(100))
+			tree.enable_cache(8, policy)
+			for key in (10, 20, 50, 70, 90, 200):
+				tree.lookup(key)
+			tree.lookup(20)
+			stats = tree.get_cache_stats()
+			t1, t2 = tree.split(tree.search(50)[0])
+			for part in (t1, t2):
+				partStats = part.get_cache_stats()
+				self.assertEqual((partStats["hits"], partStats["misses"]), (stats["hits"], stats["misses"]))
+			self.assertEqual(sorted(t1.cache.entries), [10, 20])
+			self.assertEqual(sorted(t2.cache.entries), [70, 90])
+			self.assertIs(t1.lookup(20), t1.search(20)[0])
+			t1.join(t2, 50, "50")
+			self.assertEqual(sorted(t1.cache.entries), [10, 20, 70, 90])
+			for key in (10, 20, 70, 90):
+				self.assertIs(t1.lookup(key), t1.search(key)[0])
+			self.assertEqual(len(t2.cache), 0)
+
+	"""a full cache takes the joined entries only while there is room"""
+
+	def test_join_full(self):
+		t1 = AVLTree.from_sorted((key, None) for key in range(10))
+		t2 = AVLTree.from_sorted((key, None) for key in range(20, 30))
+		t1.enable_cache(3)
+		t2.enable_cache(3)
+		for key in (1, 2):
+			t1.lookup(key)
+		for key in (21, 22):
+			t2.lookup(key)
+		t1.join(t2, 15, None)
+		self.assertEqual(len(t1.cache), 3)
+		self.assertTrue(set(t1.cache.entries) >= {1, 2})
+
+
+if __name__ == "__main__":
+	unittest.main()
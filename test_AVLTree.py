@@ -0,0 +1,174 @@
+"""Tests of AVLTree, run with python -m unittest"""
+
+import copy
+import pickle
+import random
+import unittest
+
+from AVLTree import AVLTree, VIRTUAL_NODE
+
+
+"""checks the links, heights and sizes of a tree, and its balance
+
+@type test: unittest.TestCase
+@param test: the test making the assertions
+@type tree: AVLTree
+@param tree: the tree to check
+@type strict: bool
+@param strict: True to require every balance factor to be in -1, 0, 1, False to require only that
+every node out of balance is marked for fix_balance
+@rtype: list
+@returns: the keys of the tree in order
+"""
+
+def check_tree(test, tree, strict = True):
+	node = tree.get_root()
+	if node is not None: test.assertIsNone(node.get_parent())
+	nodes = [] #in order, each node after its subtrees are checked
+	def visit(node):
+		if not node.is_real_node(): return None
+		for child in (node.left, node.right):
+			if child.is_real_node(): test.assertIs(child.parent, node)
+			visit(child)
+		test.assertEqual(node.height, max(node.left.height, node.right.height) + 1)
+		test.assertEqual(node.size, node.left.size + node.right.size + 1)
+		bf = node.get_balance_factor()
+		if strict: test.assertLessEqual(abs(bf), 1)
+		elif abs(bf) > 1: test.assertIn(node, tree.relaxed["imbalanced"])
+		nodes.append(node)
+	if node is not None: visit(node)
+	keys = [node.key for node in sorted(nodes, key = lambda node: node.key)]
+	test.assertEqual(len(keys), tree.size())
+	return keys
+
+
+class TestRelaxedBalance(unittest.TestCase):
+
+	"""random inserts and deletes keep every node out of balance marked, and disable_relaxed leaves
+	an AVL tree"""
+
+	def test_random_updates(self):
+		for seed in range(20):
+			rand = random.Random(seed)
+			keys = list(range(2000))
+			rand.shuffle(keys)
+			tree = AVLTree()
+			tree.enable_relaxed(rand.choice((1, 2, 3)), rand.choice((8, 64, 1024)))
+			for key in keys:
+				tree.insert(key, None)
+			check_tree(self, tree, False)
+			deleted = keys[::2]
+			if seed % 2 == 0:
+				for key in deleted:
+					tree.delete_key(key)
+					if rand.random() < 0.01: check_tree(self, tree, False)
+			else:
+				tree.delete_many(deleted)
+			self.assertEqual(check_tree(self, tree, False), sorted(keys[1::2]))
+			tree.disable_relaxed()
+			self.assertIsNone(tree.relaxed)
+			self.assertEqual(check_tree(self, tree), sorted(keys[1::2]))
+
+	"""fix_balance restores the balance in the middle of a run of updates"""
+
+	def test_fix_balance(self):
+		rand = random.Random(0)
+		tree = AVLTree()
+		tree.enable_relaxed(2, 10 ** 6)
+		present = set()
+		for i in range(5000):
+			key = rand.randrange(1000)
+			if key in present:
+				tree.delete_key(key)
+				present.discard(key)
+			else:
+				tree.insert(key, None)
+				present.add(key)
+			if i % 500 == 0:
+				tree.fix_balance()
+				self.assertEqual(check_tree(self, tree), sorted(present))
+		self.assertEqual(check_tree(self, tree, False), sorted(present))
+
+	"""a node that stays out of balance is marked and counted once"""
+
+	def test_marked_once(self):
+		tree = AVLTree()
+		tree.enable_relaxed(10, 10 ** 6)
+		for key in range(8):
+			tree.insert(key, None)
+		stats = tree.get_relaxed_stats()
+		self.assertEqual(stats["fixes"], 0)
+		self.assertEqual(stats["rotations_deferred"], stats["imbalanced"])
+		self.assertEqual(len(tree.relaxed["imbalanced"]), stats["imbalanced"])
+
+	"""the counters of enable_stats count the nodes the relaxed loop visits, not the depth"""
+
+	def test_stats_visits(self):
+		keys = list(range(200))
+		random.Random(0).shuffle(keys)
+		tree = AVLTree()
+		tree.enable_relaxed(30, 10 ** 6) #no fix_balance, its joins are counted by depth
+		tree.enable_stats()
+		for key in keys:
+			tree.insert(key, None)
+		relaxed = tree.get_relaxed_stats()
+		self.assertEqual(relaxed["fixes"], 0)
+		self.assertEqual(tree.get_stats()["ancestor_visits"], relaxed["ancestor_visits"])
+
+
+class TestSetOperations(unittest.TestCase):
+
+	"""union consumes the other tree, intersection and difference leave it unchanged"""
+
+	def test_other_tree(self):
+		rand = random.Random(0)
+		keys1 = sorted(rand.sample(range(1000), 300))
+		keys2 = sorted(rand.sample(range(1000), 200))
+		expected = {"union": sorted(set(keys1) | set(keys2)), "intersection": sorted(set(keys1) & set(keys2)),
+			"difference": sorted(set(keys1) - set(keys2))}
+		for operation, keys in expected.items():
+			tree1 = AVLTree.from_sorted((key, None) for key in keys1)
+			tree2 = AVLTree.from_sorted((key, None) for key in keys2)
+			getattr(tree1, operation)(tree2)
+			self.assertEqual(check_tree(self, tree1), keys)
+			if operation == "union":
+				self.assertEqual(tree2.size(), 0)
+				self.assertIsNone(tree2.get_root())
+			else:
+				self.assertEqual(check_tree(self, tree2), keys2)
+
+
+class TestCopy(unittest.TestCase):
+
+	"""pickling and deep copying keep the items, and the leaves keep the single virtual node"""
+
+	def test_round_trip(self):
+		for n in (0, 1, 100):
+			tree = AVLTree.from_sorted((key, str(key)) for key in range(n))
+			for copied in (pickle.loads(pickle.dumps(tree)), copy.deepcopy(tree)):
+				self.assertEqual(check_tree(self, copied), list(range(n)))
+				self.assertEqual(copied.avl_to_array(), tree.avl_to_array())
+				if n > 0:
+					self.assertIsNot(copied.get_root(), tree.get_root())
+					self.assertIs(copied.min_node().get_left(), VIRTUAL_NODE)
+				copied.insert(n, None) #the copy is a working tree of its own
+				self.assertEqual(tree.size(), n)
+		self.assertIs(copy.copy(VIRTUAL_NODE), VIRTUAL_NODE)
+
+	"""a tree counting its work is copied with its counters, which go on counting in the copy only"""
+
+	def test_stats(self):
+		tree = AVLTree.from_sorted((key, None) for key in range(100))
+		tree.enable_stats()
+		tree.search(5)
+		for copied in (pickle.loads(pickle.dumps(tree)), copy.deepcopy(tree)):
+			self.assertEqual(copied.get_stats(), tree.get_stats())
+			copied.search(6)
+			copied.insert(200, None)
+			self.assertEqual(sum(copied.get_stats()["search_paths"].values()), 2)
+			self.assertEqual(sum(tree.get_stats()["search_paths"].values()), 1)
+			self.assertEqual(check_tree(self, copied), list(range(100)) + [200])
+
+
+if __name__ == "__main__":
+	unittest.main()
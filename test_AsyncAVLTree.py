@@ -0,0 +1,99 @@
+"""Tests of AsyncAVLTree, run with python -m unittest"""
+
+import asyncio
+import unittest
+
+from AsyncAVLTree import AsyncAVLTree
+from AVLTree import AVLTree
+
+
+class TestLookups(unittest.TestCase):
+
+	"""the lookups of one tick are answered by one descent"""
+
+	def test_coalescing(self):
+		async def run():
+			tree = AsyncAVLTree(AVLTree.from_sorted((key, str(key)) for key in range(0, 200, 2)))
+			values = await asyncio.gather(*[tree.get(key) for key in range(50)])
+			self.assertEqual(values, [str(key) if key % 2 == 0 else None for key in range(50)])
+			self.assertEqual(tree.get_stats()["descents"], 1)
+			self.assertEqual(tree.get_stats()["lookups"], 50)
+			await tree.get(4)
+			self.assertEqual(tree.get_stats()["descents"], 2)
+		asyncio.run(asyncio.wait_for(run(), 5))
+
+	"""lookups wait for a batch running in the executor, and see all of it"""
+
+	def test_batch(self):
+		async def run():
+			tree = AsyncAVLTree()
+			batch = asyncio.ensure_future(tree.insert_many([(key, "m") for key in range(1000)]))
+			await asyncio.sleep(0) #the batch is queued and starts
+			await asyncio.sleep(0)
+			value = await tree.get(999)
+			self.assertTrue(batch.done())
+			self.assertEqual(value, "m")
+			await tree.close()
+		asyncio.run(asyncio.wait_for(run(), 5))
+
+
+class TestQueue(unittest.TestCase):
+
+	"""changes and long reads run in the order of their calls"""
+
+	def test_order(self):
+		async def run():
+			tree = AsyncAVLTree(chunk = 10)
+			calls = [tree.upsert(1, "a"), tree.upsert(1, "b"), tree.avl_to_array(), tree.insert(2, "c"),
+				tree.delete_key(1), tree.items()]
+			results = await asyncio.gather(*calls)
+			self.assertEqual(results[2], [(1, "b")])
+			self.assertEqual(results[5], [(2, "c")])
+			await tree.insert_many([(key, None) for key in range(10, 100)])
+			self.assertEqual(len(await tree.items()), 91) #read in chunks of 10
+			self.assertEqual(tree.get_stats()["jobs"], 8)
+			await tree.close()
+		asyncio.run(asyncio.wait_for(run(), 5))
+
+
+class TestServe(unittest.TestCase):
+
+	"""a job raising CancelledError fails its own call, and the server goes on serving"""
+
+	def test_job_cancelled(self):
+		async def run():
+			tree = AsyncAVLTree()
+			async def job():
+				raise asyncio.CancelledError()
+			with self.assertRaises(asyncio.CancelledError):
+				await tree.submit(job)
+			await tree.insert(1, "a")
+			self.assertEqual(await tree.avl_to_array(), [(1, "a")])
+			await tree.close()
+		asyncio.run(asyncio.wait_for(run(), 5))
+
+	"""cancelling the server task cancels the queued calls, and the next call starts a new server"""
+
+	def test_server_cancelled(self):
+		async def run():
+			tree = AsyncAVLTree()
+			await tree.insert(1, None)
+			started = asyncio.Event()
+			async def job():
+				started.set()
+				await asyncio.sleep(10)
+			running = asyncio.ensure_future(tree.submit(job))
+			queued = asyncio.ensure_future(tree.insert(2, None))
+			await started.wait()
+			tree.server.cancel()
+			for call in (running, queued):
+				with self.assertRaises(asyncio.CancelledError):
+					await call
+			await tree.insert(3, None)
+			self.assertEqual([key for key, val in await tree.avl_to_array()], [1, 3])
+			await tree.close()
+		asyncio.run(asyncio.wait_for(run(), 5))
+
+
+if __name__ == "__main__":
+	unittest.main()
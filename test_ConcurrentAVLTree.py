@@ -0,0 +1,55 @@
+"""Tests of ConcurrentAVLTree, run with python -m unittest"""
+
+import unittest
+
+from AVLMonoid import SUM
+from AVLTree import AVLTree
+from ConcurrentAVLTree import ConcurrentAVLTree
+
+
+class TestSplit(unittest.TestCase):
+
+	"""the tree left in self by split keeps the key function and the monoid"""
+
+	def test_split_keeps_settings(self):
+		tree = ConcurrentAVLTree(AVLTree(keyFunc = abs, monoid = SUM))
+		for key in range(-5, 0):
+			tree.insert(key, -key)
+		t1, t2 = tree.split(tree.search(-3)[0])
+		self.assertIs(tree.tree.key_func, abs)
+		self.assertIs(tree.tree.monoid, SUM)
+		for key in (-7, 8, -9):
+			tree.insert(key, abs(key))
+		self.assertEqual([key for key, val in tree.avl_to_array()], [-7, 8, -9])
+		self.assertEqual(tree.aggregate(), 24)
+
+
+
+class TestJoin(unittest.TestCase):
+
+	"""joining a tree with itself raises instead of waiting for its own lock"""
+
+	def test_join_self(self):
+		tree = ConcurrentAVLTree()
+		tree.insert(1, None)
+		self.assertRaises(ValueError, tree.join, tree, 2, None)
+		self.assertEqual(tree.avl_to_array(), [(1, None)])
+
+
+class TestSearch(unittest.TestCase):
+
+	"""search runs under the read lock, so it leaves the finger and the counters alone"""
+
+	def test_search_only_reads(self):
+		tree = ConcurrentAVLTree(AVLTree.from_sorted((key, None) for key in range(100)))
+		tree.tree.enable_stats()
+		finger = tree.tree.get_finger()
+		self.assertEqual(tree.search(42)[0].get_key(), 42)
+		self.assertIsNone(tree.search(500)[0])
+		self.assertIs(tree.tree.get_finger(), finger)
+		self.assertEqual(tree.tree.get_stats()["search_paths"], {})
+		self.assertEqual(tree.finger_search(7)[0].get_key(), 7)
+		self.assertEqual(tree.tree.get_finger().get_key(), 7)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,105 @@
+"""Tests of DurableAVLTree, run with python -m unittest"""
+
+import os
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+
+from AVLTree import AVLTree
+import DurableAVLTree as durable
+from DurableAVLTree import DurableAVLTree
+
+
+class TestDurableAVLTree(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	"""returns the items recovered from the directory
+
+	@rtype: list
+	"""
+
+	def recovered(self):
+		with DurableAVLTree(self.directory, sync = "none") as tree:
+			return tree.avl_to_array()
+
+	"""every change is replayed after a restart, under every fsync policy"""
+
+	def test_recovery(self):
+		for sync in durable.POLICIES:
+			shutil.rmtree(self.directory)
+			with DurableAVLTree(self.directory, sync = sync) as tree:
+				for key in range(20):
+					tree.insert(key, str(key))
+				tree.upsert(3, b"three")
+				tree.delete_key(4)
+				tree.join(AVLTree.from_sorted([(30, "x"), (31, None)]), 25, "y")
+				right = tree.split(17)
+				expected = tree.avl_to_array()
+			self.assertEqual([key for key, val in right.avl_to_array()], [18, 19, 25, 30, 31])
+			self.assertEqual(self.recovered(), expected)
+
+	"""a record torn by a crash is cut off, and the records after the restart follow the last whole one"""
+
+	def test_torn_tail(self):
+		with DurableAVLTree(self.directory, sync = "always") as tree:
+			for key in range(10):
+				tree.insert(key, "v")
+		segment = os.path.join(self.directory, sorted(name for name in os.listdir(self.directory) if name.startswith("wal."))[-1])
+		with open(segment, "ab") as f:
+			f.write(durable.frame(bytes((durable.OP_INSERT,)) + durable.encode_item(10, "torn"))[:-3])
+		with DurableAVLTree(self.directory, sync = "always") as tree:
+			self.assertEqual(tree.get_stats()["recovered_records"], 10)
+			self.assertEqual(tree.size(), 10)
+			tree.insert(11, "after")
+		self.assertEqual([key for key, val in self.recovered()], list(range(10)) + [11])
+
+	"""a checkpoint holds the tree as it was when it started, while writers go on"""
+
+	def test_checkpoint(self):
+		chunk = durable.CHUNK
+		durable.CHUNK = 7 #many chunks, so the writers run between them
+		try:
+			tree = DurableAVLTree(self.directory, sync = "none")
+			for key in range(0, 2000, 2):
+				tree.insert(key, str(key))
+			stop = threading.Event()
+			def writer():
+				rand = random.Random(0)
+				while not stop.is_set():
+					key = rand.randrange(2100)
+					if rand.random() < 0.5: tree.upsert(key, "u")
+					else: tree.delete_key(key)
+			thread = threading.Thread(target = writer)
+			thread.start()
+			tree.checkpoint(background = True).join()
+			stop.set()
+			thread.join()
+			expected = tree.avl_to_array()
+			tree.close()
+		finally:
+			durable.CHUNK = chunk
+		self.assertEqual(tree.get_stats()["checkpoints"], 1)
+		self.assertEqual(self.recovered(), expected)
+
+	"""a change with a key that cannot be logged fails before the tree changes"""
+
+	def test_bad_key_changes_nothing(self):
+		with DurableAVLTree(self.directory, sync = "none") as tree:
+			for key in range(10):
+				tree.insert(key, None)
+			self.assertRaises(Exception, tree.delete_key, 5.0)
+			self.assertRaises(Exception, tree.split, 7.0)
+			self.assertEqual([key for key, val in tree.avl_to_array()], list(range(10)))
+		with DurableAVLTree(self.directory) as tree:
+			self.assertEqual([key for key, val in tree.avl_to_array()], list(range(10)))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,70 @@
+"""Tests of MappedAVLTree, run with python -m unittest"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from AVLTree import AVLTree
+from MappedAVLTree import MappedAVLTree, load, save, save_items
+
+
+class TestSave(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, "tree.avl")
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	"""load gives back the saved items, and MappedAVLTree serves them from the file"""
+
+	def test_round_trip(self):
+		values = [None, "", "text", "\u00e9t\u00e9", b"", b"\x00\xff"]
+		items = [(key * 3 - 50, values[key % len(values)]) for key in range(1000)]
+		tree = AVLTree.from_sorted(items)
+		save(tree, self.path)
+		loaded = load(self.path)
+		self.assertEqual(loaded.avl_to_array(), items)
+		self.assertEqual(loaded.size(), len(items))
+		with MappedAVLTree(self.path) as mapped:
+			self.assertEqual(mapped.avl_to_array(), items)
+			self.assertEqual(mapped.size(), len(items))
+			for key, val in items[::37]:
+				node, edges = mapped.search(key)
+				self.assertEqual(mapped.get_value(node), val)
+				self.assertEqual(edges, loaded.search(key)[1]) #the same path as in the loaded tree
+			self.assertIsNone(mapped.search(-49)[0])
+			self.assertEqual(list(mapped.items(0, 10)), list(tree.items(0, 10)))
+			self.assertEqual(mapped.get_key(mapped.max_node()), items[-1][0])
+
+	"""an empty tree round-trips too"""
+
+	def test_empty(self):
+		save(AVLTree(), self.path)
+		self.assertEqual(load(self.path).size(), 0)
+		with MappedAVLTree(self.path) as mapped:
+			self.assertEqual(mapped.avl_to_array(), [])
+			self.assertIsNone(mapped.search(1)[0])
+			self.assertIsNone(mapped.max_node())
+
+	"""a tree ordered by a key function is refused, its keys column would not be sorted"""
+
+	def test_key_function(self):
+		tree = AVLTree(keyFunc = lambda key: -key)
+		for key in range(5):
+			tree.insert(key, None)
+		self.assertRaises(ValueError, save, tree, self.path)
+		self.assertFalse(os.path.exists(self.path))
+
+	"""keys out of order or beyond 64 bits are refused, and the file is removed"""
+
+	def test_bad_keys(self):
+		for items in ([(2, None), (1, None)], [(1, None), (1, None)], [(1 << 63, None)], [(1.5, None)]):
+			self.assertRaises(ValueError, save_items, len(items), lambda: iter(items), self.path)
+			self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,58 @@
+"""Tests of ParallelAVLTree, run with python -m unittest"""
+
+import random
+import unittest
+
+from AVLMonoid import SUM
+from AVLTree import AVLTree
+import ParallelAVLTree
+from test_AVLTree import check_tree
+
+
+class TestFromItems(unittest.TestCase):
+
+	"""the parallel build holds the same items as the sequential one, for every number of workers"""
+
+	def test_same_as_sequential(self):
+		rand = random.Random(0)
+		keys = rand.sample(range(10 ** 6), 5000)
+		items = [(key, str(key)) for key in keys]
+		expected = AVLTree.from_items(items).avl_to_array()
+		for workers in (1, 2, 3):
+			tree = ParallelAVLTree.from_items(items, workers)
+			self.assertEqual(tree.avl_to_array(), expected)
+			check_tree(self, tree)
+
+	"""the shards are dealt by the key function, and the monoid aggregates the whole tree"""
+
+	def test_key_function(self):
+		items = [(key, key) for key in range(6000)]
+		random.Random(0).shuffle(items)
+		tree = ParallelAVLTree.from_items(items, 2, keyFunc = lambda key: -key, monoid = SUM)
+		self.assertEqual([key for key, val in tree.avl_to_array()], list(range(5999, -1, -1)))
+		self.assertEqual(tree.aggregate(), sum(range(6000)))
+
+	"""the items are dealt once, each shard getting the keys between its boundaries"""
+
+	def test_deal_shards(self):
+		shards = ParallelAVLTree.deal_shards([(key, None) for key in range(10)], None, [3, 7])
+		self.assertEqual([[item[1] for item in shard] for shard in shards], [[0, 1, 2], [3, 4, 5, 6], [7, 8, 9]])
+
+	"""the sharded export and set operations match those of a single tree"""
+
+	def test_export_and_set_operations(self):
+		rand = random.Random(1)
+		keys1 = sorted(rand.sample(range(20000), 6000))
+		keys2 = sorted(rand.sample(range(20000), 4000))
+		tree1 = AVLTree.from_sorted((key, 1) for key in keys1)
+		tree2 = AVLTree.from_sorted((key, 2) for key in keys2)
+		self.assertEqual(ParallelAVLTree.avl_to_arrays(tree1, 2), tree1.avl_to_arrays())
+		for operation in ("union", "intersection", "difference"):
+			result = getattr(ParallelAVLTree, operation)(tree1, tree2, 2)
+			expected = AVLTree.from_sorted((key, 1) for key in keys1)
+			getattr(expected, operation)(AVLTree.from_sorted((key, 2) for key in keys2))
+			self.assertEqual(result.avl_to_array(), expected.avl_to_array())
+
+
+if __name__ == "__main__":
+	unittest.main()